@@ -1,3 +1,3 @@
 from .forward import forward
-from .optimizer import optimizer
+from .optimizer import optimizer, optimize_batch, build_atlas, start_workers
 from .start_gui import start_gui
\ No newline at end of file
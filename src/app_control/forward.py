@@ -32,7 +32,8 @@ def forward(parameters : dict):
     rel_humidity = parameters['conditions']['humidity']
 
     medium = Medium(temperature_celsius=temp, rel_humidity=rel_humidity)
-    sim_params = SimulationParameters(medium=medium, values_per_octave=500)
+    # coarse grid, refined adaptively around the resonance
+    sim_params = SimulationParameters(medium=medium, values_per_octave=24, adaptive=True, tolerance=1e-4)
 
     # run simulation 
     simulation = Simulation(resonator=resonator, sim_params=sim_params)
@@ -1,9 +1,81 @@
+import json
+import multiprocessing
+import sys
 import threading
+import time
+import numpy as np
+from scipy.optimize import OptimizeResult
 from calculation.optimizer import Optimizer
+from calculation.batch_optimizer import BatchOptimizer
+from calculation.design_atlas import DesignAtlas
+from calculation.worker_pool import get_pool
+from calculation.result_cache import ResultCache, file_digest
+from calculation.socket_pool import run_worker
 
-def optimizer(f_target, q_target):
-    optimizer = Optimizer(f_target=f_target, q_target=q_target)
-    best_result = optimizer.search_optimal()
+def _pool(backend, workers, address=None, authkey=None):
+    pool = get_pool(backend, workers, address=address, authkey=authkey)
+    if backend == 'socket':
+        print(f"Waiting for workers on {pool.address}, start them with 'hrcalc worker'")
+    return pool
+
+def optimizer(f_target, q_target, method='multistart', seed=None, backend='process', workers=None,
+              stop_count=None, patience=None, num_trials=400, atlas=None, eliminate_volume=False, cache=True,
+              checkpoint=None, resume=False, address=None, authkey=None, polish=1, max_time=None,
+              max_evaluations=None, trace=None, multi_fidelity=False):
+    optimizer = Optimizer(f_target=f_target, q_target=q_target, use_gradient=not multi_fidelity,
+                          eliminate_volume=eliminate_volume, trace=trace, multi_fidelity=multi_fidelity)
+
+    # identical requests are answered from the result cache
+    options = {"method": method, "seed": seed}
+    if method == 'atlas':
+        options.update(atlas=file_digest(atlas), polish=polish)
+    elif method == 'multistart':
+        # a time budget is not part of the key, its requests reuse the results of complete searches
+        options.update(num_trials=num_trials, stop_count=stop_count, patience=patience,
+                       max_evaluations=max_evaluations)
+    result_cache = ResultCache() if cache else None
+    key = ResultCache.key(optimizer.cache_request(**options))
+    # a traced run always evaluates, otherwise its trace would be empty
+    entry = result_cache.get(key) if result_cache and trace is None else None
+
+    if entry is not None:
+        best_result = OptimizeResult(x=np.array(entry["x"]), fun=entry["fun"], success=True)
+        optimizer.best_result = best_result
+        optimizer.best_results = [best_result]
+        print("Loaded result from cache")
+    else:
+        if method == 'atlas':
+            best_result = optimizer.search_atlas(DesignAtlas.load(atlas), polish=polish)
+        elif method == 'global':
+            best_result = optimizer.search_global(seed=seed)
+        elif method == 'surrogate':
+            best_result = optimizer.search_surrogate(seed=seed)
+        else:
+            optimizer.pool = _pool(backend, workers, address, authkey)
+            # improvements are shown as soon as a worker reports them
+            start = time.monotonic()
+            for res in optimizer.search_stream(num_trials=num_trials, stop_count=stop_count, patience=patience,
+                                               seed=seed, checkpoint=checkpoint, resume=resume,
+                                               max_time=max_time, max_evaluations=max_evaluations):
+                print(f"[{time.monotonic() - start:7.2f} s] new best design, objective {res.fun:.4f}")
+            best_result = optimizer.best_result
+            if optimizer.stop_reason == 'converged':
+                print(f"Converged early after {optimizer.num_starts_used} of {optimizer.num_trials} starts")
+            elif optimizer.stopped_early:
+                print(f"Stopped on budget ({optimizer.stop_reason}) after {optimizer.num_starts_used} of "
+                      f"{optimizer.num_trials} starts and {optimizer.num_evaluations} evaluations")
+            if best_result is None:
+                raise RuntimeError("No local optimization succeeded within the budget.")
+            check = optimizer.full_resolution_check
+            if check is not None:
+                print(f"Full-resolution check {'passed' if check['consistent'] else 'FAILED'}: "
+                      f"f_res {check['f_resonance']:.2f} Hz vs {check['default_f_resonance']:.2f} Hz, "
+                      f"Q {check['q_factor']} vs {check['default_q_factor']}")
+        # results cut short by a time budget depend on the machine and load, they are not cached
+        if result_cache is not None and optimizer.stop_reason != 'max_time':
+            result_cache.put(key, {"x": [float(v) for v in best_result.x], "fun": float(best_result.fun)})
+        if trace is not None:
+            print(f"Evaluations traced to {trace}, load them with calculation.evaluation_trace.load_trace")
     
     
     
@@ -13,4 +85,53 @@ def optimizer(f_target, q_target):
         _sim = optimizer.create_default_sim(res)
         optimizer.display_results(_sim)
         
-    return optimizer.create_default_sim(best_result)
\ No newline at end of file
+    return optimizer.create_default_sim(best_result)
+
+
+def optimize_batch(targets, output=None, num_trials=64, warm_starts=5, seed=None, backend='process', workers=None,
+                   eliminate_volume=False, address=None, authkey=None):
+    batch = BatchOptimizer(targets, pool=_pool(backend, workers, address, authkey), eliminate_volume=eliminate_volume)
+    file = open(output, 'w') if output else sys.stdout
+    try:
+        # one JSON line per target as soon as it is finished
+        for index, res in batch.run(num_trials=num_trials, warm_starts=warm_starts, seed=seed):
+            f_target, q_target = batch.targets[index]
+            line = {"index": index, "f_target": f_target, "q_target": q_target,
+                    "starts": batch.num_starts[index], "warm_starts": batch.num_warm_starts[index],
+                    "cache_hits": batch.optimizers[index].cache_hits,
+                    "cache_misses": batch.optimizers[index].cache_misses}
+            if res is None:
+                line["success"] = False
+            else:
+                f_res, peak_area, _, _, q_factor = batch.optimizers[index].create_solver(res.x).solve()
+                line.update(success=True, fun=float(res.fun),
+                            **dict(zip(('x', 'y', 'z', 'radius', 'length', 'xi'), map(float, res.x))),
+                            f_resonance=float(f_res), q_factor=None if q_factor is None else float(q_factor),
+                            peak_absorbtion_area=float(peak_area))
+            file.write(json.dumps(line) + "\n")
+            file.flush()
+    finally:
+        if output:
+            file.close()
+    return batch
+
+
+def build_atlas(path, n_designs, seed=None, backend='process', workers=None):
+    atlas = DesignAtlas.build(Optimizer.default_bounds, n_designs=n_designs, seed=seed,
+                              pool=get_pool(backend, workers))
+    atlas.save(path)
+    print(f"Saved atlas with {len(atlas)} designs to {path}")
+    return atlas
+
+
+def start_workers(address, processes=1, authkey=None, blas_threads=1):
+    # one process per core, each connects to the coordinator on its own
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=run_worker, args=(address, authkey),
+                               kwargs={"blas_threads": blas_threads, "connect_timeout": 300.0})
+               for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    print(f"{processes} worker(s) finished")
@@ -3,5 +3,12 @@ from .geometry import Geometry
 from .medium import Medium
 from .resonator import Resonator
 from .simulation_parameters import SimulationParameters
+from . import frequency_grid
 from .simulation import Simulation
+from .resonance_solver import ResonanceSolver
+from .fast_models import FastGeometry, FastAperture, FastMedium, FastSimulationParameters, get_medium
+from .batch_simulation import BatchSimulation
+from .worker_pool import WorkerPool, get_pool
 from .optimizer import Optimizer
+from .batch_optimizer import BatchOptimizer
+from .design_atlas import DesignAtlas
@@ -1,4 +1,4 @@
-from traits.api import HasTraits, Enum, Range, Float, Bool, TraitError, Union
+from traits.api import HasTraits, Enum, Range, Float, Bool, TraitError, Union, observe
 from traitsui.api import View, Item, Group
 import numpy as np
 from numpy import pi
@@ -70,6 +70,16 @@ class Aperture(HasTraits):
             self.outer_end_correction = correction
             self.radius = 0.5 * self.width
 
+    @observe('form, radius, width, height, amount, inner_ending, outer_ending, additional_dampening, xi',
+             post_init=True)
+    def _update_area_and_corrections(self, event):
+        """Keeps area and end corrections consistent when the aperture is changed after initialization."""
+        if event.name == 'radius' and self.form == 'slit':
+            # for slits the radius is derived from the width
+            return
+        self._validate_logical_dependencies()
+        self._compute_area_and_corrections()
+
     def get_tube_correction(self, ending):
         """Returns the empirical end correction for a tube end.
 
@@ -86,7 +96,8 @@ class Aperture(HasTraits):
         else:
             raise ValueError("Invalid ending. Choose 'open' or 'flange'. ")
 
-    def get_slit_end_correction(self, x: float, y: float) -> float:
+    @staticmethod
+    def get_slit_end_correction(x: float, y: float) -> float:
         """
         Calculates end correction for slits using Mechel's formulation.
 
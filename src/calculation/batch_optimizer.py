@@ -0,0 +1,195 @@
+"""
+Inverse design of many (frequency, Q) targets in one run.
+
+All local optimizations of all targets are scheduled on one shared
+:class:`calculation.worker_pool.WorkerPool`. Targets are processed in the order of their resonance
+frequency with a bounded number of chunks in flight. When a target is finished, its solution is moved to
+the target frequency of its nearest pending neighbours (see
+:meth:`calculation.optimizer.Optimizer.solve_for_target`) and these warm starts are scheduled before the
+remaining cold starts. Finished targets are reported immediately.
+"""
+
+from concurrent.futures import CancelledError
+import heapq
+import itertools
+import numpy as np
+from .optimizer import Optimizer
+from .worker_pool import get_pool
+
+
+class BatchOptimizer():
+    """
+    Optimizes a list of targets on a shared worker pool with warm starts from neighbouring targets.
+
+    Attributes:
+        targets (list[tuple[float, float]]): (f_target, q_target) per target.
+        optimizers (list[Optimizer]): One optimizer per target.
+        pool (WorkerPool): Pool running the local optimizations.
+        num_starts (list[int]): Evaluated local optimizations per target.
+        num_warm_starts (list[int]): Evaluated warm starts per target.
+    """
+
+    # parameters adjusted to move a neighbour's solution to another target frequency
+    WARM_START_PARAMETERS = ('z', 'length', 'radius', 'x', 'y')
+
+    def __init__(self, targets, pool=None, eliminate_volume=False):
+        """
+        Creates one optimizer per target.
+
+        Args:
+            targets (Iterable[tuple[float, float]]): (f_target, q_target) per target.
+            pool (WorkerPool, optional): Shared pool, defaults to the shared process pool of
+                :func:`calculation.worker_pool.get_pool`.
+            eliminate_volume (bool): Reduced search space of the local optimizations, see :class:`Optimizer`.
+
+        Raises:
+            ValueError: If a target frequency or Q-factor is not positive.
+        """
+        self.targets = [(float(f), float(q)) for f, q in targets]
+        for f_target, q_target in self.targets:
+            if not (f_target > 0 and q_target > 0):
+                raise ValueError(f"Invalid target ({f_target}, {q_target}), frequency and Q must be positive.")
+        self.optimizers = [Optimizer(f_target=f, q_target=q, eliminate_volume=eliminate_volume)
+                           for f, q in self.targets]
+        for optimizer in self.optimizers:
+            optimizer.bounds = list(optimizer.default_bounds)
+        self.pool = pool
+        self.num_starts = [0] * len(self.targets)
+        self.num_warm_starts = [0] * len(self.targets)
+
+    def __len__(self):
+        return len(self.targets)
+
+    def neighbours(self, index: int, k: int) -> list:
+        """
+        Returns the targets closest to a target in :math:`(\\log_{10} f, \\log_{10} Q)`.
+
+        Args:
+            index (int): Index of the target.
+            k (int): Number of neighbours.
+
+        Returns:
+            list[int]: Indices of the neighbours, closest first.
+        """
+        points = np.log10(np.array(self.targets))
+        distances = np.linalg.norm(points - points[index], axis=1)
+        distances[index] = np.inf
+        order = np.argsort(distances, kind='stable')[:k]
+        return [int(i) for i in order if np.isfinite(distances[i])]
+
+    def warm_starts(self, index: int, x, n: int) -> list:
+        """
+        Moves a solution of another target to the target frequency of a target.
+
+        Each warm start adjusts one parameter (cycling through :attr:`WARM_START_PARAMETERS`) with the
+        Helmholtz approximation, the other parameters are kept.
+
+        Args:
+            index (int): Index of the target to start.
+            x (Sequence[float]): Solution [x, y, z, radius, length, xi] of a neighbouring target.
+            n (int): Number of warm starts.
+
+        Returns:
+            list: Initial values, each in the order [x, y, z, radius, length, xi].
+        """
+        optimizer = self.optimizers[index]
+        parameters = self.WARM_START_PARAMETERS
+        return [[float(v) for v in optimizer.solve_for_target(list(x), parameters[i % len(parameters)])]
+                for i in range(n)]
+
+    def run(self, num_trials: int = 64, warm_starts: int = 5, neighbours: int = 2, chunksize: int = None,
+            dedup_tol: float = 0.05, sampling: str = 'sobol', seed: int = None):
+        """
+        Optimizes all targets and yields each one as soon as it is finished.
+
+        Args:
+            num_trials (int): Cold starts per target, see :meth:`Optimizer.generate_initial_design`.
+            warm_starts (int): Warm starts a finished target gives to each pending neighbour.
+            neighbours (int): Number of neighbours that receive warm starts.
+            chunksize (int, optional): Starts per task, defaults to at most 8.
+            dedup_tol (float, optional): Cluster radius of :meth:`Optimizer.deduplicate_results`.
+            sampling (str): Initial design of the cold starts.
+            seed (int, optional): Seed of the initial designs. Every target draws its design from its own
+                child seed, so the targets do not share their starting points.
+
+        Yields:
+            tuple[int, OptimizeResult]: Index of the finished target and its best result, None if all of
+            its local optimizations failed. ``self.optimizers[index].best_results`` holds all its results.
+        """
+        pool = self.pool if self.pool is not None else get_pool()
+        if chunksize is None:
+            chunksize = min(pool.default_chunksize(num_trials * max(len(self), 1)), 8)
+        max_in_flight = 2 * pool.max_workers
+
+        # queued chunks: (priority, sequence, index, is_warm, guesses), warm starts before cold starts
+        queue = []
+        counter = itertools.count()
+        queued_chunks = [0] * len(self)
+        results = [[] for _ in range(len(self))]
+        finished = [False] * len(self)
+        for optimizer in self.optimizers:
+            optimizer.cache_hits = optimizer.cache_misses = 0
+        self.num_starts = [0] * len(self)
+        self.num_warm_starts = [0] * len(self)
+
+        def enqueue(index, guesses, is_warm, priority):
+            for start in range(0, len(guesses), chunksize):
+                heapq.heappush(queue, (priority, next(counter), index, is_warm, guesses[start:start + chunksize]))
+                queued_chunks[index] += 1
+
+        # independent designs per target, reproducible for a given seed
+        seeds = [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(seed).spawn(len(self))]
+
+        # low frequencies first, so neighbouring targets run close in time
+        order = sorted(range(len(self)), key=lambda i: self.targets[i])
+        for rank, index in enumerate(order):
+            optimizer = self.optimizers[index]
+            guesses = optimizer.generate_initial_design(num_trials, sampling, seed=seeds[index])
+            enqueue(index, guesses, False, (1, rank))
+
+        in_flight = {}
+        while queue or in_flight:
+            while queue and len(in_flight) < max_in_flight:
+                _, _, index, is_warm, guesses = heapq.heappop(queue)
+                (future,) = pool.submit_chunks(self.optimizers[index].run_single_optimization, guesses,
+                                               chunksize=len(guesses))
+                in_flight[future] = (index, is_warm, len(guesses))
+
+            future = next(pool.as_completed(list(in_flight)))
+            index, is_warm, size = in_flight.pop(future)
+            queued_chunks[index] -= 1
+            try:
+                chunk_results = future.result()
+            except CancelledError:
+                chunk_results = []
+            self.num_starts[index] += size
+            if is_warm:
+                self.num_warm_starts[index] += size
+            optimizer = self.optimizers[index]
+            for res in chunk_results:
+                if res:
+                    optimizer.cache_hits += res.cache_hits
+                    optimizer.cache_misses += res.cache_misses
+            results[index].extend(res for res in chunk_results if res and res.success)
+
+            if queued_chunks[index] > 0:
+                continue
+            finished[index] = True
+            best = self._finish(index, results[index], dedup_tol)
+            if best is not None and warm_starts > 0:
+                for neighbour in self.neighbours(index, neighbours):
+                    if not finished[neighbour]:
+                        enqueue(neighbour, self.warm_starts(neighbour, best.x, warm_starts), True,
+                                (0, next(counter)))
+            yield index, best
+
+    def _finish(self, index, results, dedup_tol):
+        """Stores the (deduplicated) results of a finished target in its optimizer."""
+        optimizer = self.optimizers[index]
+        if dedup_tol is None:
+            optimizer.best_results = sorted(results, key=lambda r: r.fun)
+        else:
+            optimizer.best_results = optimizer.deduplicate_results(results, dedup_tol)
+        optimizer.best_result = optimizer.best_results[0] if optimizer.best_results else None
+        optimizer.num_trials = optimizer.num_starts_used = self.num_starts[index]
+        return optimizer.best_result
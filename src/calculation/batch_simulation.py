@@ -0,0 +1,293 @@
+import numpy as np
+from .simulation_parameters import SimulationParameters
+
+
+class BatchSimulation():
+    """
+    Vectorized simulation of many Helmholtz resonators sharing one set of simulation parameters.
+
+    The designs are given as struct-of-arrays (one entry per design). All impedances are evaluated
+    with NumPy broadcasting on an N×F grid (N designs, F frequencies), using exactly the same formulas
+    as :class:`calculation.simulation.Simulation`, so every row matches the scalar ``calc_all`` result.
+
+    Attributes:
+        sim_params (SimulationParameters): Frequency and medium parameters shared by all designs.
+        volume (np.ndarray): Cavity volumes (m³), shape (N,).
+        area (np.ndarray): Aperture cross-sectional areas (m²), shape (N,).
+        length (np.ndarray): Aperture lengths (m), shape (N,).
+        radius (np.ndarray): Aperture radii (m), shape (N,).
+        inner_end_correction (np.ndarray): Inner end corrections (m), shape (N,).
+        outer_end_correction (np.ndarray): Outer end corrections (m), shape (N,).
+        xi (np.ndarray): Damping coefficients, shape (N,). Ignored where damping is disabled.
+        additional_dampening (np.ndarray): Boolean flags for porous damping, shape (N,).
+        outer_flanged (np.ndarray): Boolean flags, True if the outer ending is 'flange', shape (N,).
+        z_porous (np.ndarray): Porous impedance per design, shape (N,).
+        z_radiation (np.ndarray): Radiation impedance, shape (N, F).
+        z_stiff_mass (np.ndarray): Stiffness and mass impedance, shape (N, F).
+        z_friction (np.ndarray): Friction impedance, shape (N, F).
+        absorbtion_area (np.ndarray): Absorption area, shape (N, F).
+        f_resonance (np.ndarray): Resonance frequency per design, shape (N,).
+        peak_absorbtion_area (np.ndarray): Peak absorption area per design, shape (N,).
+        f_q_low (np.ndarray): Lower -3 dB frequency per design (NaN if not found), shape (N,).
+        f_q_high (np.ndarray): Upper -3 dB frequency per design (NaN if not found), shape (N,).
+        q_factor (np.ndarray): Q-factor per design (NaN if not found), shape (N,).
+    """
+
+    def __init__(self, sim_params: SimulationParameters, volume, area, length, radius,
+                 inner_end_correction, outer_end_correction, xi=None,
+                 additional_dampening=None, outer_flanged=None):
+        """
+        Initialize a BatchSimulation from struct-of-arrays design parameters.
+
+        Args:
+            sim_params (SimulationParameters): Frequency & medium configuration shared by all designs.
+            volume (array_like): Cavity volumes (m³).
+            area (array_like): Aperture areas (m²).
+            length (array_like): Aperture lengths (m).
+            radius (array_like): Aperture radii (m).
+            inner_end_correction (array_like): Inner end corrections (m).
+            outer_end_correction (array_like): Outer end corrections (m).
+            xi (array_like, optional): Damping coefficients. Defaults to no damping.
+            additional_dampening (array_like, optional): Porous damping flags.
+                Defaults to True wherever ``xi`` is given and finite.
+            outer_flanged (array_like, optional): True where the outer ending is 'flange'.
+                Defaults to True (the Aperture default).
+
+        Raises:
+            ValueError: If the design arrays do not share the same length.
+        """
+        self.sim_params = sim_params
+
+        self.volume = np.atleast_1d(np.asarray(volume, dtype=float))
+        n = self.volume.shape[0]
+        self.area = self._as_design_array(area, n, float)
+        self.length = self._as_design_array(length, n, float)
+        self.radius = self._as_design_array(radius, n, float)
+        self.inner_end_correction = self._as_design_array(inner_end_correction, n, float)
+        self.outer_end_correction = self._as_design_array(outer_end_correction, n, float)
+
+        if xi is None:
+            self.xi = np.full(n, np.nan)
+        else:
+            self.xi = self._as_design_array(xi, n, float)
+
+        if additional_dampening is None:
+            self.additional_dampening = np.isfinite(self.xi)
+        else:
+            self.additional_dampening = self._as_design_array(additional_dampening, n, bool)
+
+        if outer_flanged is None:
+            self.outer_flanged = np.ones(n, dtype=bool)
+        else:
+            self.outer_flanged = self._as_design_array(outer_flanged, n, bool)
+
+        self.k = self.sim_params.omega / self.sim_params.medium.c
+
+        self.z_porous = None
+        self.z_radiation = None
+        self.z_stiff_mass = None
+        self.z_friction = None
+        self.absorbtion_area = None
+        self.f_resonance = None
+        self.peak_absorbtion_area = None
+        self.f_q_low = None
+        self.f_q_high = None
+        self.q_factor = None
+
+    @staticmethod
+    def _as_design_array(values, n, dtype):
+        """Broadcasts a scalar or sequence to a 1-D design array of length n."""
+        arr = np.asarray(values, dtype=dtype)
+        if arr.ndim == 0:
+            return np.full(n, arr, dtype=dtype)
+        if arr.shape != (n,):
+            raise ValueError(f"All design arrays must have shape ({n},), got {arr.shape}.")
+        return arr
+
+    @classmethod
+    def from_resonators(cls, resonators, sim_params: SimulationParameters) -> 'BatchSimulation':
+        """
+        Creates a BatchSimulation from a sequence of Resonator objects.
+
+        Args:
+            resonators (Sequence[Resonator]): Resonators to simulate.
+            sim_params (SimulationParameters): Frequency & medium configuration shared by all designs.
+
+        Returns:
+            BatchSimulation: Batch with one row per resonator.
+        """
+        apertures = [res.aperture for res in resonators]
+        return cls(
+            sim_params,
+            volume=[res.geometry.volume for res in resonators],
+            area=[ap.area for ap in apertures],
+            length=[ap.length for ap in apertures],
+            radius=[ap.radius for ap in apertures],
+            inner_end_correction=[ap.inner_end_correction for ap in apertures],
+            outer_end_correction=[ap.outer_end_correction for ap in apertures],
+            xi=[ap.xi if ap.xi is not None else np.nan for ap in apertures],
+            additional_dampening=[ap.additional_dampening for ap in apertures],
+            outer_flanged=[ap.outer_ending == 'flange' for ap in apertures],
+        )
+
+    def __len__(self):
+        return self.volume.shape[0]
+
+    def calc_all(self):
+        """
+        Convenience method to calculate absorption area, resonance frequency, and Q-factor for all designs.
+        """
+        self.calc_absorbtion_area()
+        self.calc_resonance_frequency_and_peak_area()
+        self.calc_q_factor()
+
+    def calc_z_porous(self) -> np.ndarray:
+        """
+        Calculates the porous impedance per design, see :meth:`Simulation.calc_z_porous`.
+
+        Returns:
+            np.ndarray: Porous impedance (Pa·s/m), shape (N,).
+        """
+        xi = np.where(self.additional_dampening, self.xi, 0.0)
+        self.z_porous = np.where(self.additional_dampening, xi * self.length / self.area, 0.0)
+        return self.z_porous
+
+    def calc_z_radiation(self) -> np.ndarray:
+        """
+        Calculates the complex radiation impedance, see :meth:`Simulation.calc_z_radiation`.
+
+        Returns:
+            np.ndarray: Radiation impedance (Pa·s/m), shape (N, F).
+        """
+        med = self.sim_params.medium
+        rho = med.density
+        c = med.c
+        k = self.sim_params.k[np.newaxis, :]
+        r = self.radius[:, np.newaxis]
+        delta_l_out = self.outer_end_correction[:, np.newaxis]
+        denom = np.where(self.outer_flanged, 2*np.pi, 4*np.pi)[:, np.newaxis]
+
+        self.z_radiation = rho * c * (k**2 * r**2 / denom + 1j * k * delta_l_out)
+        return self.z_radiation
+
+    def calc_z_stiff_mass(self) -> np.ndarray:
+        """
+        Calculates the stiffness and mass impedance, see :meth:`Simulation.calc_z_stiff_mass`.
+
+        Returns:
+            np.ndarray: Complex impedance (Pa·s/m), shape (N, F).
+        """
+        rho = self.sim_params.medium.density
+        c = self.sim_params.medium.c
+        omega = self.sim_params.omega[np.newaxis, :]
+        S = self.area[:, np.newaxis]
+        volume = self.volume[:, np.newaxis]
+        l_ap = self.length[:, np.newaxis]
+        delta_l_total = (self.inner_end_correction + self.outer_end_correction)[:, np.newaxis]
+
+        self.z_stiff_mass = rho * c**2 / (1j*omega*volume) + 1j*omega*rho*(l_ap + delta_l_total) / S
+        return self.z_stiff_mass
+
+    def calc_z_friction(self) -> np.ndarray:
+        """
+        Calculates the friction impedance with the k r ≥ 0.2 cutoff, see :meth:`Simulation.calc_z_friction`.
+
+        Returns:
+            np.ndarray: Friction impedance (Pa·s/m), shape (N, F).
+        """
+        k = self.k[np.newaxis, :]
+        r = self.radius[:, np.newaxis]
+        rho = self.sim_params.medium.density
+        v = self.sim_params.medium.kinematic_viscosity
+        l_ap = self.length[:, np.newaxis]
+        S = self.area[:, np.newaxis]
+
+        z_friction_val = 8 * v * rho / r**2 * l_ap / S
+        self.z_friction = np.where(k * r < 0.2, z_friction_val, 0.0)
+        return self.z_friction
+
+    def calc_absorbtion_area(self) -> np.ndarray:
+        """
+        Computes the absorption area of all designs, see :meth:`Simulation.calc_absorbtion_area`.
+
+        Returns:
+            np.ndarray: Absorption area (m²), shape (N, F).
+        """
+        self.calc_z_porous()
+        self.calc_z_radiation()
+        self.calc_z_stiff_mass()
+        self.calc_z_friction()
+
+        z_total = self.z_friction + self.z_porous[:, np.newaxis] + self.z_stiff_mass
+        z_rad = self.z_radiation
+
+        rho = self.sim_params.medium.density
+        c = self.sim_params.medium.c
+        theta = self.sim_params.angle_of_incidence
+
+        if self.sim_params.assume_diffuse:
+            self.absorbtion_area = 2 * (np.real(z_total) / np.abs(z_total + z_rad)**2) * (2 * rho * c)
+        else:
+            self.absorbtion_area = np.real(z_total) / np.abs(z_total + z_rad)**2 * (2 * rho * c / np.cos(theta))
+
+        return self.absorbtion_area
+
+    def calc_resonance_frequency_and_peak_area(self) -> tuple:
+        """
+        Determines resonance frequency and peak absorption area of every design.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: (f_resonance in Hz, peak_absorption_area in m²), each shape (N,).
+        """
+        if self.absorbtion_area is None:
+            self.calc_absorbtion_area()
+
+        peak_idx = np.argmax(self.absorbtion_area, axis=1)
+        self.peak_absorbtion_area = np.take_along_axis(self.absorbtion_area, peak_idx[:, np.newaxis], axis=1)[:, 0]
+        self.f_resonance = self.sim_params.frequencies[peak_idx]
+        return (self.f_resonance, self.peak_absorbtion_area)
+
+    def calc_q_factor(self) -> np.ndarray:
+        """
+        Calculates the Q-factor of every design from the -3 dB bandwidth, see :meth:`Simulation.calc_q_factor`.
+
+        The first two sign changes of ``A(f) - A_peak / 2`` are linearly interpolated, as in the scalar
+        implementation. Designs where fewer than two crossings exist get NaN instead of None.
+
+        Returns:
+            np.ndarray: Q-factor per design, shape (N,).
+        """
+        if self.absorbtion_area is None:
+            self.calc_absorbtion_area()
+
+        curve = self.absorbtion_area
+        freqs = self.sim_params.frequencies
+        peak_idx = np.argmax(curve, axis=1)
+        f_res = freqs[peak_idx]
+        peak = np.take_along_axis(curve, peak_idx[:, np.newaxis], axis=1)
+        half_peak = peak / 2
+
+        diff = curve - half_peak
+        crossings = np.cumsum(np.diff(np.sign(diff), axis=1) != 0, axis=1)
+        valid = crossings[:, -1] >= 2 if crossings.shape[1] else np.zeros(len(self), dtype=bool)
+
+        i1 = np.argmax(crossings >= 1, axis=1)
+        i2 = np.argmax(crossings >= 2, axis=1)
+
+        f1 = self._interpolate_crossing(freqs, diff, i1)
+        f2 = self._interpolate_crossing(freqs, diff, i2)
+
+        self.f_q_low = np.where(valid, f1, np.nan)
+        self.f_q_high = np.where(valid, f2, np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.q_factor = np.where(valid, f_res / (f2 - f1), np.nan)
+        return self.q_factor
+
+    @staticmethod
+    def _interpolate_crossing(freqs, diff, idx):
+        """Linearly interpolates the zero crossing of each row of diff between idx and idx+1."""
+        idx_next = np.minimum(idx + 1, diff.shape[1] - 1)
+        d0 = np.take_along_axis(diff, idx[:, np.newaxis], axis=1)[:, 0]
+        d1 = np.take_along_axis(diff, idx_next[:, np.newaxis], axis=1)[:, 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return freqs[idx] - d0 * (freqs[idx_next] - freqs[idx]) / (d1 - d0)
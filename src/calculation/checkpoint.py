@@ -0,0 +1,121 @@
+"""
+Checkpoints of multi-start optimizations.
+
+A :class:`SearchCheckpoint` stores the initial design of a
+:meth:`calculation.optimizer.Optimizer.search_optimal` run, the seed it was drawn with and the results of
+all finished starts in a compressed NumPy archive (.npz). The file is replaced atomically, so a killed run
+leaves either the previous or the new checkpoint. A resumed run only evaluates the pending starts.
+"""
+
+import json
+import os
+import tempfile
+import numpy as np
+from scipy.optimize import OptimizeResult
+
+
+class SearchCheckpoint():
+    """
+    Progress of a multi-start optimization.
+
+    Attributes:
+        path (str): Path of the checkpoint file.
+        request (dict): Settings of the run, see :meth:`calculation.optimizer.Optimizer.cache_request`.
+        seed (int): Seed the initial design was drawn with.
+        initial_guesses (np.ndarray): Initial values of all starts, shape (N, 6).
+        done (np.ndarray): True for every finished start.
+        success (np.ndarray): True for every successful start.
+        x (np.ndarray): Result parameters per start, NaN if not available.
+        fun (np.ndarray): Objective value per start, NaN if not available.
+        nit (np.ndarray): Iterations per start.
+    """
+
+    def __init__(self, path: str, request: dict, seed: int, initial_guesses):
+        """
+        Creates an empty checkpoint, nothing is written until :meth:`save`.
+
+        Args:
+            path (str): Path of the checkpoint file (.npz).
+            request (dict): JSON serializable settings of the run.
+            seed (int): Seed the initial design was drawn with.
+            initial_guesses (array_like): Initial values of all starts, shape (N, 6).
+        """
+        self.path = path
+        self.request = request
+        self.seed = seed
+        self.initial_guesses = np.asarray(initial_guesses, dtype=float)
+        n = len(self.initial_guesses)
+        self.done = np.zeros(n, dtype=bool)
+        self.success = np.zeros(n, dtype=bool)
+        self.x = np.full(self.initial_guesses.shape, np.nan)
+        self.fun = np.full(n, np.nan)
+        self.nit = np.zeros(n, dtype=int)
+
+    def __len__(self):
+        return len(self.initial_guesses)
+
+    def record(self, index: int, res):
+        """
+        Stores the result of a finished start.
+
+        Args:
+            index (int): Index of the start in `initial_guesses`.
+            res (OptimizeResult): Result of the local optimization, None if it failed.
+        """
+        self.done[index] = True
+        if res is None:
+            return
+        self.success[index] = bool(res.success)
+        self.x[index] = res.x
+        self.fun[index] = res.fun
+        self.nit[index] = getattr(res, 'nit', 0)
+
+    def pending(self) -> np.ndarray:
+        """Returns the indices of the starts that are not finished."""
+        return np.flatnonzero(~self.done)
+
+    def results(self) -> list:
+        """
+        Returns the successful results of the finished starts.
+
+        Returns:
+            list[OptimizeResult]: Results with x, fun, success and nit, in the order of the starts.
+        """
+        return [OptimizeResult(x=self.x[i].copy(), fun=float(self.fun[i]), success=True, nit=int(self.nit[i]))
+                for i in np.flatnonzero(self.done & self.success)]
+
+    def save(self):
+        """Writes the checkpoint atomically."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.npz')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                np.savez_compressed(file, request=json.dumps(self.request, sort_keys=True), seed=str(self.seed),
+                                    initial_guesses=self.initial_guesses, done=self.done,
+                                    success=self.success, x=self.x, fun=self.fun, nit=self.nit)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> 'SearchCheckpoint':
+        """
+        Loads a checkpoint written with :meth:`save`.
+
+        Args:
+            path (str): Path of the checkpoint file.
+
+        Returns:
+            SearchCheckpoint: The restored checkpoint.
+        """
+        with np.load(path) as data:
+            checkpoint = cls(path, json.loads(str(data['request'])), int(str(data['seed'])),
+                             data['initial_guesses'])
+            checkpoint.done = data['done'].copy()
+            checkpoint.success = data['success'].copy()
+            checkpoint.x = data['x'].copy()
+            checkpoint.fun = data['fun'].copy()
+            checkpoint.nit = data['nit'].copy()
+        return checkpoint
@@ -0,0 +1,176 @@
+"""
+Precomputed atlas of resonator designs for instant inverse design.
+
+For a fixed bounds box the map from the optimizer parameters ``[x, y, z, radius, length, xi]`` to
+resonance frequency, Q-factor and peak absorption area is smooth and cheap to evaluate with the
+grid-free :class:`calculation.resonance_solver.ResonanceSolver`. The atlas tabulates it once on a
+Sobol design and indexes the designs with a KD-tree in :math:`(\\log_{10} f, \\log_{10} Q)`, so the
+designs closest to a target are found in microseconds. They are either used directly or as warm
+starts for a short local optimization, see :meth:`calculation.optimizer.Optimizer.search_atlas`.
+"""
+
+import numpy as np
+from scipy.spatial import cKDTree
+from scipy.stats import qmc
+from .fast_models import FastGeometry, FastAperture, FastSimulationParameters, get_medium
+from .resonator import Resonator
+from .resonance_solver import ResonanceSolver
+
+
+class DesignAtlas():
+    """
+    Table of designs with their acoustic properties and a nearest neighbour index.
+
+    Attributes:
+        designs (np.ndarray): Parameters [x, y, z, radius, length, xi] per design, shape (N, 6).
+        f_resonance (np.ndarray): Resonance frequencies (Hz), shape (N,).
+        q_factor (np.ndarray): Q-factors, shape (N,).
+        peak_absorbtion_area (np.ndarray): Peak absorption areas (m²), shape (N,).
+        bounds (list): (min, max) per parameter the atlas was built for.
+        freq_range (tuple): Frequency range of the resonance search (Hz).
+    """
+
+    def __init__(self, designs, f_resonance, q_factor, peak_absorbtion_area, bounds, freq_range):
+        """
+        Creates an atlas from tabulated designs. Designs without a valid Q-factor are dropped.
+
+        Args:
+            designs (array_like): Parameters per design, shape (N, 6).
+            f_resonance (array_like): Resonance frequencies (Hz).
+            q_factor (array_like): Q-factors, NaN where not available.
+            peak_absorbtion_area (array_like): Peak absorption areas (m²).
+            bounds (list): (min, max) per parameter.
+            freq_range (tuple): Frequency range of the resonance search (Hz).
+        """
+        designs = np.asarray(designs, dtype=float)
+        f_resonance = np.asarray(f_resonance, dtype=float)
+        q_factor = np.asarray(q_factor, dtype=float)
+        peak_absorbtion_area = np.asarray(peak_absorbtion_area, dtype=float)
+        valid = np.isfinite(q_factor) & (q_factor > 0) & np.isfinite(f_resonance)
+
+        self.designs = designs[valid]
+        self.f_resonance = f_resonance[valid]
+        self.q_factor = q_factor[valid]
+        self.peak_absorbtion_area = peak_absorbtion_area[valid]
+        self.bounds = [tuple(float(v) for v in bound) for bound in bounds]
+        self.freq_range = tuple(float(f) for f in freq_range)
+        self._tree = cKDTree(np.column_stack((np.log10(self.f_resonance), np.log10(self.q_factor))))
+
+    def __len__(self):
+        return len(self.designs)
+
+    @staticmethod
+    def evaluate(design, sim_params) -> tuple:
+        """
+        Solves one design with the grid-free resonance solver.
+
+        Args:
+            design (Sequence[float]): Parameters [x, y, z, radius, length, xi].
+            sim_params (FastSimulationParameters): Frequency range and medium.
+
+        Returns:
+            tuple: (f_resonance, q_factor, peak_absorbtion_area), q_factor NaN if not available.
+        """
+        x, y, z, radius, length, xi = design
+        res = Resonator(FastGeometry(form='cuboid', x=x, y=y, z=z, trusted=True),
+                        FastAperture(form='tube', radius=radius, length=length, additional_dampening=True,
+                                     xi=xi, trusted=True))
+        f_res, peak, _, _, q = ResonanceSolver(res, sim_params).solve()
+        return (f_res, np.nan if q is None else q, peak)
+
+    @classmethod
+    def build(cls, bounds, n_designs: int = 2**15, freq_range: tuple = (1.0, 10_000.0), seed: int = None,
+              pool=None) -> 'DesignAtlas':
+        """
+        Tabulates a scrambled Sobol design over the bounds.
+
+        Args:
+            bounds (list): (min, max) per parameter [x, y, z, radius, length, xi].
+            n_designs (int): Number of designs, rounded up to a power of two.
+            freq_range (tuple): Frequency range of the resonance search (Hz).
+            seed (int, optional): Seed of the Sobol scrambling.
+            pool (WorkerPool, optional): Pool to evaluate the designs in parallel.
+
+        Returns:
+            DesignAtlas: The new atlas.
+        """
+        m = int(np.ceil(np.log2(max(n_designs, 1))))
+        low, high = np.array(bounds, dtype=float).T
+        designs = qmc.scale(qmc.Sobol(d=len(bounds), seed=seed).random_base2(m), low, high)
+
+        # values_per_octave is irrelevant for the grid-free solver, keep the cached grid small
+        sim_params = FastSimulationParameters(medium=get_medium(), freq_range=freq_range, values_per_octave=1,
+                                              trusted=True)
+        if pool is None:
+            values = [cls.evaluate(design, sim_params) for design in designs]
+        else:
+            values = pool.map(_AtlasEvaluation(sim_params), designs.tolist())
+        f_resonance, q_factor, peak = np.array(values, dtype=float).T
+        return cls(designs, f_resonance, q_factor, peak, bounds, freq_range)
+
+    def query(self, f_target: float, q_target: float, k: int = 10) -> tuple:
+        """
+        Finds the designs closest to a target in :math:`(\\log_{10} f, \\log_{10} Q)`.
+
+        Args:
+            f_target (float): Target resonance frequency (Hz).
+            q_target (float): Target Q-factor.
+            k (int): Number of designs.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: (distances, indices) of the nearest designs, closest first.
+        """
+        k = min(k, len(self))
+        distances, indices = self._tree.query([np.log10(f_target), np.log10(q_target)], k=k)
+        return np.atleast_1d(distances), np.atleast_1d(indices)
+
+    def nearest_designs(self, f_target: float, q_target: float, k: int = 10) -> np.ndarray:
+        """
+        Returns the parameters of the designs closest to a target.
+
+        Args:
+            f_target (float): Target resonance frequency (Hz).
+            q_target (float): Target Q-factor.
+            k (int): Number of designs.
+
+        Returns:
+            np.ndarray: Parameters [x, y, z, radius, length, xi], shape (k, 6), closest first.
+        """
+        _, indices = self.query(f_target, q_target, k)
+        return self.designs[indices]
+
+    def save(self, path: str):
+        """
+        Saves the atlas as a compressed NumPy archive (.npz).
+
+        Args:
+            path (str): Output path.
+        """
+        np.savez_compressed(path, designs=self.designs, f_resonance=self.f_resonance, q_factor=self.q_factor,
+                            peak_absorbtion_area=self.peak_absorbtion_area, bounds=np.array(self.bounds),
+                            freq_range=np.array(self.freq_range))
+
+    @classmethod
+    def load(cls, path: str) -> 'DesignAtlas':
+        """
+        Loads an atlas saved with :meth:`save`.
+
+        Args:
+            path (str): Path of the .npz file.
+
+        Returns:
+            DesignAtlas: The loaded atlas with a rebuilt index.
+        """
+        with np.load(path) as data:
+            return cls(data['designs'], data['f_resonance'], data['q_factor'], data['peak_absorbtion_area'],
+                       data['bounds'].tolist(), tuple(data['freq_range']))
+
+
+class _AtlasEvaluation():
+    """Picklable callable evaluating one design in a worker."""
+
+    def __init__(self, sim_params):
+        self.sim_params = sim_params
+
+    def __call__(self, design):
+        return DesignAtlas.evaluate(design, self.sim_params)
@@ -0,0 +1,179 @@
+"""
+Binary trace of objective evaluations.
+
+With the `trace` directory of :class:`calculation.optimizer.Optimizer` set, every objective evaluation is
+appended to the trace file of the evaluating process (``<host>-<pid>.hrtrace``), so processes never
+share a file. A file is a 16 byte header followed by packed NumPy records of :data:`TRACE_DTYPE`.
+Records are buffered in memory and written in blocks, at the latest when a local optimization ends,
+which keeps tracing cheap enough for production runs. :func:`load_trace` reads the files of a run into
+one structured array for analysis.
+"""
+
+import atexit
+import glob
+import itertools
+import os
+import socket
+import threading
+import time
+import numpy as np
+
+TRACE_SUFFIX = '.hrtrace'
+TRACE_MAGIC = b'HRTRACE\x00'
+TRACE_VERSION = 1
+
+# kinds of evaluations
+KIND_GRID = 0
+KIND_GRADIENT = 1
+KIND_COARSE = 2  # coarse grid of the multi-fidelity mode
+
+# one record per objective evaluation, packed little-endian
+TRACE_DTYPE = np.dtype([
+    ('time', '<f8'),            # seconds since the epoch
+    ('worker', '<i4'),          # process id of the evaluating worker
+    ('start', '<u4'),           # local optimization of the worker, 0 outside of local optimizations
+    ('kind', 'u1'),             # KIND_GRID (objective), KIND_GRADIENT (objective_and_gradient) or KIND_COARSE
+    ('x', '<f8', (6,)),         # [x, y, z, radius, length, xi]
+    ('value', '<f8'),           # objective value
+    ('f_resonance', '<f8'),
+    ('q_factor', '<f8'),        # NaN if the Q-factor could not be determined
+    ('peak_area_norm', '<f8'),  # peak absorption area normalized to its theoretical maximum
+    ('f_penalty', '<f8'),
+    ('q_penalty', '<f8'),
+])
+
+_HEADER = TRACE_MAGIC + np.array([TRACE_VERSION, TRACE_DTYPE.itemsize], dtype='<u4').tobytes()
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+class TraceWriter():
+    """
+    Buffered writer of the trace file of one process.
+
+    Attributes:
+        path (str): Path of the trace file.
+        worker (int): Process id stored in the records.
+        records (int): Number of records written or buffered.
+    """
+
+    def __init__(self, path: str, buffer_size: int = 4096):
+        """
+        Creates the trace file with its header if it does not exist.
+
+        Args:
+            path (str): Path of the trace file.
+            buffer_size (int): Number of records buffered before they are written.
+        """
+        self.path = path
+        self.worker = os.getpid()
+        self.records = 0
+        self._buffer = np.zeros(buffer_size, dtype=TRACE_DTYPE)
+        self._count = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._starts = itertools.count(1)
+        if not os.path.exists(path):
+            with open(path, 'wb') as file:
+                file.write(_HEADER)
+
+    def new_start(self):
+        """Marks the following records of the calling thread as a new local optimization."""
+        self._local.start = next(self._starts)
+
+    def record(self, kind: int, x, value: float, f_resonance: float, q_factor: float, peak_area_norm: float,
+               f_penalty: float, q_penalty: float):
+        """Appends one evaluation, see :data:`TRACE_DTYPE` for the fields."""
+        with self._lock:
+            self._buffer[self._count] = (time.time(), self.worker, getattr(self._local, 'start', 0), kind, x,
+                                         value, f_resonance, q_factor, peak_area_norm, f_penalty, q_penalty)
+            self._count += 1
+            self.records += 1
+            if self._count == len(self._buffer):
+                self._write()
+
+    def flush(self):
+        """Writes the buffered records."""
+        with self._lock:
+            self._write()
+
+    def _write(self):
+        if self._count:
+            with open(self.path, 'ab') as file:
+                file.write(self._buffer[:self._count].tobytes())
+            self._count = 0
+
+
+def get_trace_writer(directory: str) -> TraceWriter:
+    """
+    Returns the trace writer of the current process for a directory, creating it on first use.
+
+    Args:
+        directory (str): Trace directory, created if necessary.
+
+    Returns:
+        TraceWriter: Writer of ``<directory>/<host>-<pid>.hrtrace``.
+    """
+    key = (os.path.abspath(directory), os.getpid())
+    writer = _writers.get(key)
+    if writer is None:
+        with _writers_lock:
+            writer = _writers.get(key)
+            if writer is None:
+                os.makedirs(directory, exist_ok=True)
+                path = os.path.join(directory, f"{socket.gethostname()}-{os.getpid()}{TRACE_SUFFIX}")
+                writer = _writers[key] = TraceWriter(path)
+    return writer
+
+
+@atexit.register
+def flush_traces():
+    """Writes the buffered records of all trace writers of this process."""
+    for (_, pid), writer in list(_writers.items()):
+        if pid == os.getpid():
+            writer.flush()
+
+
+def read_trace_file(path: str) -> np.ndarray:
+    """
+    Reads one trace file. An incomplete last record (e.g. of a killed process) is ignored.
+
+    Args:
+        path (str): Path of the trace file.
+
+    Returns:
+        np.ndarray: Records of :data:`TRACE_DTYPE`.
+
+    Raises:
+        ValueError: If the file is not a trace of this version.
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+    if data[:len(TRACE_MAGIC)] != TRACE_MAGIC:
+        raise ValueError(f"'{path}' is not an evaluation trace.")
+    version, itemsize = np.frombuffer(data, dtype='<u4', count=2, offset=len(TRACE_MAGIC))
+    if version != TRACE_VERSION or itemsize != TRACE_DTYPE.itemsize:
+        raise ValueError(f"'{path}' has trace version {version}, expected {TRACE_VERSION}.")
+    body = data[len(_HEADER):]
+    count = len(body) // TRACE_DTYPE.itemsize
+    return np.frombuffer(body, dtype=TRACE_DTYPE, count=count).copy()
+
+
+def load_trace(path: str) -> np.ndarray:
+    """
+    Loads the evaluations of a trace directory or file, sorted by time.
+
+    Fields are accessed as arrays, e.g. ``trace['x']`` has shape (N, 6) and ``trace['value']`` shape (N,).
+    The evaluations of one local optimization have the same ``(worker, start)``.
+
+    Args:
+        path (str): Trace directory or a single trace file.
+
+    Returns:
+        np.ndarray: Records of :data:`TRACE_DTYPE`.
+    """
+    paths = sorted(glob.glob(os.path.join(path, '*' + TRACE_SUFFIX))) if os.path.isdir(path) else [path]
+    traces = [read_trace_file(p) for p in paths]
+    trace = np.concatenate(traces) if traces else np.zeros(0, dtype=TRACE_DTYPE)
+    return trace[np.argsort(trace['time'], kind='stable')]
@@ -0,0 +1,438 @@
+"""
+Trait-free counterparts of Geometry, Aperture, Medium and SimulationParameters for hot loops.
+
+The classes in this module expose the same attributes and physics as their traits versions,
+but use ``__slots__``, are immutable after construction and validate their inputs only once
+(or not at all with ``trusted=True``). They can be passed to Resonator and Simulation directly
+and converted both ways with ``from_traits`` / ``to_traits``.
+"""
+
+from functools import lru_cache
+from traits.api import TraitError
+from numpy import pi
+from .geometry import Geometry
+from .aperture import Aperture
+from .medium import Medium, calc_air_properties
+from .simulation_parameters import SimulationParameters
+from . import frequency_grid
+
+# value ranges of the traits classes, used for validation
+GEOMETRY_LIMITS = {'x': (0.001, 2.0), 'y': (0.001, 2.0), 'z': (0.001, 2.0),
+                   'radius': (0.001, 1.0), 'height': (0.001, 1.0)}
+APERTURE_LIMITS = {'length': (0.001, 0.5), 'radius': (0.005, 1.0),
+                   'width': (0.001, 0.5), 'height': (0.001, 0.5), 'amount': (1, 100)}
+MEDIUM_LIMITS = {'temperature_celsius': (-50.0, 60.0), 'rel_humidity': (0.0, 1.0)}
+TUBE_END_CORRECTION = {'open': 0.6, 'flange': 0.85}
+
+
+def _check_range(name, value, limits):
+    """Raises a TraitError if value lies outside the closed interval of limits[name]."""
+    low, high = limits[name]
+    if not low <= value <= high:
+        raise TraitError(f"'{name}' must be in the range [{low}, {high}], got {value}.")
+
+
+def _rebuild(cls, values):
+    """Recreates a pickled fast model from its (already validated) input fields."""
+    return cls(**values, trusted=True)
+
+
+class _Frozen:
+    """Base class for slotted objects that cannot be modified after construction."""
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable, use replace() to create a modified copy.")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable.")
+
+    def _set(self, **values):
+        """Sets attributes during construction, bypassing immutability."""
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields)
+        return f"{type(self).__name__}({fields})"
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self._fields)
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, name) for name in self._fields))
+
+    def __reduce__(self):
+        # rebuild from the input fields, so instances can be sent to worker processes
+        return (_rebuild, (type(self), {name: getattr(self, name) for name in self._fields}))
+
+    def replace(self, **changes):
+        """
+        Creates a copy with some input fields changed.
+
+        Args:
+            **changes: New values for input fields.
+
+        Returns:
+            A new instance of the same class.
+        """
+        values = {name: getattr(self, name) for name in self._fields}
+        values.update(changes)
+        return type(self)(**values, trusted=not changes)
+
+
+class FastGeometry(_Frozen):
+    """
+    Trait-free, immutable counterpart of :class:`calculation.geometry.Geometry`.
+
+    Attributes:
+        form (str): 'cylinder' or 'cuboid'.
+        x, y, z (float or None): Dimensions of the cuboid in meters.
+        radius, height (float or None): Dimensions of the cylinder in meters.
+        volume (float): Calculated volume of the geometry in cubic meters.
+    """
+
+    __slots__ = ('form', 'x', 'y', 'z', 'radius', 'height', 'volume')
+    _fields = ('form', 'x', 'y', 'z', 'radius', 'height')
+
+    def __init__(self, form='cylinder', x=None, y=None, z=None, radius=None, height=None, trusted=False):
+        """
+        Initialize a FastGeometry and compute its volume.
+
+        Args:
+            trusted (bool): Skip validation, e.g. if values are already bounded by an optimizer.
+
+        Raises:
+            TraitError: If the form or dimensions are invalid (only if not trusted).
+        """
+        if not trusted:
+            if form == 'cylinder':
+                if radius is None or height is None:
+                    raise TraitError("Cylinder requires 'radius' and 'height' parameters.")
+                _check_range('radius', radius, GEOMETRY_LIMITS)
+                _check_range('height', height, GEOMETRY_LIMITS)
+            elif form == 'cuboid':
+                if x is None or y is None or z is None:
+                    raise TraitError("Cuboid requires all three side lengths x, y, z.")
+                for name, value in (('x', x), ('y', y), ('z', z)):
+                    _check_range(name, value, GEOMETRY_LIMITS)
+            else:
+                raise TraitError("Invalid form, use 'cylinder' or 'cuboid'.")
+
+        if form == 'cylinder':
+            volume = pi * radius ** 2 * height
+        else:
+            volume = x * y * z
+
+        self._set(form=form, x=x, y=y, z=z, radius=radius, height=height, volume=volume)
+
+    def to_dict(self):
+        """Converts the geometry to a dictionary, see :meth:`Geometry.to_dict`."""
+        return {
+            "form": self.form,
+            "volume": self.volume,
+            "radius": self.radius,
+            "height": self.height,
+            "x": self.x,
+            "y": self.y,
+            "z": self.z
+        }
+
+    @classmethod
+    def from_traits(cls, geometry: Geometry) -> 'FastGeometry':
+        """Creates a FastGeometry from a (validated) Geometry."""
+        return cls(form=geometry.form, x=geometry.x, y=geometry.y, z=geometry.z,
+                   radius=geometry.radius, height=geometry.height, trusted=True)
+
+    def to_traits(self) -> Geometry:
+        """Creates the equivalent traits Geometry."""
+        return Geometry(form=self.form, x=self.x, y=self.y, z=self.z, radius=self.radius, height=self.height)
+
+
+class FastAperture(_Frozen):
+    """
+    Trait-free, immutable counterpart of :class:`calculation.aperture.Aperture`.
+
+    Attributes:
+        form (str): 'tube' or 'slit'.
+        length (float): Length of the aperture.
+        radius (float): Radius for 'tube' form (half the width for 'slit').
+        width, height (float or None): Dimensions for 'slit' form.
+        amount (int): Number of apertures.
+        inner_ending, outer_ending (str): 'open' or 'flange'.
+        additional_dampening (bool): Whether porous damping is used.
+        xi (float or None): Damping coefficient.
+        area (float): Computed cross-sectional area.
+        inner_end_correction (float): End correction at inner boundary.
+        outer_end_correction (float): End correction at outer boundary.
+    """
+
+    __slots__ = ('form', 'length', 'radius', 'width', 'height', 'amount', 'inner_ending', 'outer_ending',
+                 'additional_dampening', 'xi', 'area', 'inner_end_correction', 'outer_end_correction')
+    _fields = ('form', 'length', 'radius', 'width', 'height', 'amount', 'inner_ending', 'outer_ending',
+               'additional_dampening', 'xi')
+
+    def __init__(self, form='tube', length=0.001, radius=0.005, width=0.001, height=0.001, amount=1,
+                 inner_ending='open', outer_ending='flange', additional_dampening=False, xi=None, trusted=False):
+        """
+        Initialize a FastAperture and compute its area and end corrections.
+
+        Defaults follow the traits ranges of :class:`Aperture`, e.g. an unset radius is 0.005.
+
+        Args:
+            trusted (bool): Skip validation, e.g. if values are already bounded by an optimizer.
+
+        Raises:
+            TraitError: If the configuration is invalid (only if not trusted).
+        """
+        if not trusted:
+            if form not in ('tube', 'slit'):
+                raise TraitError("Invalid form, use 'tube' or 'slit'.")
+            if inner_ending not in TUBE_END_CORRECTION or outer_ending not in TUBE_END_CORRECTION:
+                raise TraitError("Invalid ending. Choose 'open' or 'flange'.")
+            _check_range('length', length, APERTURE_LIMITS)
+            _check_range('amount', amount, APERTURE_LIMITS)
+            if form == 'tube':
+                if radius is None:
+                    raise TraitError("Radius required if form='tube'.")
+                _check_range('radius', radius, APERTURE_LIMITS)
+            else:
+                if width is None or height is None:
+                    raise TraitError("form='slit' requires width and height.")
+                _check_range('width', width, APERTURE_LIMITS)
+                _check_range('height', height, APERTURE_LIMITS)
+            if additional_dampening and xi is None:
+                raise TraitError("xi required if additional_dampening=True.")
+
+        if form == 'tube':
+            area = pi * radius**2 * amount
+            inner_end_correction = TUBE_END_CORRECTION[inner_ending] * radius
+            outer_end_correction = TUBE_END_CORRECTION[outer_ending] * radius
+        else:
+            area = width * height * amount
+            inner_end_correction = outer_end_correction = Aperture.get_slit_end_correction(width, height)
+            radius = 0.5 * width
+
+        self._set(form=form, length=length, radius=radius, width=width, height=height, amount=amount,
+                  inner_ending=inner_ending, outer_ending=outer_ending,
+                  additional_dampening=additional_dampening, xi=xi, area=area,
+                  inner_end_correction=inner_end_correction, outer_end_correction=outer_end_correction)
+
+    def to_dict(self):
+        """Returns the aperture as a dictionary, see :meth:`Aperture.to_dict`."""
+        base = {
+            'form': self.form,
+            'length': self.length,
+            'amount': self.amount,
+            'inner_ending': self.inner_ending,
+            'outer_ending': self.outer_ending,
+            'additional_dampening': self.additional_dampening,
+            'xi': self.xi if self.additional_dampening else None,
+            'area': self.area,
+            'inner_end_correction': self.inner_end_correction,
+            'outer_end_correction': self.outer_end_correction}
+
+        if self.form == 'tube':
+            base.update({'radius': self.radius})
+        elif self.form == 'slit':
+            base.update({'width': self.width, 'height': self.height})
+
+        return base
+
+    @classmethod
+    def from_traits(cls, aperture: Aperture) -> 'FastAperture':
+        """Creates a FastAperture from a (validated) Aperture."""
+        return cls(form=aperture.form, length=aperture.length, radius=aperture.radius,
+                   width=aperture.width, height=aperture.height, amount=aperture.amount,
+                   inner_ending=aperture.inner_ending, outer_ending=aperture.outer_ending,
+                   additional_dampening=aperture.additional_dampening, xi=aperture.xi, trusted=True)
+
+    def to_traits(self) -> Aperture:
+        """Creates the equivalent traits Aperture."""
+        kwargs = dict(form=self.form, length=self.length, width=self.width, height=self.height,
+                      amount=self.amount, inner_ending=self.inner_ending, outer_ending=self.outer_ending,
+                      additional_dampening=self.additional_dampening, xi=self.xi)
+        if self.form == 'tube':
+            # for slits the radius is derived from the width
+            kwargs['radius'] = self.radius
+        return Aperture(**kwargs)
+
+
+class FastMedium(_Frozen):
+    """
+    Trait-free, immutable counterpart of :class:`calculation.medium.Medium`.
+
+    Attributes:
+        temperature_celsius (float): Ambient temperature in °C.
+        rel_humidity (float): Relative humidity between 0 and 1.
+        density (float): Air density in kg/m³.
+        speed_of_sound (float): Speed of sound in m/s, None if calculated.
+        c (float): Speed of sound in m/s.
+        temperature_kelvin (float): Temperature in Kelvin.
+        kinematic_viscosity (float): Kinematic viscosity of air in m²/s.
+    """
+
+    __slots__ = ('temperature_celsius', 'rel_humidity', 'density', 'speed_of_sound', 'c',
+                 'temperature_kelvin', 'kinematic_viscosity')
+    _fields = ('temperature_celsius', 'rel_humidity', 'density', 'speed_of_sound')
+
+    def __init__(self, temperature_celsius=20.0, rel_humidity=0.5, density=None, speed_of_sound=None,
+                 trusted=False):
+        """
+        Initialize a FastMedium, calculating missing properties like :class:`Medium`.
+
+        Args:
+            trusted (bool): Skip validation.
+
+        Raises:
+            TraitError: If inputs are out of range or density / speed of sound are non-positive.
+        """
+        if not trusted:
+            _check_range('temperature_celsius', temperature_celsius, MEDIUM_LIMITS)
+            _check_range('rel_humidity', rel_humidity, MEDIUM_LIMITS)
+
+        density, c, kinematic_viscosity = calc_air_properties(temperature_celsius, rel_humidity,
+                                                              density, speed_of_sound)
+
+        self._set(temperature_celsius=temperature_celsius, rel_humidity=rel_humidity, density=float(density),
+                  speed_of_sound=speed_of_sound, c=float(c), temperature_kelvin=temperature_celsius + 273.15,
+                  kinematic_viscosity=float(kinematic_viscosity))
+
+    def to_dict(self):
+        """Converts the medium's properties to a dictionary, see :meth:`Medium.to_dict`."""
+        return {
+            "temperature_celsius": self.temperature_celsius,
+            "temperature_kelvin": self.temperature_kelvin,
+            "rel_humidity": self.rel_humidity,
+            "density": self.density,
+            "speed_of_sound": self.c,
+            "kinematic_viscosity": self.kinematic_viscosity
+        }
+
+    @classmethod
+    def from_traits(cls, medium: Medium) -> 'FastMedium':
+        """Creates a FastMedium from a Medium, keeping its (possibly calculated) density and speed of sound."""
+        return cls(temperature_celsius=medium.temperature_celsius, rel_humidity=medium.rel_humidity,
+                   density=medium.density, speed_of_sound=medium.c, trusted=True)
+
+    def to_traits(self) -> Medium:
+        """Creates the equivalent traits Medium."""
+        return Medium(temperature_celsius=self.temperature_celsius, rel_humidity=self.rel_humidity,
+                      density=self.density, speed_of_sound=self.speed_of_sound)
+
+
+@lru_cache(maxsize=256)
+def _cached_medium(temperature_celsius, rel_humidity, density, speed_of_sound):
+    return FastMedium(temperature_celsius=temperature_celsius, rel_humidity=rel_humidity,
+                      density=density, speed_of_sound=speed_of_sound)
+
+
+def get_medium(temperature_celsius=20.0, rel_humidity=0.5, density=None, speed_of_sound=None) -> FastMedium:
+    """
+    Memoized factory for FastMedium instances.
+
+    Media are immutable, so one instance per set of conditions can be shared by all simulations.
+    The least recently used conditions are evicted once 256 different media are cached.
+
+    Args:
+        temperature_celsius (float): Ambient temperature in °C.
+        rel_humidity (float): Relative humidity (0…1).
+        density (float, optional): Fixed density instead of the calculated one.
+        speed_of_sound (float, optional): Fixed speed of sound instead of the calculated one.
+
+    Returns:
+        FastMedium: Shared medium for the given conditions.
+    """
+    return _cached_medium(float(temperature_celsius), float(rel_humidity),
+                          None if density is None else float(density),
+                          None if speed_of_sound is None else float(speed_of_sound))
+
+
+get_medium.cache_info = _cached_medium.cache_info
+get_medium.cache_clear = _cached_medium.cache_clear
+
+
+class FastSimulationParameters(_Frozen):
+    """
+    Trait-free, immutable counterpart of :class:`calculation.simulation_parameters.SimulationParameters`.
+
+    The frequency dependent arrays are shared read-only arrays from :mod:`calculation.frequency_grid`,
+    so adaptive grid refinement is not supported.
+
+    Attributes:
+        medium (FastMedium or Medium): The propagation medium.
+        freq_range (tuple): Frequency range for the simulation (min, max).
+        values_per_octave (int): Discretization of the frequency axis.
+        angle_of_incidence (float): Angle of sound incidence (°).
+        assume_diffuse (bool): If True, angle_of_incidence is 0 and a diffuse field is assumed.
+        frequencies (np.ndarray): Frequency vector.
+        omega (np.ndarray): Angular frequency (rad/s).
+        k (np.ndarray): Wave number (1/m).
+        wavelength (np.ndarray): Wavelength (m).
+    """
+
+    __slots__ = ('medium', 'freq_range', 'values_per_octave', 'angle_of_incidence', 'assume_diffuse',
+                 'frequencies', 'omega', 'k', 'wavelength')
+    _fields = ('medium', 'freq_range', 'values_per_octave', 'angle_of_incidence', 'assume_diffuse')
+    adaptive = False
+
+    def __init__(self, medium=None, freq_range=(20, 1000), values_per_octave=1, angle_of_incidence=0.0,
+                 assume_diffuse=True, trusted=False):
+        """
+        Initialize and compute the frequency dependent parameters like :class:`SimulationParameters`.
+
+        Args:
+            trusted (bool): Skip validation.
+
+        Raises:
+            TraitError: If the frequency range or discretization is invalid (only if not trusted).
+        """
+        if medium is None:
+            medium = FastMedium()
+        freq_range = tuple(freq_range)
+
+        if not trusted:
+            f_min, f_max = freq_range
+            if not 0.01 <= f_min <= 10_000. or not 100. <= f_max <= 10_000.:
+                raise TraitError(f"Invalid frequency range {freq_range}.")
+            if not 1 <= values_per_octave <= 10_000:
+                raise TraitError("values_per_octave must be in the range [1, 10000].")
+
+        if assume_diffuse:
+            angle_of_incidence = 0.0
+
+        f_min, f_max = freq_range
+        frequencies, omega, k, wavelength = frequency_grid.get_grid(f_min, f_max, values_per_octave, medium.c)
+
+        self._set(medium=medium, freq_range=freq_range, values_per_octave=values_per_octave,
+                  angle_of_incidence=angle_of_incidence, assume_diffuse=assume_diffuse,
+                  frequencies=frequencies, omega=omega, k=k, wavelength=wavelength)
+
+    def to_dict(self):
+        """Converts all relevant parameters to a dictionary, see :meth:`SimulationParameters.to_dict`."""
+        return {
+            "medium": self.medium.to_dict(),
+            "freq_range": self.freq_range,
+            "values_per_octave": self.values_per_octave,
+            "angle_of_incidence": self.angle_of_incidence,
+            "assume_diffuse": self.assume_diffuse
+        }
+
+    @classmethod
+    def from_traits(cls, sim_params: SimulationParameters) -> 'FastSimulationParameters':
+        """Creates FastSimulationParameters from SimulationParameters."""
+        return cls(medium=FastMedium.from_traits(sim_params.medium), freq_range=sim_params.freq_range,
+                   values_per_octave=sim_params.values_per_octave,
+                   angle_of_incidence=sim_params.angle_of_incidence,
+                   assume_diffuse=sim_params.assume_diffuse, trusted=True)
+
+    def to_traits(self) -> SimulationParameters:
+        """Creates the equivalent traits SimulationParameters."""
+        medium = self.medium.to_traits() if isinstance(self.medium, FastMedium) else self.medium
+        return SimulationParameters(medium=medium, freq_range=self.freq_range,
+                                    values_per_octave=self.values_per_octave,
+                                    angle_of_incidence=self.angle_of_incidence,
+                                    assume_diffuse=self.assume_diffuse)
@@ -0,0 +1,169 @@
+"""
+Process-wide cache of read-only frequency grids.
+
+Many simulations share the same frequency range, discretization and speed of sound. Instead of
+recomputing ``frequencies``, ``omega``, ``k`` and ``wavelength`` for every SimulationParameters
+instance, the arrays are computed once, marked read-only and kept in a bounded LRU cache.
+
+Two kinds of grids are available:
+
+- the classic grid of :meth:`SimulationParameters.calculate_frequencies`, ``logspace`` from
+  ``f_min`` to ``f_max`` with ``int(n_octaves * values_per_octave)`` points
+- the canonical grid, a slice of one global log lattice :math:`f_i = 1000 \\cdot 2^{i / N}` Hz
+  per ``values_per_octave`` :math:`N`, so grids of different ranges share their frequencies
+  exactly and can be compared or stacked without interpolation
+"""
+
+from collections import OrderedDict
+from functools import lru_cache
+import threading
+import numpy as np
+
+# reference frequency of the canonical lattice (Hz)
+LATTICE_REFERENCE = 1000.0
+# the lattice covers the complete range allowed by SimulationParameters.freq_range
+LATTICE_RANGE = (0.01, 10_000.0)
+
+cache_size = 64
+_cache = OrderedDict()
+_lock = threading.Lock()
+_hits = 0
+_misses = 0
+
+
+def _read_only(arr):
+    arr.flags.writeable = False
+    return arr
+
+
+@lru_cache(maxsize=8)
+def master_lattice(values_per_octave: int) -> tuple:
+    """
+    Returns the canonical log lattice for one discretization.
+
+    Args:
+        values_per_octave (int): Number of lattice points per octave.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Read-only (frequencies, omega) covering `LATTICE_RANGE`.
+    """
+    i_min = int(np.floor(np.log2(LATTICE_RANGE[0] / LATTICE_REFERENCE) * values_per_octave))
+    i_max = int(np.ceil(np.log2(LATTICE_RANGE[1] / LATTICE_REFERENCE) * values_per_octave))
+    frequencies = LATTICE_REFERENCE * 2.0 ** (np.arange(i_min, i_max + 1) / values_per_octave)
+    return (_read_only(frequencies), _read_only(2 * np.pi * frequencies))
+
+
+def _lattice_slice(f_min: float, f_max: float, values_per_octave: int) -> slice:
+    """Returns the slice of the master lattice inside [f_min, f_max]."""
+    frequencies, _ = master_lattice(values_per_octave)
+    # tolerate rounding so that range limits on the lattice are included
+    eps = 1e-9
+    start = np.searchsorted(frequencies, f_min * (1 - eps), side='left')
+    stop = np.searchsorted(frequencies, f_max * (1 + eps), side='right')
+    return slice(int(start), int(stop))
+
+
+def log_frequencies(f_min: float, f_max: float, values_per_octave: int, canonical: bool = False) -> np.ndarray:
+    """
+    Returns the (read-only) frequency vector for a range and discretization.
+
+    Args:
+        f_min (float): Lower frequency limit (Hz).
+        f_max (float): Upper frequency limit (Hz).
+        values_per_octave (int): Discretization of the frequency axis.
+        canonical (bool): If True, return a slice of the canonical lattice instead of a logspace grid.
+
+    Returns:
+        np.ndarray: Frequency vector (Hz).
+    """
+    return get_grid(f_min, f_max, values_per_octave, None, canonical)[0]
+
+
+def get_grid(f_min: float, f_max: float, values_per_octave: int, c: float = None, canonical: bool = False) -> tuple:
+    """
+    Returns the cached frequency dependent arrays for the given inputs.
+
+    Args:
+        f_min (float): Lower frequency limit (Hz).
+        f_max (float): Upper frequency limit (Hz).
+        values_per_octave (int): Discretization of the frequency axis.
+        c (float, optional): Speed of sound (m/s). If None, k and wavelength are None.
+        canonical (bool): If True, use a slice of the canonical lattice.
+
+    Returns:
+        tuple: Read-only arrays (frequencies, omega, k, wavelength).
+    """
+    global _hits, _misses
+    key = (float(f_min), float(f_max), int(values_per_octave), None if c is None else float(c), bool(canonical))
+
+    with _lock:
+        grid = _cache.get(key)
+        if grid is not None:
+            _cache.move_to_end(key)
+            _hits += 1
+            return grid
+        _misses += 1
+
+    if c is not None:
+        # reuse frequencies and omega of the grid without speed of sound
+        frequencies, omega, _, _ = get_grid(f_min, f_max, values_per_octave, None, canonical)
+        k = _read_only(omega / c)
+        wavelength = _read_only(c / (omega / (2 * np.pi)))
+    elif canonical:
+        index = _lattice_slice(f_min, f_max, values_per_octave)
+        lattice_frequencies, lattice_omega = master_lattice(values_per_octave)
+        frequencies, omega = lattice_frequencies[index], lattice_omega[index]
+        k = wavelength = None
+    else:
+        n_octaves = np.log2(f_max / f_min)
+        n_freq_values = int(n_octaves * values_per_octave)
+        frequencies = _read_only(np.logspace(np.log10(f_min), np.log10(f_max), num=n_freq_values))
+        omega = _read_only(2 * np.pi * frequencies)
+        k = wavelength = None
+
+    grid = (frequencies, omega, k, wavelength)
+    with _lock:
+        _cache[key] = grid
+        _cache.move_to_end(key)
+        while len(_cache) > cache_size:
+            _cache.popitem(last=False)
+    return grid
+
+
+def set_cache_size(size: int):
+    """
+    Sets the maximum number of cached grids and evicts the least recently used ones if necessary.
+
+    Args:
+        size (int): Maximum number of cached grids (>= 1).
+
+    Raises:
+        ValueError: If size is smaller than 1.
+    """
+    global cache_size
+    if size < 1:
+        raise ValueError("Cache size must be at least 1.")
+    with _lock:
+        cache_size = size
+        while len(_cache) > cache_size:
+            _cache.popitem(last=False)
+
+
+def clear_cache():
+    """Removes all cached grids and resets the statistics."""
+    global _hits, _misses
+    with _lock:
+        _cache.clear()
+        _hits = _misses = 0
+    master_lattice.cache_clear()
+
+
+def cache_info() -> dict:
+    """
+    Returns statistics of the grid cache.
+
+    Returns:
+        dict: Number of hits, misses, cached grids and the maximum size.
+    """
+    with _lock:
+        return {"hits": _hits, "misses": _misses, "size": len(_cache), "max_size": cache_size}
@@ -1,4 +1,4 @@
-from traits.api import HasTraits, Enum, Range, Float, TraitError, Union
+from traits.api import HasTraits, Enum, Range, Float, TraitError, Union, observe
 from traitsui.api import View, Item, Group
 import numpy as np
 
@@ -62,6 +62,11 @@ class Geometry(HasTraits):
         else:
             raise TraitError("Invalid form, use 'cylinder' or 'cuboid'.")
 
+    @observe('form, x, y, z, radius, height', post_init=True)
+    def _update_volume(self, event):
+        """Keeps the volume consistent when a dimension is changed after initialization."""
+        self.validate_and_calculate()
+
     def to_dict(self):
         """
         Converts the geometry instance to a dictionary.
@@ -1,7 +1,98 @@
-from traits.api import HasTraits, Float, Range, TraitError, Union
+from traits.api import HasTraits, Float, Range, TraitError, Union, observe
 from traitsui.api import View, Item, Group
 import numpy as np
 
+
+def calc_air_density(temperature_celsius, rel_humidity):
+    """
+    Vectorized air density, see :meth:`Medium.calc_density`.
+
+    Args:
+        temperature_celsius (float or np.ndarray): Temperature in °C.
+        rel_humidity (float or np.ndarray): Relative humidity (0…1).
+
+    Returns:
+        float or np.ndarray: Air density in kg/m³, broadcast over the inputs.
+    """
+    p = 1013.15 * 100  # Atmospheric pressure in Pa
+    T = np.asarray(temperature_celsius) + 273.15
+    phi = np.asarray(rel_humidity)
+    R_d = 287.05       # Gas constant for dry air
+    R_v = 461.5        # Gas constant for water vapor
+
+    p_sat = 6.112 * np.exp(17.62 * T / (243.12 * T)) * 100
+    p_v = phi * p_sat
+
+    return (p - p_v) / (R_d * T) + p_v / (R_v * T)
+
+
+def calc_air_speed_of_sound(temperature_celsius, rel_humidity):
+    """
+    Vectorized speed of sound, see :meth:`Medium.calc_speed_of_sound`.
+
+    Args:
+        temperature_celsius (float or np.ndarray): Temperature in °C.
+        rel_humidity (float or np.ndarray): Relative humidity (0…1).
+
+    Returns:
+        float or np.ndarray: Speed of sound in m/s, broadcast over the inputs.
+    """
+    return 331.3 + 0.606 * np.asarray(temperature_celsius) + 0.0124 * np.asarray(rel_humidity)
+
+
+def calc_air_kinematic_viscosity(temperature_celsius, density):
+    """
+    Vectorized kinematic viscosity (Sutherland), see :meth:`Medium.calc_kinematic_viscosity`.
+
+    Args:
+        temperature_celsius (float or np.ndarray): Temperature in °C.
+        density (float or np.ndarray): Air density in kg/m³.
+
+    Returns:
+        float or np.ndarray: Kinematic viscosity in m²/s, broadcast over the inputs.
+    """
+    T = np.asarray(temperature_celsius) + 273.15
+    mu0 = 1.716e-5  # Reference dynamic viscosity (Pa·s)
+    T0 = 273.15     # Reference temperature (K)
+    C = 111         # Sutherland's constant for air
+
+    mu = mu0 * ((T / T0) ** 1.5) * ((T0 + C) / (T + C))
+    return mu / density
+
+
+def calc_air_properties(temperature_celsius, rel_humidity, density=None, speed_of_sound=None):
+    """
+    Vectorized evaluation of all derived medium properties, e.g. for a time series of weather data.
+
+    Args:
+        temperature_celsius (float or np.ndarray): Temperatures in °C.
+        rel_humidity (float or np.ndarray): Relative humidities (0…1).
+        density (float or np.ndarray, optional): Fixed density instead of the calculated one.
+        speed_of_sound (float or np.ndarray, optional): Fixed speed of sound instead of the calculated one.
+
+    Returns:
+        tuple: (density, speed_of_sound, kinematic_viscosity), each broadcast over the inputs including
+        the overrides. Scalar inputs give scalars.
+
+    Raises:
+        TraitError: If a density or speed of sound is non-positive.
+    """
+    if density is None:
+        density = calc_air_density(temperature_celsius, rel_humidity)
+    if np.any(np.asarray(density) <= 0):
+        raise TraitError("Density must be positive.")
+
+    if speed_of_sound is None:
+        speed_of_sound = calc_air_speed_of_sound(temperature_celsius, rel_humidity)
+    if np.any(np.asarray(speed_of_sound) <= 0):
+        raise TraitError("speed of sound must be positive.")
+
+    kinematic_viscosity = calc_air_kinematic_viscosity(temperature_celsius, density)
+    # scalar overrides take the shape of array inputs, scalars stay scalars
+    arrays = np.broadcast_arrays(temperature_celsius, rel_humidity, density, speed_of_sound, kinematic_viscosity)
+    return tuple(array[()] for array in arrays[2:])
+
+
 class Medium(HasTraits):
     """
     Represents the physical properties of the medium (typically air) used in simulations.
@@ -42,6 +133,7 @@ class Medium(HasTraits):
         """
         super().__init__(**kwargs)
         self.temperature_kelvin = self.temperature_celsius + 273.15
+        self._density_calculated = self.density is None
 
         if self.density is None:
             self.calc_density()
@@ -57,6 +149,30 @@ class Medium(HasTraits):
 
         self.calc_kinematic_viscosity()
 
+    @observe('temperature_celsius, rel_humidity', post_init=True)
+    def _update_conditions(self, event):
+        """Recalculates all properties that were not provided explicitly when the conditions change."""
+        self.temperature_kelvin = self.temperature_celsius + 273.15
+        if self._density_calculated:
+            self.calc_density()
+        if self.speed_of_sound is None:
+            self.calc_speed_of_sound()
+        self.calc_kinematic_viscosity()
+
+    @observe('density', post_init=True)
+    def _update_density(self, event):
+        """Keeps the kinematic viscosity consistent with an explicitly changed density."""
+        if event.new is not None:
+            self.calc_kinematic_viscosity()
+
+    @observe('speed_of_sound', post_init=True)
+    def _update_speed_of_sound(self, event):
+        """Keeps the alias c consistent with an explicitly changed speed of sound."""
+        if event.new is None:
+            self.calc_speed_of_sound()
+        else:
+            self.c = self.speed_of_sound
+
     def calc_density(self):
         """
         Calculates air density using the Magnus equation.
@@ -80,16 +196,7 @@ class Medium(HasTraits):
         Raises:
         TraitError: If the result is non-positive.
          """
-        p = 1013.15 * 100  # Atmospheric pressure in Pa
-        T = self.temperature_kelvin
-        phi = self.rel_humidity
-        R_d = 287.05       # Gas constant for dry air
-        R_v = 461.5        # Gas constant for water vapor
-
-        p_sat = 6.112 * np.exp(17.62 * T / (243.12 * T)) * 100
-        p_v = phi * p_sat
-
-        rho = (p - p_v) / (R_d * T) + p_v / (R_v * T)
+        rho = float(calc_air_density(self.temperature_celsius, self.rel_humidity))
 
         if rho <= 0:
             raise TraitError("Calculated density must be > 0.")
@@ -112,7 +219,7 @@ class Medium(HasTraits):
         - :math:`\phi` relative humidity (0…1)  
         - :math:`c` speed of sound in m/s
         """
-        self.c = 331.3 + 0.606 * self.temperature_celsius + 0.0124 * self.rel_humidity
+        self.c = float(calc_air_speed_of_sound(self.temperature_celsius, self.rel_humidity))
 
  
    
@@ -143,14 +250,7 @@ class Medium(HasTraits):
         where :math:`\rho` is the air density in kg/m³.
         """
 
-
-        T = self.temperature_kelvin
-        mu0 = 1.716e-5  # Reference dynamic viscosity (Pa·s)
-        T0 = 273.15     # Reference temperature (K)
-        C = 111         # Sutherland's constant for air
-
-        mu = mu0 * ((T / T0) ** 1.5) * ((T0 + C) / (T + C))
-        self.kinematic_viscosity = mu / self.density
+        self.kinematic_viscosity = float(calc_air_kinematic_viscosity(self.temperature_celsius, self.density))
 
     def to_dict(self):
         """
@@ -0,0 +1,147 @@
+"""
+Memoization of objective evaluations within one process.
+
+Local optimizers evaluate the objective repeatedly at (bitwise) identical parameter vectors, e.g. on
+line-search restarts, for the constraint and objective callbacks of the same iterate and for the final
+evaluation. The cache of this module answers these repetitions without rebuilding the models. Each
+worker process holds its own bounded cache (see :func:`get_objective_cache`), no state is shared
+between processes.
+"""
+
+from collections import OrderedDict, namedtuple
+import threading
+
+# value of the objective together with the quantities it was computed from
+ObjectiveEvaluation = namedtuple('ObjectiveEvaluation', ['value', 'f_resonance', 'q_factor', 'peak_absorbtion_area'])
+
+_process_cache = None
+_process_cache_lock = threading.Lock()
+
+
+class ObjectiveCache():
+    """
+    Thread-safe, bounded least recently used cache of objective evaluations.
+
+    Keys are built from the settings of the objective and the parameter vector rounded to `digits`
+    significant digits. Hits and misses are counted per cache and per thread, so an optimization can
+    measure its own hit rate while other threads use the same cache.
+
+    Attributes:
+        maxsize (int): Maximum number of entries.
+        digits (int): Significant digits of the parameters in the keys.
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups that had to be computed.
+    """
+
+    def __init__(self, maxsize: int = 4096, digits: int = 12):
+        """
+        Creates an empty cache.
+
+        Args:
+            maxsize (int): Maximum number of entries (>= 1).
+            digits (int): Significant digits of the parameters in the keys.
+
+        Raises:
+            ValueError: If maxsize is smaller than 1.
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1.")
+        self.maxsize = maxsize
+        self.digits = digits
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def key(self, settings: tuple, vars) -> tuple:
+        """
+        Returns the key of an evaluation.
+
+        Args:
+            settings (tuple): Hashable settings of the objective (targets, weights, kind of evaluation).
+            vars (Sequence[float]): Parameter vector.
+
+        Returns:
+            tuple: Settings and rounded parameters.
+        """
+        return (settings, tuple(float(f"{float(v):.{self.digits}g}") for v in vars))
+
+    def get_or_compute(self, key: tuple, compute):
+        """
+        Returns the cached value of a key or computes and stores it.
+
+        Args:
+            key (tuple): Key from :meth:`key`.
+            compute (callable): Computes the value if the key is not cached.
+
+        Returns:
+            The cached or computed value.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._count(hit=True)
+                return self._entries[key]
+            self.misses += 1
+            self._count(hit=False)
+
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def _count(self, hit):
+        counts = getattr(self._local, 'counts', None)
+        if counts is None:
+            counts = self._local.counts = [0, 0]
+        counts[0 if hit else 1] += 1
+
+    def thread_counts(self) -> tuple:
+        """
+        Returns the hits and misses of the calling thread.
+
+        Returns:
+            tuple[int, int]: (hits, misses) since the thread first used the cache.
+        """
+        return tuple(getattr(self._local, 'counts', (0, 0)))
+
+    def stats(self) -> dict:
+        """
+        Returns the statistics of the cache.
+
+        Returns:
+            dict: hits, misses, hit_rate (None without lookups) and size.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries),
+                    "hit_rate": self.hits / lookups if lookups else None}
+
+    def clear(self):
+        """Removes all entries and resets the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+def get_objective_cache() -> ObjectiveCache:
+    """
+    Returns the objective cache of the current process, creating it on first use.
+
+    Returns:
+        ObjectiveCache: The cache shared by all optimizers of this process.
+    """
+    global _process_cache
+    with _process_cache_lock:
+        if _process_cache is None:
+            _process_cache = ObjectiveCache()
+        return _process_cache
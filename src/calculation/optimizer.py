@@ -1,10 +1,26 @@
 from calculation import Simulation, SimulationParameters, Aperture, Geometry, Resonator, Medium
-from scipy.optimize import minimize
+from calculation import FastGeometry, FastAperture, FastSimulationParameters, get_medium, ResonanceSolver
+from calculation import BatchSimulation
+from calculation.fast_models import TUBE_END_CORRECTION
+from calculation.worker_pool import get_pool
+from calculation.objective_cache import ObjectiveEvaluation, get_objective_cache
+from calculation.checkpoint import SearchCheckpoint
+from calculation.search_budget import BudgetExhausted, SearchBudget
+from calculation.surrogate import SurrogateModel
+from calculation.evaluation_trace import KIND_COARSE, KIND_GRADIENT, KIND_GRID, get_trace_writer
+from scipy.optimize import minimize, differential_evolution, OptimizeResult
+from scipy.stats import qmc
+from collections import deque
+import heapq
+import itertools
+import json
+import os
 import threading
+import time
+import warnings
 import click
 import matplotlib.pyplot as plt
 import numpy as np
-from concurrent.futures import ProcessPoolExecutor, as_completed
 
 
 class Optimizer:
@@ -13,33 +29,170 @@ class Optimizer:
 
     """
 
-    def __init__(self, f_target, q_target):
+    # weights of the penalties in the objective
+    f_weight = 100.
+    q_weight = 20.
+
+    # frequency grid of the objective: range relative to f_target and resolution
+    freq_range_factors = (0.001, 10.)
+    values_per_octave = 300
+
+    # multi-fidelity mode: resolution and SLSQP tolerance of the coarse phase, SLSQP iterations of the
+    # full-resolution polish, and the relative tolerance of f_res and Q of the final design against
+    # `create_default_sim`
+    coarse_values_per_octave = 30
+    coarse_ftol = 1e-4
+    polish_maxiter = 10
+    full_resolution_rtol = 0.01
+
+    # memoize objective evaluations in the per-process cache of calculation.objective_cache
+    memoize = True
+
+    # seconds after the deadline of a time budget to collect the anytime results of running starts
+    budget_grace = 0.2
+
+    # Bounds: [(min, max), ...] per parameter
+    default_bounds = [
+        (0.1, 1.0),  # x
+        (0.1, 1.0),  # y
+        (0.1, 1.0),  # z
+        (0.01, 0.1),  # aperture radius
+        (0.01, 0.3),   # aperture length
+        (1, 5000)
+    ]
+
+    def __init__(self, f_target, q_target, use_gradient=True, pool=None, eliminate_volume=False, trace=None,
+                 multi_fidelity=False):
         """
         Initialize the optimizer with target frequency and Q factor.
 
         Args:
             f_target (float): Target resonance frequency.
             q_target (float): Target Q factor.
+            use_gradient (bool): If True, SLSQP uses `objective_and_gradient` with analytic derivatives
+                instead of finite differences of `objective`.
+            pool (WorkerPool, optional): Pool for `search_optimal`, defaults to the shared process pool
+                of :func:`calculation.worker_pool.get_pool`.
+            eliminate_volume (bool): If True, local optimizations only move x, y, radius, length and xi,
+                the depth z is solved from the target frequency (see `expand_reduced`).
+            trace (str, optional): Directory to which every objective evaluation is appended, see
+                :mod:`calculation.evaluation_trace`. Tracing is off by default.
+            multi_fidelity (bool): If True, local optimizations of the grid objective first run on a coarse
+                grid (`coarse_values_per_octave`) and only polish at full resolution, see
+                `run_single_optimization`. Requires `use_gradient` False.
+
+        Raises:
+            ValueError: If `multi_fidelity` is combined with `use_gradient` or `eliminate_volume`, which
+                use the grid-free solver.
         """
+        if multi_fidelity and (use_gradient or eliminate_volume):
+            raise ValueError("multi_fidelity applies to the grid objective, set use_gradient=False.")
         self.f_target = f_target
         self.q_target = q_target
+        self.use_gradient = use_gradient
+        self.pool = pool
+        self.eliminate_volume = eliminate_volume
+        self.trace = trace
+        self.multi_fidelity = multi_fidelity
 
         self.best_results = []
         self.best_result = None
 
         self.bounds = None
 
+        self.num_trials = 0
+        self.num_starts_used = 0
+        self.stopped_early = False
+        self.stop_reason = None
+        self.num_evaluations = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.full_resolution_check = None
+        self.num_true_evaluations = 0
+        self.num_surrogate_evaluations = 0
+
+    def __getstate__(self):
+        """Only the configuration is sent to workers, not the pool or previous results."""
+        state = self.__dict__.copy()
+        state.update(pool=None, best_results=[], best_result=None)
+        return state
+
+    def objective_freq_range(self) -> tuple:
+        """Returns the frequency range (Hz) of the objective, relative to the target frequency."""
+        low, high = self.freq_range_factors
+        return (self.f_target*low, self.f_target*high)
+
+    def cache_request(self, **options) -> dict:
+        """
+        Describes everything an optimization result depends on, see :class:`calculation.result_cache.ResultCache`.
+
+        Args:
+            **options: Search method and its options (JSON serializable).
+
+        Returns:
+            dict: Targets, bounds, objective weights, frequency settings and the given options.
+        """
+        return {
+            "f_target": float(self.f_target),
+            "q_target": float(self.q_target),
+            "bounds": [[float(low), float(high)] for low, high in (self.bounds or self.default_bounds)],
+            "f_weight": float(self.f_weight),
+            "q_weight": float(self.q_weight),
+            "freq_range_factors": [float(f) for f in self.freq_range_factors],
+            "values_per_octave": self.values_per_octave,
+            "use_gradient": self.use_gradient,
+            "eliminate_volume": self.eliminate_volume,
+            "multi_fidelity": self.multi_fidelity,
+            "options": options,
+        }
+
+    def _memoized(self, kind, vars, compute, values_per_octave=None):
+        """Evaluates compute() through the objective cache of the process, if `memoize` is set."""
+        if not self.memoize:
+            return compute()
+        settings = (kind, self.f_target, self.q_target, self.f_weight, self.q_weight, self.freq_range_factors,
+                    values_per_octave or self.values_per_octave)
+        cache = get_objective_cache()
+        return cache.get_or_compute(cache.key(settings, vars), compute)
+
     # function to optimize
-    def objective(self, vars):
+    def objective(self, vars, values_per_octave=None):
         """This function is called by the optimizer to evaluate a Helmholtz simulation for the given parameters and returns a penalty for the deviation from the target resonance frequency and Q factor.
 
         Args:
             vars (list): geometry and aperture parameters in the order [x, y, z, radius, length, xi].
-          
+            values_per_octave (int, optional): resolution of the frequency grid, defaults to `values_per_octave`.
 
         Returns:
             float: penalized peak value of the simulation result, where a lower value is better.
         """
+        return self.evaluate(vars, values_per_octave).value
+
+    def objective_coarse(self, vars):
+        """Evaluates `objective` on the coarse grid of the multi-fidelity mode (`coarse_values_per_octave`)."""
+        return self.evaluate(vars, self.coarse_values_per_octave).value
+
+    def evaluate(self, vars, values_per_octave=None) -> ObjectiveEvaluation:
+        """Evaluates `objective` and returns the value together with resonance frequency, Q factor and peak area.
+
+        Repeated evaluations of the same parameters are answered from the objective cache of the process.
+
+        Args:
+            vars (list): geometry and aperture parameters in the order [x, y, z, radius, length, xi].
+            values_per_octave (int, optional): resolution of the frequency grid, defaults to `values_per_octave`.
+
+        Returns:
+            ObjectiveEvaluation: value, f_resonance, q_factor (None if not available) and peak_absorbtion_area.
+        """
+        values_per_octave = values_per_octave or self.values_per_octave
+        evaluation = self._memoized('grid', vars, lambda: self._evaluate(vars, values_per_octave), values_per_octave)
+        if self.trace is not None:
+            kind = KIND_GRID if values_per_octave == self.values_per_octave else KIND_COARSE
+            self._trace_evaluation(kind, vars, evaluation)
+        return evaluation
+
+    def _evaluate(self, vars, values_per_octave):
+        """Simulates one design on the frequency grid, see `evaluate`."""
         x, y, z, radius, length, xi = vars
         
         
@@ -47,15 +200,16 @@ class Optimizer:
         f_target = self.f_target
         q_target = self.q_target
 
-        # Create geometry and aperture
-        geom = Geometry(form='cuboid', x=x, y=y, z=z)
-        ap = Aperture(form='tube', radius=radius, length=length, additional_dampening=True, xi=xi)
+        # Create geometry and aperture, values are bounded by the optimizer so validation is skipped
+        geom = FastGeometry(form='cuboid', x=x, y=y, z=z, trusted=True)
+        ap = FastAperture(form='tube', radius=radius, length=length, additional_dampening=True, xi=xi, trusted=True)
         res = Resonator(geom, ap)
 
         # Define medium and simulation
-        medium = Medium()
-        freq_range = (f_target*0.001, f_target*10) # automatically set frequency range
-        sim_params = SimulationParameters(medium=medium, freq_range=freq_range, values_per_octave=300) 
+        medium = get_medium()
+        freq_range = self.objective_freq_range() # automatically set frequency range
+        sim_params = FastSimulationParameters(medium=medium, freq_range=freq_range,
+                                              values_per_octave=values_per_octave, trusted=True)
         sim = Simulation(res, sim_params)
 
         # Simulate and extract results
@@ -70,126 +224,960 @@ class Optimizer:
         peak_area_norm = peak_area / max_area # now between 0 and 1
         try:
             # Penalize deviation from target f_res and Q
-            f_weight = 100. # weight of penalty
+            f_weight = self.f_weight # weight of penalty
             f_rel_error = np.abs(np.log10(f_res / f_target))
             f_penalty = f_rel_error  * f_weight 
 
-            q_weight = 20.
+            q_weight = self.q_weight
             q_rel_error = (q_factor - q_target) / q_target
             q_penalty = q_rel_error**2 * q_weight
             
         except TypeError:
-            return np.inf  # If Q factor is None, return a large penalty
-        return -peak_area_norm + f_penalty + q_penalty
-    
-    def run_single_optimization(self, x0):
+            # If Q factor is None, return a large penalty
+            return ObjectiveEvaluation(np.inf, f_res, q_factor, peak_area)
+        return ObjectiveEvaluation(-peak_area_norm + f_penalty + q_penalty, f_res, q_factor, peak_area)
+
+    def _trace_evaluation(self, kind, vars, evaluation):
+        """Appends an evaluation with its penalty terms to the trace of the process."""
+        f_res, q_factor = evaluation.f_resonance, evaluation.q_factor
+        peak_area_norm = self.peak_area_norm(f_res, evaluation.peak_absorbtion_area)
+        f_penalty = self.f_weight * np.abs(np.log10(f_res / self.f_target))
+        if q_factor is None:
+            q_factor = q_penalty = np.nan
+        else:
+            q_penalty = self.q_weight * ((q_factor - self.q_target) / self.q_target)**2
+        get_trace_writer(self.trace).record(kind, vars, evaluation.value, f_res, q_factor, peak_area_norm,
+                                            f_penalty, q_penalty)
+
+    @staticmethod
+    def peak_area_norm(f_resonance, peak_area):
+        """Peak absorption area relative to its theoretical maximum lambda^2 / pi, as in `objective`."""
+        medium = get_medium()
+        c = medium.c or medium.speed_of_sound
+        return peak_area * np.pi * f_resonance**2 / c**2
+
+    def penalized_value(self, f_resonance, q_factor, peak_area_norm):
+        """Objective value of designs with the given properties, the arguments may be arrays.
+
+        Args:
+            f_resonance (array_like): resonance frequencies (Hz).
+            q_factor (array_like): Q factors.
+            peak_area_norm (array_like): peak absorption areas relative to their theoretical maximum.
+
+        Returns:
+            np.ndarray: penalized peak values as in `objective`.
+        """
+        f_penalty = self.f_weight * np.abs(np.log10(np.asarray(f_resonance) / self.f_target))
+        q_penalty = self.q_weight * ((np.asarray(q_factor) - self.q_target) / self.q_target)**2
+        return -np.asarray(peak_area_norm) + f_penalty + q_penalty
+
+    def create_solver(self, vars) -> ResonanceSolver:
+        """Creates the grid-free solver for a design with the settings of `objective`.
+
+        Args:
+            vars (list): geometry and aperture parameters in the order [x, y, z, radius, length, xi].
+
+        Returns:
+            ResonanceSolver: solver for the design.
+        """
+        x, y, z, radius, length, xi = vars
+        geom = FastGeometry(form='cuboid', x=x, y=y, z=z, trusted=True)
+        ap = FastAperture(form='tube', radius=radius, length=length, additional_dampening=True, xi=xi, trusted=True)
+        sim_params = FastSimulationParameters(medium=get_medium(), freq_range=self.objective_freq_range(),
+                                              values_per_octave=self.values_per_octave, trusted=True)
+        return ResonanceSolver(Resonator(geom, ap), sim_params)
+
+    def expand_reduced(self, reduced):
+        """Completes a design of the reduced search space with the depth z that resonates at f_target.
+
+        The cavity volume follows from :meth:`ResonanceSolver.required_volume` (including end corrections,
+        radiation and damping), so every reduced design has its absorption peak exactly at the target.
+
+        Args:
+            reduced (list): parameters in the order [x, y, radius, length, xi].
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: full parameters [x, y, z, radius, length, xi] and the gradient
+            of z with respect to the reduced parameters.
+        """
+        full, d_z = self._memoized('reduced', reduced, lambda: self._expand_reduced(reduced))
+        return full.copy(), d_z.copy()
+
+    def _expand_reduced(self, reduced):
+        """Solves the depth z of a reduced design, see `expand_reduced`."""
+        x, y, radius, length, xi = reduced
+        # the volume of the geometry does not enter the required volume
+        solver = self.create_solver([x, y, 1.0, radius, length, xi])
+        volume = solver.required_volume(self.f_target)
+        d_volume = solver.required_volume_gradient(self.f_target)
+
+        z = volume / (x * y)
+        d_z = np.array([-z / x, -z / y, *(d_volume[1:] / (x * y))])
+        return np.array([x, y, z, radius, length, xi]), d_z
+
+    def objective_reduced_and_gradient(self, reduced):
+        """Evaluates `objective_and_gradient` on the reduced search space of `expand_reduced`.
+
+        Args:
+            reduced (list): parameters in the order [x, y, radius, length, xi].
+
+        Returns:
+            tuple[float, np.ndarray]: objective value and its gradient with respect to the reduced parameters.
+        """
+        full, d_z = self.expand_reduced(reduced)
+        value, gradient = self.objective_and_gradient(full)
+        return value, np.delete(gradient, 2) + gradient[2] * d_z
+
+    def objective_and_gradient(self, vars):
+        """Evaluates the objective and its gradient with the grid-free :class:`ResonanceSolver`.
+
+        The penalties are the same as in `objective`, but resonance frequency, peak area and Q-factor are
+        not limited to the grid resolution. Their derivatives are obtained by implicit differentiation
+        (:meth:`ResonanceSolver.gradient`), so no finite difference steps are needed.
+
+        Args:
+            vars (list): geometry and aperture parameters in the order [x, y, z, radius, length, xi].
+
+        Returns:
+            tuple[float, np.ndarray]: objective value and its gradient with respect to vars.
+        """
+        evaluation, gradient = self.evaluate_with_gradient(vars)
+        return evaluation.value, gradient.copy()
+
+    def evaluate_with_gradient(self, vars) -> tuple:
+        """Like `objective_and_gradient`, but with resonance frequency, Q factor and peak area of the design.
+
+        Repeated evaluations of the same parameters are answered from the objective cache of the process.
+
+        Args:
+            vars (list): geometry and aperture parameters in the order [x, y, z, radius, length, xi].
+
+        Returns:
+            tuple[ObjectiveEvaluation, np.ndarray]: evaluation and gradient of its value with respect to vars.
+        """
+        evaluation, gradient = self._memoized('gradient', vars, lambda: self._evaluate_with_gradient(vars))
+        if self.trace is not None:
+            self._trace_evaluation(KIND_GRADIENT, vars, evaluation)
+        return evaluation, gradient
+
+    def _evaluate_with_gradient(self, vars):
+        """Solves one design grid-free and differentiates the objective, see `objective_and_gradient`."""
+        x, y, z, radius, length, xi = vars
+        f_target = self.f_target
+        q_target = self.q_target
+
+        solver = self.create_solver(vars)
+        medium = solver.sim_params.medium
+        f_res, peak_area, _, _, q_factor = solver.solve()
+        if q_factor is None:
+            return ObjectiveEvaluation(np.inf, f_res, None, peak_area), np.zeros(len(vars))
+        gradients = solver.gradient()
+
+        # derivatives with respect to (volume, radius, length, xi) -> (x, y, z, radius, length, xi)
+        chain = np.zeros((4, 6))
+        chain[0, :3] = [y * z, x * z, x * y]
+        chain[1:, 3:] = np.eye(3)
+        d_f = gradients['f_resonance'] @ chain
+        d_peak = gradients['peak_absorbtion_area'] @ chain
+        d_q = gradients['q_factor'] @ chain
+
+        # normalized peak area: peak_area / (2 lambda^2 / (2 pi)) = pi f^2 peak_area / c^2
+        c = medium.c
+        peak_area_norm = np.pi * f_res**2 * peak_area / c**2
+        d_peak_norm = np.pi / c**2 * (f_res**2 * d_peak + 2 * f_res * peak_area * d_f)
+
+        f_log_error = np.log10(f_res / f_target)
+        f_penalty = np.abs(f_log_error) * self.f_weight
+        d_f_penalty = self.f_weight * np.sign(f_log_error) / (f_res * np.log(10)) * d_f
+
+        q_rel_error = (q_factor - q_target) / q_target
+        q_penalty = q_rel_error**2 * self.q_weight
+        d_q_penalty = 2 * self.q_weight * q_rel_error / q_target * d_q
+
+        value = -peak_area_norm + f_penalty + q_penalty
+        return (ObjectiveEvaluation(value, f_res, q_factor, peak_area),
+                -d_peak_norm + d_f_penalty + d_q_penalty)
+
+    def batch_objective(self, population):
+        """Evaluates `objective` for a whole population of designs in one vectorized simulation.
+
+        All designs share the frequency grid of `objective`, so every entry equals the scalar result.
+
+        Args:
+            population (array_like): designs of shape (N, 6), each in the order [x, y, z, radius, length, xi].
+
+        Returns:
+            np.ndarray: penalized peak values of shape (N,), np.inf where the Q factor cannot be determined.
+        """
+        x, y, z, radius, length, xi = np.asarray(population, dtype=float).T
+        f_target = self.f_target
+        q_target = self.q_target
+
+        medium = get_medium()
+        freq_range = self.objective_freq_range()
+        sim_params = FastSimulationParameters(medium=medium, freq_range=freq_range,
+                                              values_per_octave=self.values_per_octave, trusted=True)
+        batch = BatchSimulation(
+            sim_params,
+            volume=x*y*z,
+            area=np.pi*radius**2,
+            length=length,
+            radius=radius,
+            inner_end_correction=TUBE_END_CORRECTION['open']*radius,
+            outer_end_correction=TUBE_END_CORRECTION['flange']*radius,
+            xi=xi,
+        )
+        batch.calc_all()
+        f_res, peak_area, q_factor = batch.f_resonance, batch.peak_absorbtion_area, batch.q_factor
+
+        # same normalization and penalties as in objective
+        max_area = 2 * (medium.c / f_res)**2 / (2*np.pi)
+        peak_area_norm = peak_area / max_area
+        f_penalty = np.abs(np.log10(f_res / f_target)) * self.f_weight
+        q_penalty = ((q_factor - q_target) / q_target)**2 * self.q_weight
+        values = -peak_area_norm + f_penalty + q_penalty
+        return np.where(np.isnan(q_factor), np.inf, values)
+
+    def search_global(self, popsize=15, maxiter=100, seed=None, polish=True):
+        """Searches the optimal parameters with a vectorized differential evolution.
+
+        Every generation is evaluated with a single `batch_objective` call, so a whole population is
+        simulated at once on one core instead of running independent local optimizations in parallel.
+
+        Args:
+            popsize (int): population size multiplier, the population has popsize * 6 members.
+            maxiter (int): maximum number of generations.
+            seed (int, optional): seed of the random number generator.
+            polish (bool): if True, the best member is refined by `run_single_optimization` and the
+                refined design is kept if its `objective` is lower.
+
+        Returns:
+            OptimizeResult: best result with the same fields as a result of `run_single_optimization`.
+        """
+        self.bounds = list(self.default_bounds)
+
+        result = differential_evolution(
+            lambda population: self.batch_objective(population.T),
+            self.bounds,
+            popsize=popsize,
+            maxiter=maxiter,
+            seed=seed,
+            polish=False,
+            updating='deferred',
+            vectorized=True,
+        )
+
+        if polish:
+            local = self.run_single_optimization(result.x)
+            if local is not None and local.success:
+                local_fun = self.objective(local.x)
+                if local_fun < result.fun:
+                    result.x, result.fun = local.x, local_fun
+                    result.nfev += local.nfev
+                    result.message += " Polished with SLSQP."
+
+        self.best_result = result
+        self.best_results = [result]
+        return self.best_result
+
+    def search_atlas(self, atlas, k=30, polish=1):
+        """Finds a design from a precomputed :class:`calculation.design_atlas.DesignAtlas`.
+
+        The `k` atlas designs nearest to the target in (log f, log Q) are ranked with
+        `objective_and_gradient`. The best `polish` of them are used as warm starts for
+        `run_single_optimization`, so no cold multi-start search is needed. Every polish costs a full
+        local optimization, by default only the best design is refined to keep the lookup fast.
+
+        Args:
+            atlas (DesignAtlas): atlas built for the bounds of the search.
+            k (int): number of nearest atlas designs to rank.
+            polish (int): number of ranked designs refined by a local optimization, 0 returns the best
+                atlas design as it is.
+
+        Returns:
+            OptimizeResult: best result with the same fields as a result of `run_single_optimization`.
+        """
+        self.bounds = list(atlas.bounds)
+        candidates = atlas.nearest_designs(self.f_target, self.q_target, k)
+        values = [self.objective_and_gradient(design)[0] for design in candidates]
+        order = np.argsort(values)
+
+        results = [OptimizeResult(x=candidates[i], fun=values[i], success=True, nfev=len(candidates),
+                                  message="Nearest atlas design") for i in order[:1]]
+        for i in order[:polish]:
+            res = self.run_single_optimization(candidates[i])
+            if res and res.success:
+                results.append(res)
+
+        self.best_results = self.deduplicate_results(results)
+        self.best_result = self.best_results[0]
+        return self.best_result
+
+    def search_surrogate(self, num_initial=64, num_rounds=4, points_per_round=8, num_candidates=4096,
+                         num_starts=4, seed=None):
+        """Searches the optimal parameters with a surrogate model, so only promising designs are simulated.
+
+        A :class:`calculation.surrogate.SurrogateModel` is trained on the simulations of `num_initial`
+        designs of `generate_initial_design`. In each of `num_rounds` rounds, `num_candidates` space-filling
+        designs and all simulated designs are screened on the surrogate. The `points_per_round` best
+        distinct ones are refined by SLSQP on the surrogate, then simulated, and the surrogate is trained
+        again. Finally the `num_starts` best simulated designs are refined by `run_single_optimization`.
+
+        Simulations (objective evaluations, including those of the local optimizations) are counted in
+        `num_true_evaluations`, surrogate predictions in `num_surrogate_evaluations`.
+
+        Args:
+            num_initial (int): number of simulated designs of the initial training set.
+            num_rounds (int): number of rounds that propose new designs.
+            points_per_round (int): number of designs simulated per round.
+            num_candidates (int): number of designs screened on the surrogate per round.
+            num_starts (int): number of local optimizations from the best simulated designs.
+            seed (int, optional): seed of the initial design and the candidates.
+
+        Returns:
+            OptimizeResult: best result with the same fields as a result of `run_single_optimization`.
+        """
+        self.bounds = list(self.default_bounds)
+        surrogate = SurrogateModel(self.bounds)
+        sampler = qmc.Sobol(d=len(self.bounds), seed=seed)
+
+        designs = [np.array(x) for x in self.generate_initial_design(num_initial, seed=seed)]
+        evaluations = [self._simulate(x) for x in designs]
+        for _ in range(num_rounds):
+            surrogate.fit(designs, *self._surrogate_targets(evaluations))
+            simulated = surrogate.to_unit(designs)
+            candidates = np.vstack((sampler.random(num_candidates), simulated))
+            values = self.penalized_value(*surrogate.predict_unit(candidates))
+
+            proposals = []
+            for i in np.argsort(values):
+                if len(proposals) == points_per_round:
+                    break
+                # refine distinct candidates, at most one per basin
+                if any(np.linalg.norm(candidates[i] - p) < 0.1 for p in proposals):
+                    continue
+                res = minimize(lambda u: self.penalized_value(*surrogate.predict_unit(u))[0], candidates[i],
+                               method='SLSQP', bounds=[(0., 1.)] * len(self.bounds),
+                               options={'maxiter': 50, 'disp': False})
+                point = np.clip(res.x, 0., 1.)
+                # simulated designs are already known, the interpolation needs distinct nodes
+                if np.min(np.linalg.norm(simulated - point, axis=1)) > 1e-6:
+                    proposals.append(point)
+            for point in proposals:
+                x = surrogate.from_unit(point)
+                designs.append(x)
+                evaluations.append(self._simulate(x))
+
+        values = np.array([evaluation.value for evaluation in evaluations])
+        order = np.argsort(values)
+        results = [OptimizeResult(x=designs[order[0]], fun=values[order[0]], success=True, nfev=len(designs),
+                                  message="Best simulated design of the surrogate search")]
+        num_true_evaluations = len(designs)
+        for i in order[:num_starts]:
+            res = self.run_single_optimization(designs[i])
+            if res:
+                num_true_evaluations += res.evaluations
+                if res.success:
+                    results.append(res)
+
+        self.num_true_evaluations = num_true_evaluations
+        self.num_surrogate_evaluations = surrogate.num_predictions
+        self.best_results = self.deduplicate_results(results)
+        self.best_result = self.best_results[0]
+        print(f"Surrogate search: {self.num_true_evaluations} simulations, "
+              f"{self.num_surrogate_evaluations} surrogate evaluations")
+        return self.best_result
+
+    def _simulate(self, x):
+        """Evaluates the objective of the search mode, grid-free with `use_gradient`."""
+        if self.use_gradient:
+            return self.evaluate_with_gradient(x)[0]
+        return self.evaluate(x)
+
+    def _surrogate_targets(self, evaluations):
+        """Resonance frequency, Q factor (NaN if not available) and normalized peak area of evaluations."""
+        f_res = np.array([e.f_resonance for e in evaluations], dtype=float)
+        q_factor = np.array([np.nan if e.q_factor is None else e.q_factor for e in evaluations], dtype=float)
+        peak_area = np.array([e.peak_absorbtion_area for e in evaluations], dtype=float)
+        return f_res, q_factor, self.peak_area_norm(f_res, peak_area)
+
+    def run_single_optimization(self, x0, budget=None):
         """tries to optimize the target parameters within the objective function
 
+        In multi-fidelity mode SLSQP first runs on the coarse grid with the loose tolerance `coarse_ftol`,
+        then polishes the coarse optimum with at most `polish_maxiter` iterations at full resolution (see
+        `_run_multi_fidelity_optimization`).
+
         Args:
             x0 (np.array): initial parameters
-            bounds (list): value boundaries for each parameter
-            f_target (float): target frequency
-            q_target (float): target q-factor
+            budget (SearchBudget, optional): evaluations and time available. When it runs out, the
+                optimization stops and returns the best design it evaluated (`budget_exhausted` is True).
 
         Returns:
-            np.array: optimal parameters, None when optimization failed
+            OptimizeResult: result of the local optimization with the objective cache hits and misses
+            (`cache_hits`, `cache_misses`), the number of objective evaluations (`evaluations`, of which
+            `coarse_evaluations` on the coarse grid in multi-fidelity mode) and `budget_exhausted`, None
+            when optimization failed
         """
+        hits, misses = get_objective_cache().thread_counts()
+        writer = get_trace_writer(self.trace) if self.trace is not None else None
+        if writer is not None:
+            writer.new_start()
+        if self.eliminate_volume:
+            fun, jac = self.objective_reduced_and_gradient, True
+        elif self.use_gradient:
+            fun, jac = self.objective_and_gradient, True
+        else:
+            fun, jac = self.objective, None
+        budget = budget if budget is not None else SearchBudget()
+        tracked = budget.track(fun)
+        coarse = budget.track(self.objective_coarse) if self.multi_fidelity else None
         try:
-            res = minimize(
-                self.objective,
-                x0,
-                method='SLSQP',
-                # method='trust-constr',
-                bounds=self.bounds,
-                options={'maxiter' : 100, 'disp' : False}
-            )
-            return res
+            if self.eliminate_volume:
+                res = self._run_reduced_optimization(x0, tracked)
+            elif self.multi_fidelity:
+                res = self._run_multi_fidelity_optimization(x0, coarse, tracked)
+            else:
+                res = minimize(
+                    tracked,
+                    x0,
+                    method='SLSQP',
+                    # method='trust-constr',
+                    jac=jac,
+                    bounds=self.bounds,
+                    options={'maxiter' : 100, 'disp' : False}
+                )
+            res.budget_exhausted = False
+        except BudgetExhausted:
+            # stopped in the coarse phase, its best design is reported with its coarse objective value
+            res = self._budget_result(tracked if coarse is None or tracked.best_x is not None else coarse)
+            if res is None:
+                return None
         except Exception as e:
             return None
-        
+        finally:
+            if writer is not None:
+                writer.flush()
+        res.evaluations = tracked.evaluations + (coarse.evaluations if coarse is not None else 0)
+        if coarse is not None:
+            res.coarse_evaluations = coarse.evaluations
+        # objective cache lookups of this optimization
+        total_hits, total_misses = get_objective_cache().thread_counts()
+        res.cache_hits, res.cache_misses = total_hits - hits, total_misses - misses
+        return res
+
+    def _budget_result(self, tracked):
+        """Anytime result of a local optimization stopped by its budget, None before the first evaluation."""
+        if tracked.best_x is None:
+            return None
+        x = self.expand_reduced(tracked.best_x)[0] if self.eliminate_volume else tracked.best_x
+        return OptimizeResult(x=x, fun=tracked.best_fun, success=bool(np.isfinite(tracked.best_fun)), nit=0,
+                              nfev=tracked.evaluations, budget_exhausted=True,
+                              message="Budget exhausted, best design evaluated so far")
+
+    def run_budgeted_starts(self, initial_guesses, budget):
+        """Runs local optimizations one after another until the budget is used up.
+
+        Args:
+            initial_guesses (list): initial values of the starts.
+            budget (SearchBudget): evaluations and time available to all starts together.
+
+        Returns:
+            tuple[list, int]: results of the starts that were run (see `run_single_optimization`), in the
+            order of `initial_guesses`, and the number of objective evaluations. Starts that did not begin
+            before the budget ran out are omitted.
+        """
+        results = []
+        for x0 in initial_guesses:
+            if budget.exhausted():
+                break
+            results.append(self.run_single_optimization(x0, budget))
+        return results, budget.evaluations
+
+    @staticmethod
+    def grid_rel_step(values_per_octave) -> float:
+        """Relative finite difference step for the grid objective: half the spacing of the grid.
+
+        The resonance frequency of the grid objective is piecewise constant, steps much smaller than the
+        grid spacing do not see the frequency penalty change.
+
+        Args:
+            values_per_octave (int): resolution of the frequency grid.
+
+        Returns:
+            float: relative step of `scipy.optimize.approx_derivative`.
+        """
+        return 0.5 * (2 ** (1 / values_per_octave) - 1)
+
+    def _run_multi_fidelity_optimization(self, x0, coarse, fine):
+        """Runs SLSQP on the coarse grid and polishes its optimum with a few iterations at full resolution."""
+        res_coarse = minimize(coarse, x0, method='SLSQP', bounds=self.bounds,
+                              options={'maxiter': 100, 'ftol': self.coarse_ftol, 'disp': False, 'eps': None,
+                                       'finite_diff_rel_step': self.grid_rel_step(self.coarse_values_per_octave)})
+        res = minimize(fine, res_coarse.x, method='SLSQP', bounds=self.bounds,
+                       options={'maxiter': self.polish_maxiter, 'disp': False, 'eps': None,
+                                'finite_diff_rel_step': self.grid_rel_step(self.values_per_octave)})
+        if res.status == 9:
+            # the polish stops at its iteration limit by design
+            res.success = bool(np.isfinite(res.fun))
+            res.message = "Polished at full resolution"
+        res.coarse_nit, res.coarse_nfev = res_coarse.nit, res_coarse.nfev
+        return res
+
+    def check_full_resolution(self, result) -> dict:
+        """Compares f_res and Q of a result with the full-resolution simulation of `create_default_sim`.
+
+        Args:
+            result (OptimizeResult): result with the parameters x.
+
+        Returns:
+            dict: f_resonance and q_factor of the objective grid, default_f_resonance and default_q_factor
+            of `create_default_sim`, and `consistent`, True if both agree within `full_resolution_rtol`.
+        """
+        evaluation = self.evaluate(result.x)
+        sim = self.create_default_sim(result)
+        default_f_res, _ = sim.calc_resonance_frequency_and_peak_area()
+        default_q = sim.calc_q_factor()
+        consistent = np.isclose(evaluation.f_resonance, default_f_res, rtol=self.full_resolution_rtol, atol=0.)
+        if evaluation.q_factor is None or default_q is None:
+            consistent &= evaluation.q_factor is None and default_q is None
+        else:
+            consistent &= np.isclose(evaluation.q_factor, default_q, rtol=self.full_resolution_rtol, atol=0.)
+        return {"f_resonance": evaluation.f_resonance, "q_factor": evaluation.q_factor,
+                "default_f_resonance": default_f_res, "default_q_factor": default_q, "consistent": bool(consistent)}
+
+    def _run_reduced_optimization(self, x0, fun):
+        """Runs SLSQP on the reduced search space, the bounds of z become inequality constraints."""
+        z_low, z_high = self.bounds[2]
+        constraints = [
+            {'type': 'ineq', 'fun': lambda r: self.expand_reduced(r)[0][2] - z_low,
+             'jac': lambda r: self.expand_reduced(r)[1]},
+            {'type': 'ineq', 'fun': lambda r: z_high - self.expand_reduced(r)[0][2],
+             'jac': lambda r: -self.expand_reduced(r)[1]},
+        ]
+        res = minimize(
+            fun,
+            np.delete(np.asarray(x0, dtype=float), 2),
+            method='SLSQP',
+            jac=True,
+            bounds=[bound for i, bound in enumerate(self.bounds) if i != 2],
+            constraints=constraints,
+            options={'maxiter' : 100, 'disp' : False}
+        )
+        # report the complete design like the other modes
+        res.x = self.expand_reduced(res.x)[0]
+        return res
+
     def generate_initial_set(self):
         """Uses f_R approximation function to generate a set of plausible initial values. 
 
         """
-        c = 343 # assume for approximation
-        coeff = c / (2*np.pi)
-
         solve_for = np.random.choice(['x', 'y', 'z', 'radius', 'length'])
 
         x, y, z, radius, length, xi = [np.random.uniform(low, high) for (low, high) in self.bounds]
         xi = 50 # assume a fixed value for xi
 
-        V = x*y*z
-        S = np.pi*radius**2
-
         try:
-            if solve_for == 'x':
-                x = S / (y * z * length * (coeff / self.f_target)**2)
-                x = np.clip(x, self.bounds[0][0], self.bounds[0][1])
-
-            elif solve_for == 'y':
-                y = S / (x * z * length * (coeff / self.f_target)**2)
-                y = np.clip(y, self.bounds[1][0], self.bounds[1][1])
-
-            elif solve_for == 'z':
-                z = S / (x * y * length * (coeff / self.f_target)**2)
-                z = np.clip(z, self.bounds[2][0], self.bounds[2][1])
-
-            elif solve_for == 'radius':
-                S = V * length * (coeff / self.f_target)**2
-                radius = np.sqrt(S / np.pi)
-                radius = np.clip(radius, self.bounds[3][0], self.bounds[3][1]) 
-            elif solve_for == 'length':
-                length = S / (V * (coeff / self.f_target)**2)
-                length = np.clip(length, self.bounds[4][0], self.bounds[4][1])
-        
+            return self.solve_for_target([x, y, z, radius, length, xi], solve_for)
         except Exception as e:
             print(f"Failed to solve for {solve_for}: {e}")
             return None 
-        
+
+    def solve_for_target(self, values, solve_for):
+        """Adjusts one parameter so that the Helmholtz approximation
+
+        .. math::
+
+            f_R = \\frac{c}{2 \\pi} \\sqrt{\\frac{S}{V \\, L}}
+
+        gives the target frequency. The result is clipped to the bounds of the parameter.
+
+        Args:
+            values (list): parameters in the order [x, y, z, radius, length, xi].
+            solve_for (str): 'x', 'y', 'z', 'radius' or 'length'.
+
+        Returns:
+            list: adjusted parameters in the same order.
+        """
+        c = 343 # assume for approximation
+        coeff = c / (2*np.pi)
+
+        x, y, z, radius, length, xi = values
+
+        V = x*y*z
+        S = np.pi*radius**2
+
+        if solve_for == 'x':
+            x = S / (y * z * length * (self.f_target / coeff)**2)
+            x = np.clip(x, self.bounds[0][0], self.bounds[0][1])
+
+        elif solve_for == 'y':
+            y = S / (x * z * length * (self.f_target / coeff)**2)
+            y = np.clip(y, self.bounds[1][0], self.bounds[1][1])
+
+        elif solve_for == 'z':
+            z = S / (x * y * length * (self.f_target / coeff)**2)
+            z = np.clip(z, self.bounds[2][0], self.bounds[2][1])
+
+        elif solve_for == 'radius':
+            S = V * length * (self.f_target / coeff)**2
+            radius = np.sqrt(S / np.pi)
+            radius = np.clip(radius, self.bounds[3][0], self.bounds[3][1]) 
+        elif solve_for == 'length':
+            length = S / (V * (self.f_target / coeff)**2)
+            length = np.clip(length, self.bounds[4][0], self.bounds[4][1])
+        else:
+            raise ValueError(f"Cannot solve for '{solve_for}'.")
+
         return [x, y, z, radius, length, xi]
-    
-    def search_optimal(self):
+
+    def generate_initial_design(self, num_trials, sampling='sobol', informed_fraction=0.5, seed=None):
+        """Generates space-filling initial values over the bounds.
+
+        A scrambled Sobol sequence or a Latin hypercube covers the parameter space more evenly than
+        independent uniform draws, so fewer starts end in the same basin. For `informed_fraction` of the
+        points one parameter (cycling through x, y, z, radius and length) is adjusted with
+        :meth:`solve_for_target`, which biases them towards the target frequency.
+
+        Args:
+            num_trials (int): number of initial values.
+            sampling (str): 'sobol', 'lhs' or 'random'.
+            informed_fraction (float): share of points adjusted by the f_R approximation (0 to 1).
+            seed (int, optional): seed of the random number generator.
+
+        Returns:
+            list: initial values, each in the order [x, y, z, radius, length, xi].
+        """
+        low, high = np.array(self.bounds, dtype=float).T
+        if sampling == 'sobol':
+            # sample a power of two to keep the balance properties of the sequence
+            m = int(np.ceil(np.log2(max(num_trials, 1))))
+            unit = qmc.Sobol(d=len(self.bounds), seed=seed).random_base2(m)[:num_trials]
+        elif sampling == 'lhs':
+            unit = qmc.LatinHypercube(d=len(self.bounds), seed=seed).random(num_trials)
+        elif sampling == 'random':
+            unit = np.random.default_rng(seed).random((num_trials, len(self.bounds)))
+        else:
+            raise ValueError(f"Invalid sampling '{sampling}'. Choose 'sobol', 'lhs' or 'random'.")
+        design = qmc.scale(unit, low, high)
+
+        solve_for = ['x', 'y', 'z', 'radius', 'length']
+        num_informed = int(round(informed_fraction * num_trials))
+        initial_guesses = []
+        for i, values in enumerate(design.tolist()):
+            if i < num_informed:
+                values = [float(v) for v in self.solve_for_target(values, solve_for[i % len(solve_for)])]
+            initial_guesses.append(values)
+        return initial_guesses
+
+    def deduplicate_results(self, results, tol=0.05):
+        """Clusters results that converged to (nearly) the same design and keeps the best of each cluster.
+
+        Designs are compared in coordinates normalized to the bounds, two designs belong to the same
+        cluster if their euclidean distance is at most `tol`.
+
+        Args:
+            results (list): OptimizeResult objects.
+            tol (float): cluster radius in normalized coordinates.
+
+        Returns:
+            list: distinct results, sorted by objective value.
+        """
+        low, high = np.array(self.bounds, dtype=float).T
+        distinct = []
+        centers = []
+        for res in sorted(results, key=lambda r: r.fun):
+            point = (np.asarray(res.x) - low) / (high - low)
+            if centers and np.min(np.linalg.norm(np.array(centers) - point, axis=1)) <= tol:
+                continue
+            distinct.append(res)
+            centers.append(point)
+        return distinct
+
+    def search_optimal(self, num_trials=400, chunksize=None, stop_count=None, stop_tol=1e-3, patience=None,
+                       sampling='sobol', informed_fraction=0.5, dedup_tol=0.05, seed=None, checkpoint=None,
+                       resume=False, checkpoint_interval=60., max_time=None, max_evaluations=None, top_k=None):
         """Call this function to start the optimization process. It will try to find the optimal geometry and aperture parameters that achieve the target resonance frequency and Q factor.
 
+        Runs :meth:`search_stream` to the end, see there for the arguments. By default all successful
+        results are kept for `best_results`.
+
+        Args:
+            top_k (int, optional): number of best results kept, None keeps all.
+
+        Returns:
+            OptimizeResult: best result, None if no start succeeded within the budget.
+
+        Raises:
+            ValueError: if the checkpoint to resume was written for different settings.
         """
+        for _ in self.search_stream(num_trials, chunksize, stop_count, stop_tol, patience, sampling,
+                                    informed_fraction, dedup_tol, seed, checkpoint, resume, checkpoint_interval,
+                                    max_time, max_evaluations, top_k):
+            pass
+        return self.best_result
 
-        # Bounds: [(min, max), ...] per parameter
-        self.bounds = [
-            (0.1, 1.0),  # x
-            (0.1, 1.0),  # y
-            (0.1, 1.0),  # z
-            (0.01, 0.1),  # aperture radius
-            (0.01, 0.3),   # aperture length
-            (1, 5000)
-        ]
+    def search_stream(self, num_trials=400, chunksize=None, stop_count=None, stop_tol=1e-3, patience=None,
+                      sampling='sobol', informed_fraction=0.5, dedup_tol=0.05, seed=None, checkpoint=None,
+                      resume=False, checkpoint_interval=60., max_time=None, max_evaluations=None, top_k=10):
+        """Runs the multi-start search and yields every result that improves on the best one as soon as it is reported.
 
+        Only the `top_k` best results are kept in memory. When the generator is exhausted, `best_results`
+        holds them (deduplicated) and `best_result` the best one. Closing the generator early cancels the
+        pending starts and leaves `best_results` unset.
 
-        results = []
-        
-        num_trials = 400
-        # create initial guesses, half informed, half random     
-        initial_guesses = [self.generate_initial_set() for _ in range(num_trials//2)] # generate estimations for good results
-        initial_guesses = []
-        initial_guesses.extend([list([np.random.uniform(low, high) for (low, high) in self.bounds]) for _ in range(num_trials-len(initial_guesses))]) # append completely random guesses
+        The starts are distributed in chunks over a persistent :class:`calculation.worker_pool.WorkerPool`,
+        so repeated calls reuse the warm workers.
 
-        with ProcessPoolExecutor() as executor:
-            futures = [executor.submit(self.run_single_optimization, x0) for x0 in initial_guesses]
+        With `stop_count` or `patience` the search stops early once it has converged and the pending
+        starts are cancelled. Chunks already running finish in the background, their results are ignored.
+        The number of evaluated starts is stored in `num_starts_used`.
 
-            for future in as_completed(futures):
-                res = future.result()
-                if res and res.success:
-                    results.append(res)
+        With `max_time` or `max_evaluations` the search runs under a
+        :class:`calculation.search_budget.SearchBudget`. Chunks are submitted as workers become free and
+        each one receives the deadline and a share of the remaining evaluations, so the limits hold across
+        all workers. Local optimizations interrupted by the budget contribute the best design they
+        evaluated (anytime result). `stop_reason` tells why the search ended: 'completed', 'converged',
+        'max_time' or 'max_evaluations'.
+
+        In multi-fidelity mode the best design is finally checked against `create_default_sim`, see
+        `check_full_resolution`. The outcome is stored in `full_resolution_check`, a mismatch is warned about.
 
+        Args:
+            num_trials (int): number of initial guesses (local optimizations).
+            chunksize (int, optional): starts per task, see :meth:`WorkerPool.default_chunksize`.
+                With early stopping or a budget at most 10 starts are grouped, so the search can stop in time.
+            stop_count (int, optional): stop when this many distinct successful results (clustered
+                with `dedup_tol`, or 0.05 without deduplication) lie within `stop_tol` of the best
+                objective value. Starts converging to the same design count once.
+            stop_tol (float): relative tolerance (at least absolute for objective values below 1) for
+                `stop_count` and for an improvement in `patience`.
+            patience (int, optional): stop when this many evaluated starts in a row did not improve the
+                best objective value by more than `stop_tol` (plateau).
+            sampling (str): initial design, see :meth:`generate_initial_design`.
+            informed_fraction (float): share of initial values biased by the f_R approximation.
+            dedup_tol (float, optional): cluster radius of :meth:`deduplicate_results` for `best_results`,
+                None keeps all successful results.
+            seed (int, optional): seed of the initial design.
+            checkpoint (str, optional): path of a :class:`calculation.checkpoint.SearchCheckpoint` file
+                (.npz) that stores the initial design and all finished starts.
+            resume (bool): continue from an existing `checkpoint` with the same settings instead of
+                starting over. Only the pending starts are evaluated.
+            checkpoint_interval (float): minimum time between two checkpoint writes in seconds. The
+                checkpoint is always written when the search ends or is interrupted.
+            max_time (float, optional): wall-clock budget in seconds. Running starts stop at the deadline,
+                their anytime results are collected for at most `budget_grace` seconds more.
+            max_evaluations (int, optional): maximum number of objective evaluations of all starts.
+            top_k (int, optional): number of best results kept, None keeps all.
 
-        num_fails = num_trials - len(results)
+        Yields:
+            OptimizeResult: results of local optimizations, each better than all results before.
 
-        self.best_results = sorted(results, key=lambda r: r.fun)
-        self.best_result = self.best_results[0]
+        Raises:
+            ValueError: if the checkpoint to resume was written for different settings.
+        """
+
+        self.bounds = list(self.default_bounds)
+
+        self.num_trials = num_trials
+        self.num_starts_used = 0
+        self.stopped_early = False
+        self.stop_reason = None
+        self.num_evaluations = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.full_resolution_check = None
+
+        state = None
+        if checkpoint is not None:
+            request = json.loads(json.dumps(self.cache_request(
+                num_trials=num_trials, sampling=sampling, informed_fraction=informed_fraction, seed=seed)))
+            if resume and os.path.exists(checkpoint):
+                state = SearchCheckpoint.load(checkpoint)
+                if state.request != request:
+                    raise ValueError(f"Checkpoint '{checkpoint}' was written for different settings.")
+                self.num_starts_used = int(state.done.sum())
+                print(f"Resumed {self.num_starts_used} of {num_trials} starts from {checkpoint}")
+            else:
+                # draw the seed explicitly, so the checkpoint records how the design was created
+                design_seed = seed if seed is not None else np.random.SeedSequence().entropy
+                state = SearchCheckpoint(checkpoint, request, design_seed,
+                    self.generate_initial_design(num_trials, sampling, informed_fraction, design_seed))
+            initial_guesses = state.initial_guesses.tolist()
+            pending = state.pending()
+            results = state.results()
+        else:
+            # create initial guesses, partly informed by the f_R approximation, spread evenly over the bounds
+            initial_guesses = self.generate_initial_design(num_trials, sampling, informed_fraction, seed)
+            pending = np.arange(len(initial_guesses))
+            results = []
+
+        pool = self.pool if self.pool is not None else get_pool()
+        early_stopping = stop_count is not None or patience is not None
+        budget = None
+        if max_time is not None or max_evaluations is not None:
+            budget = SearchBudget.from_limits(max_time, max_evaluations)
+        # without an explicit chunksize every worker first gets a single start, so results arrive early
+        num_single_starts = pool.max_workers if chunksize is None else 0
+        if chunksize is None:
+            chunksize = pool.default_chunksize(len(pending))
+            if early_stopping or budget is not None:
+                chunksize = min(chunksize, 10)
+
+        # starts not submitted yet, with a budget chunks are only submitted to free workers
+        queue = deque(int(i) for i in pending)
+        max_in_flight = 2 * pool.max_workers if budget is not None else np.inf
+        in_flight = {}
+        reserved = 0
+
+        def submit():
+            """Submits queued starts, returns True if a chunk was submitted."""
+            nonlocal reserved, num_single_starts
+            submitted = False
+            while queue and len(in_flight) < max_in_flight:
+                if budget is not None and budget.out_of_time():
+                    break
+                size = 1 if num_single_starts > 0 else chunksize
+                num_single_starts -= 1
+                indices = [queue.popleft() for _ in range(min(size, len(queue)))]
+                guesses = [initial_guesses[i] for i in indices]
+                allowance = None
+                if budget is None:
+                    (future,) = pool.submit_chunks(self.run_single_optimization, guesses, chunksize=len(guesses))
+                else:
+                    if budget.max_evaluations is not None:
+                        # evaluations not promised to running chunks, split among the free workers
+                        unreserved = budget.remaining_evaluations() - reserved
+                        allowance = -(-unreserved // (max_in_flight - len(in_flight)))
+                        if allowance <= 0:
+                            queue.extendleft(reversed(indices))
+                            break
+                        reserved += allowance
+                    future = pool.submit(self.run_budgeted_starts, guesses, budget.share(allowance))
+                in_flight[future] = (indices, allowance)
+                submitted = True
+            return submitted
+
+        # the best `top_k` results as a max-heap on the objective value, the worst result on top
+        kept = []
+        counter = itertools.count()
+
+        def keep(res):
+            entry = (-res.fun, next(counter), res)
+            if top_k is None or len(kept) < top_k:
+                heapq.heappush(kept, entry)
+            else:
+                heapq.heappushpop(kept, entry)
+
+        for res in results:
+            keep(res)
+        num_successful = len(results)
+        best_fun = min((res.fun for res in results), default=np.inf)
+        since_improvement = 0
+        last_save = time.monotonic()
+        budget_exhausted = False
+
+        submit()
+        completed = None
+        try:
+            while in_flight:
+                if completed is None:
+                    timeout = None
+                    if budget is not None and budget.deadline is not None:
+                        timeout = max(budget.deadline + self.budget_grace - time.time(), 0.)
+                    completed = pool.as_completed(list(in_flight), timeout=timeout)
+                try:
+                    future = next(completed)
+                except TimeoutError:
+                    self.stop_reason = 'max_time'
+                    break
+                indices, allowance = in_flight.pop(future)
+                chunk_results = future.result()
+                if budget is not None:
+                    chunk_results, evaluations = chunk_results
+                    budget.evaluations += evaluations
+                    reserved -= allowance or 0
+                    # starts that did not begin before the budget of the chunk ran out stay pending
+                    queue.extendleft(reversed(indices[len(chunk_results):]))
+
+                for index, res in zip(indices, chunk_results):
+                    self.num_starts_used += 1
+                    since_improvement += 1
+                    if state is not None:
+                        state.record(index, res)
+                    if res:
+                        self.cache_hits += res.cache_hits
+                        self.cache_misses += res.cache_misses
+                        self.num_evaluations += res.evaluations
+                        budget_exhausted |= res.budget_exhausted
+                    if res and res.success:
+                        keep(res)
+                        num_successful += 1
+                        improved = res.fun < best_fun
+                        if res.fun < best_fun - stop_tol * max(1., abs(best_fun)):
+                            since_improvement = 0
+                        best_fun = min(best_fun, res.fun)
+                        if improved:
+                            yield res
+
+                if state is not None and time.monotonic() - last_save >= checkpoint_interval:
+                    state.save()
+                    last_save = time.monotonic()
+
+                if early_stopping and self._converged([entry[2] for entry in kept], best_fun,
+                                                       since_improvement, stop_count, stop_tol, patience,
+                                                       dedup_tol):
+                    self.stop_reason = 'converged'
+                    break
+                if submit():
+                    completed = None
+        finally:
+            # chunks already running finish in the background, their results are ignored
+            for pending_future in in_flight:
+                pending_future.cancel()
+            if state is not None:
+                state.save()
+
+        if self.stop_reason is None:
+            if budget is not None and (queue or budget_exhausted):
+                self.stop_reason = 'max_time' if budget.out_of_time() else 'max_evaluations'
+            else:
+                self.stop_reason = 'completed'
+        self.stopped_early = self.stop_reason != 'completed'
+
+        num_fails = self.num_starts_used - num_successful
+
+        results = [entry[2] for entry in kept]
+        if dedup_tol is None:
+            self.best_results = sorted(results, key=lambda r: r.fun)
+        else:
+            self.best_results = self.deduplicate_results(results, dedup_tol)
+        self.best_result = self.best_results[0] if self.best_results else None
+        if self.multi_fidelity and self.best_result is not None:
+            self.full_resolution_check = self.check_full_resolution(self.best_result)
+            if not self.full_resolution_check["consistent"]:
+                warnings.warn(f"f_res and Q of the best design differ from its full-resolution simulation: "
+                              f"{self.full_resolution_check}")
 
         
-        print(f"{num_fails} of {num_trials} inital guesses failed")
+        print(f"Used {self.num_starts_used} of {num_trials} inital guesses, {num_fails} failed")
+        lookups = self.cache_hits + self.cache_misses
+        if lookups:
+            print(f"Objective cache: {self.cache_hits} of {lookups} evaluations reused ({self.cache_hits / lookups:.1%})")
         return self.best_result
+
+    def _converged(self, results, best_fun, since_improvement, stop_count, stop_tol, patience, dedup_tol=0.05):
+        """Checks the stopping criteria of `search_optimal`."""
+        if patience is not None and results and since_improvement >= patience:
+            return True
+        if stop_count is not None:
+            limit = best_fun + stop_tol * max(1., abs(best_fun))
+            near_best = [res for res in results if res.fun <= limit]
+            if len(near_best) < stop_count:
+                return False
+            distinct = self.deduplicate_results(near_best, dedup_tol if dedup_tol is not None else 0.05)
+            return len(distinct) >= stop_count
+        return False
     
     def create_default_sim(self, result) -> Simulation:
         """Generates a simulation object from the return value of scipy.optimize.minimize
@@ -0,0 +1,429 @@
+import math
+import numpy as np
+from scipy.optimize import brentq
+from .resonator import Resonator
+
+
+class ResonanceSolver():
+    """
+    Solves the lumped resonator model for resonance frequency, peak absorption area and Q-factor
+    without evaluating a frequency grid.
+
+    The impedances used in :class:`calculation.simulation.Simulation` reduce to a handful of scalar
+    coefficients. With :math:`\\omega = 2 \\pi f` the absorption area becomes
+
+    .. math::
+
+        A(\\omega) = \\frac{K \\, R(\\omega)}{\\bigl(R(\\omega) + a\\,\\omega^2\\bigr)^2
+                     + \\bigl(m\\,\\omega - s / \\omega\\bigr)^2}
+
+    where:
+
+    - :math:`R = Z_{\\text{porous}} + Z_{\\text{friction}}` real resistance, the friction part vanishes
+      above the cutoff :math:`f_c = 0.2 \\, c / (2 \\pi r)`
+    - :math:`a = \\rho \\, \\alpha \\, r^2 / c` radiation resistance coefficient
+    - :math:`m = \\rho \\, \\bigl((L + \\Delta L) / S + \\delta\\bigr)` mass coefficient (including radiation mass)
+    - :math:`s = \\rho \\, c^2 / V` stiffness coefficient
+    - :math:`K = 4 \\rho c` (diffuse) or :math:`2 \\rho c / \\cos\\theta`
+
+    For constant :math:`R` the peak is the unique positive root of the cubic
+
+    .. math::
+
+        4 a^2 u^3 + (4 a R + 2 m^2) u^2 - 2 s^2 = 0, \\quad u = \\omega^2
+
+    and the -3 dB points are found by bracketed root finding on both monotone flanks.
+    The friction cutoff splits the frequency range into two such segments.
+
+    Because all results are roots of smooth scalar equations, their derivatives follow from implicit
+    differentiation, see :meth:`gradient`.
+
+    Attributes:
+        resonator (Resonator): The Helmholtz resonator configuration.
+        sim_params (SimulationParameters): Frequency range and medium parameters.
+        f_resonance (float): Resonance frequency (Hz).
+        peak_absorbtion_area (float): Absorption area at resonance (m²).
+        f_q_low (float): Lower -3 dB frequency (Hz).
+        f_q_high (float): Upper -3 dB frequency (Hz).
+        q_factor (float): Q-factor, None if the -3 dB points are not inside the frequency range.
+    """
+
+    xtol = 1e-12
+
+    # design variables of gradient(), in this order
+    GRADIENT_VARIABLES = ('volume', 'radius', 'length', 'xi')
+    # lumped model coefficients, in the order used for the partial derivatives
+    COEFFICIENTS = ('r_porous', 'r_friction', 'a_radiation', 'mass', 'stiffness', 'gain', 'f_cutoff')
+
+    def __init__(self, resonator: Resonator, sim_params):
+        """
+        Initialize the solver and derive the lumped model coefficients.
+
+        Args:
+            resonator (Resonator): The Helmholtz resonator object.
+            sim_params (SimulationParameters): Frequency range & medium configuration.
+                Only ``freq_range``, ``medium``, ``assume_diffuse`` and ``angle_of_incidence`` are used.
+        """
+        self.resonator = resonator
+        self.sim_params = sim_params
+
+        self.f_resonance = None
+        self.peak_absorbtion_area = None
+        self.f_q_low = None
+        self.f_q_high = None
+        self.q_factor = None
+
+        self.calc_coefficients()
+
+    def calc_coefficients(self):
+        """
+        Computes the scalar coefficients of the lumped model from resonator and medium.
+        """
+        ap = self.resonator.aperture
+        med = self.sim_params.medium
+        rho = med.density
+        c = med.c
+        r = ap.radius
+        S = ap.area
+        l_ap = ap.length
+
+        if ap.outer_ending == 'open':
+            alpha = 1 / (4*math.pi)
+        elif ap.outer_ending == 'flange':
+            alpha = 1 / (2*math.pi)
+        else:
+            raise ValueError("Invalid outer ending. Choose 'open' or 'flange'.")
+
+        self.r_porous = ap.xi * l_ap / S if ap.additional_dampening else 0.0
+        self.r_friction = 8 * med.kinematic_viscosity * rho / r**2 * l_ap / S
+        self.f_cutoff = 0.2 * c / (2 * math.pi * r)
+        self.a_radiation = rho * alpha * r**2 / c
+        self.mass = rho * (l_ap + ap.inner_end_correction + ap.outer_end_correction) / S \
+            + rho * ap.outer_end_correction
+        self.stiffness = rho * c**2 / self.resonator.geometry.volume
+
+        if self.sim_params.assume_diffuse:
+            self.gain = 4 * rho * c
+        else:
+            self.gain = 2 * rho * c / math.cos(self.sim_params.angle_of_incidence)
+
+    def resistance(self, f: float) -> float:
+        """
+        Returns the real part of the resonator impedance at frequency f.
+
+        Args:
+            f (float): Frequency (Hz).
+
+        Returns:
+            float: Resistance (Pa·s/m).
+        """
+        if f < self.f_cutoff:
+            return self.r_porous + self.r_friction
+        return self.r_porous
+
+    def absorbtion_area_at(self, f: float, resistance: float = None) -> float:
+        """
+        Evaluates the absorption area at a single frequency.
+
+        Args:
+            f (float): Frequency (Hz).
+            resistance (float, optional): Fixed resistance instead of the one at f.
+
+        Returns:
+            float: Absorption area (m²).
+        """
+        R = self.resistance(f) if resistance is None else resistance
+        omega = 2 * math.pi * f
+        re = R + self.a_radiation * omega**2
+        im = self.mass * omega - self.stiffness / omega
+        return self.gain * R / (re**2 + im**2)
+
+    def stationary_frequency(self, resistance: float) -> float:
+        """
+        Returns the frequency of maximum absorption for a constant resistance.
+
+        Args:
+            resistance (float): Resistance (Pa·s/m).
+
+        Returns:
+            float: Frequency (Hz) of the unique maximum of A(f).
+        """
+        a, m, s = self.a_radiation, self.mass, self.stiffness
+        c3 = 4 * a**2
+        c2 = 4 * a * resistance + 2 * m**2
+        c0 = -2 * s**2
+        u_high = s / m
+        u = brentq(lambda u: (c3 * u + c2) * u**2 + c0, 0.0, u_high, xtol=self.xtol * u_high)
+        return math.sqrt(u) / (2 * math.pi)
+
+    def segments(self):
+        """
+        Splits the frequency range at the friction cutoff.
+
+        Returns:
+            list[tuple[float, float, float]]: (f_low, f_high, resistance) per segment.
+        """
+        f_min, f_max = self.sim_params.freq_range
+        f_c = self.f_cutoff
+        if f_c <= f_min:
+            return [(f_min, f_max, self.r_porous)]
+        if f_c >= f_max:
+            return [(f_min, f_max, self.r_porous + self.r_friction)]
+        return [(f_min, f_c, self.r_porous + self.r_friction), (f_c, f_max, self.r_porous)]
+
+    def calc_resonance_frequency_and_peak_area(self) -> tuple:
+        """
+        Determines the resonance frequency and peak absorption area.
+
+        Returns:
+            tuple[float, float]: (f_resonance in Hz, peak_absorption_area in m²)
+        """
+        best = (None, -math.inf, None)
+        for segment in self.segments():
+            f_low, f_high, R = segment
+            f_peak = min(max(self.stationary_frequency(R), f_low), f_high)
+            area = self.absorbtion_area_at(f_peak, R)
+            if area > best[1]:
+                best = (f_peak, area, segment)
+
+        self.f_resonance, self.peak_absorbtion_area, self._peak_segment = best
+        return (self.f_resonance, self.peak_absorbtion_area)
+
+    def calc_q_factor(self) -> float:
+        """
+        Calculates the Q-factor from the -3 dB points.
+
+        Like :meth:`Simulation.calc_q_factor` the first two crossings of the half peak level
+        (from low to high frequencies) are used. A crossing caused by the jump at the friction
+        cutoff is placed at the cutoff frequency.
+
+        Returns:
+            float: Q-factor, or None if fewer than two crossings lie inside the frequency range.
+        """
+        if self.f_resonance is None:
+            self.calc_resonance_frequency_and_peak_area()
+
+        half_peak = self.peak_absorbtion_area / 2
+        crossings = []
+        previous = None
+
+        for f_low, f_high, R in self.segments():
+            def g(f):
+                return self.absorbtion_area_at(f, R) - half_peak
+
+            # a sign change across the cutoff discontinuity counts as crossing
+            if previous is not None and (previous < 0) != (g(f_low) < 0):
+                crossings.append(f_low)
+
+            f_peak = self.stationary_frequency(R)
+            bounds = [f_low] + ([f_peak] if f_low < f_peak < f_high else []) + [f_high]
+            for f_a, f_b in zip(bounds[:-1], bounds[1:]):
+                g_a, g_b = g(f_a), g(f_b)
+                if (g_a < 0) != (g_b < 0):
+                    crossings.append(brentq(g, f_a, f_b, xtol=self.xtol * f_b))
+            previous = g(f_high)
+
+        if len(crossings) < 2:
+            return None
+
+        self.f_q_low, self.f_q_high = crossings[0], crossings[1]
+        self.q_factor = self.f_resonance / (self.f_q_high - self.f_q_low)
+        return self.q_factor
+
+    def coefficient_jacobian(self) -> np.ndarray:
+        """
+        Returns the derivatives of the lumped model coefficients with respect to the design variables.
+
+        Only tube apertures are supported, their end corrections are proportional to the radius.
+
+        Returns:
+            np.ndarray: Matrix of shape (len(COEFFICIENTS), len(GRADIENT_VARIABLES)).
+
+        Raises:
+            ValueError: If the aperture is not a tube.
+        """
+        ap = self.resonator.aperture
+        if ap.form != 'tube':
+            raise ValueError("Gradients are only available for tube apertures.")
+        rho = self.sim_params.medium.density
+        r, l_ap, S = ap.radius, ap.length, ap.area
+        corrections = ap.inner_end_correction + ap.outer_end_correction
+
+        jac = np.zeros((len(self.COEFFICIENTS), len(self.GRADIENT_VARIABLES)))
+        # columns: volume, radius, length, xi
+        if ap.additional_dampening:
+            jac[0] = [0.0, -2 * self.r_porous / r, ap.xi / S, l_ap / S]
+        jac[1] = [0.0, -4 * self.r_friction / r, self.r_friction / l_ap, 0.0]
+        jac[2] = [0.0, 2 * self.a_radiation / r, 0.0, 0.0]
+        jac[3] = [0.0,
+                  rho * corrections / (r * S) - 2 * rho * (l_ap + corrections) / (S * r) + rho * ap.outer_end_correction / r,
+                  rho / S, 0.0]
+        jac[4] = [-self.stiffness / self.resonator.geometry.volume, 0.0, 0.0, 0.0]
+        jac[6] = [0.0, -self.f_cutoff / r, 0.0, 0.0]
+        return jac
+
+    def _area_partials(self, f: float, below_cutoff: bool) -> tuple:
+        """
+        Returns the partial derivatives of the absorption area at a fixed frequency.
+
+        Args:
+            f (float): Frequency (Hz).
+            below_cutoff (bool): Whether the friction resistance applies.
+
+        Returns:
+            tuple[np.ndarray, float]: (dA/d coefficients, dA/df)
+        """
+        R = self.r_porous + (self.r_friction if below_cutoff else 0.0)
+        a, m, s, K = self.a_radiation, self.mass, self.stiffness, self.gain
+        omega = 2 * math.pi * f
+        re = R + a * omega**2
+        im = m * omega - s / omega
+        D = re**2 + im**2
+        scale = K * R / D**2
+
+        dA_dR = K / D - scale * 2 * re
+        partials = np.array([
+            dA_dR,
+            dA_dR if below_cutoff else 0.0,
+            -scale * 2 * re * omega**2,
+            -scale * 2 * im * omega,
+            scale * 2 * im / omega,
+            R / D,
+            0.0,
+        ])
+        dA_domega = -scale * (2 * re * 2 * a * omega + 2 * im * (m + s / omega**2))
+        return partials, dA_domega * 2 * math.pi
+
+    def _peak_frequency_partials(self) -> np.ndarray:
+        """Returns the derivatives of the resonance frequency with respect to the coefficients."""
+        f_low, f_high, R = self._peak_segment
+        partials = np.zeros(len(self.COEFFICIENTS))
+        if f_low < self.f_resonance < f_high:
+            # implicit differentiation of the stationarity cubic F(u) = 0
+            a, m, s = self.a_radiation, self.mass, self.stiffness
+            u = (2 * math.pi * self.f_resonance)**2
+            dF_du = 12 * a**2 * u**2 + 2 * (4 * a * R + 2 * m**2) * u
+            dF_dR = 4 * a * u**2
+            dF = np.array([dF_dR, dF_dR if f_low < self.f_cutoff else 0.0,
+                           8 * a * u**3 + 4 * R * u**2, 4 * m * u**2, -4 * s, 0.0, 0.0])
+            partials = -dF / dF_du / (4 * math.pi * math.sqrt(u))
+        elif self.f_resonance == self.f_cutoff:
+            # peak clipped to the cutoff frequency
+            partials[6] = 1.0
+        return partials
+
+    def _crossing_partials(self, f: float, peak_partials: np.ndarray) -> np.ndarray:
+        """Returns the derivatives of a -3 dB frequency with respect to the coefficients."""
+        partials = np.zeros(len(self.COEFFICIENTS))
+        if f == self.f_cutoff:
+            # crossing caused by the jump at the cutoff
+            partials[6] = 1.0
+            return partials
+        dA, dA_df = self._area_partials(f, f < self.f_cutoff)
+        return -(dA - peak_partials / 2) / dA_df
+
+    def gradient(self) -> dict:
+        """
+        Calculates the derivatives of resonance frequency, peak absorption area and Q-factor with respect to
+        the design variables in `GRADIENT_VARIABLES` by implicit differentiation.
+
+        With the coefficient vector :math:`p`, the peak frequency :math:`f_r` is a root of the stationarity
+        cubic :math:`F(u, p) = 0`, so :math:`\\mathrm{d}u / \\mathrm{d}p = -F_p / F_u`. The peak area follows
+        from :math:`\\mathrm{d}A_{\\mathrm{peak}} = A_p + A_f \\, \\mathrm{d}f_r` and each -3 dB frequency
+        :math:`f_i` from :math:`A(f_i, p) = A_{\\mathrm{peak}}(p) / 2`.
+
+        Returns:
+            dict: Gradients (np.ndarray in the order of `GRADIENT_VARIABLES`) of 'f_resonance',
+            'peak_absorbtion_area' and 'q_factor'. The Q-factor gradient is None if the Q-factor is None.
+
+        Raises:
+            ValueError: If the aperture is not a tube.
+        """
+        if self.f_resonance is None:
+            self.calc_resonance_frequency_and_peak_area()
+        if self.q_factor is None:
+            self.calc_q_factor()
+        jac = self.coefficient_jacobian()
+
+        f_low, f_high, R = self._peak_segment
+        df_res = self._peak_frequency_partials()
+        dA, dA_df = self._area_partials(self.f_resonance, f_low < self.f_cutoff)
+        dpeak = dA + dA_df * df_res
+
+        gradients = {
+            'f_resonance': df_res @ jac,
+            'peak_absorbtion_area': dpeak @ jac,
+            'q_factor': None,
+        }
+        if self.q_factor is not None:
+            df_q_low = self._crossing_partials(self.f_q_low, dpeak)
+            df_q_high = self._crossing_partials(self.f_q_high, dpeak)
+            bandwidth = self.f_q_high - self.f_q_low
+            dq = df_res / bandwidth - self.f_resonance * (df_q_high - df_q_low) / bandwidth**2
+            gradients['q_factor'] = dq @ jac
+        return gradients
+
+    def required_volume(self, f_target: float) -> float:
+        """
+        Returns the cavity volume that places the absorption peak at a target frequency.
+
+        Solving the stationarity cubic for the stiffness at :math:`u = (2 \\pi f)^2` gives
+
+        .. math::
+
+            s = u \\sqrt{m^2 + 2 a^2 u + 2 a R}, \\quad V = \\frac{\\rho \\, c^2}{s}
+
+        with the resistance :math:`R` at the target frequency. All other coefficients, including the end
+        corrections in :math:`m`, are taken from the aperture, the volume of the geometry is not used.
+
+        Args:
+            f_target (float): Target resonance frequency (Hz).
+
+        Returns:
+            float: Cavity volume (m³).
+        """
+        med = self.sim_params.medium
+        return med.density * med.c**2 / self._required_stiffness(f_target)[0]
+
+    def required_volume_gradient(self, f_target: float) -> np.ndarray:
+        """
+        Returns the derivatives of :meth:`required_volume` with respect to `GRADIENT_VARIABLES`.
+
+        Args:
+            f_target (float): Target resonance frequency (Hz).
+
+        Returns:
+            np.ndarray: Gradient, the entry for the volume is zero.
+
+        Raises:
+            ValueError: If the aperture is not a tube.
+        """
+        med = self.sim_params.medium
+        stiffness, d_stiffness = self._required_stiffness(f_target)
+        volume = med.density * med.c**2 / stiffness
+        return -volume / stiffness * d_stiffness @ self.coefficient_jacobian()
+
+    def _required_stiffness(self, f_target):
+        """Returns the stiffness for a peak at f_target and its derivatives with respect to the coefficients."""
+        a, m = self.a_radiation, self.mass
+        below_cutoff = f_target < self.f_cutoff
+        R = self.resistance(f_target)
+        u = (2 * math.pi * f_target)**2
+        root = math.sqrt(m**2 + 2 * a**2 * u + 2 * a * R)
+        stiffness = u * root
+
+        d_R = u * a / root
+        partials = np.array([d_R, d_R if below_cutoff else 0.0, u * (2 * a * u + R) / root, u * m / root,
+                             0.0, 0.0, 0.0])
+        return stiffness, partials
+
+    def solve(self) -> tuple:
+        """
+        Convenience method to calculate all characteristic values in one step.
+
+        Returns:
+            tuple: (f_resonance, peak_absorbtion_area, f_q_low, f_q_high, q_factor)
+        """
+        self.calc_resonance_frequency_and_peak_area()
+        self.calc_q_factor()
+        return (self.f_resonance, self.peak_absorbtion_area, self.f_q_low, self.f_q_high, self.q_factor)
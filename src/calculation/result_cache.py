@@ -0,0 +1,182 @@
+"""
+Content-addressed on-disk cache of optimization results.
+
+Each entry is a small JSON file named after the SHA-256 digest of the complete request: target values,
+bounds, objective weights, frequency settings, search options and the version of the calculation code.
+Identical requests therefore map to the same entry, while any change of inputs or code leads to a new
+one. The total size of the cache is bounded, the least recently used entries are evicted first.
+"""
+
+from functools import lru_cache
+import hashlib
+import json
+import os
+import tempfile
+
+# the cache directory can be moved with this environment variable
+CACHE_DIR_VARIABLE = 'HRCALC_CACHE_DIR'
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'hrcalc')
+DEFAULT_MAX_SIZE = 16 * 1024**2
+
+
+@lru_cache(maxsize=1)
+def code_version() -> str:
+    """
+    Returns a digest of the source files of the calculation package.
+
+    Returns:
+        str: Hex digest, changes whenever a calculation module changes.
+    """
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(package_dir)):
+        if name.endswith('.py'):
+            digest.update(name.encode())
+            with open(os.path.join(package_dir, name), 'rb') as file:
+                digest.update(file.read())
+    return digest.hexdigest()
+
+
+def file_digest(path: str) -> str:
+    """
+    Returns the SHA-256 digest of a file, e.g. to include an input file in a request.
+
+    Args:
+        path (str): Path of the file.
+
+    Returns:
+        str: Hex digest of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ResultCache():
+    """
+    Size-bounded cache of JSON results on disk.
+
+    Attributes:
+        directory (str): Directory of the cache files.
+        max_size (int): Maximum total size of all entries in bytes.
+        hits (int): Number of successful lookups.
+        misses (int): Number of failed lookups.
+    """
+
+    def __init__(self, directory: str = None, max_size: int = DEFAULT_MAX_SIZE):
+        """
+        Opens (and creates) a cache directory.
+
+        Args:
+            directory (str, optional): Cache directory, defaults to ``$HRCALC_CACHE_DIR`` or ``~/.cache/hrcalc``.
+            max_size (int): Maximum total size of all entries in bytes.
+        """
+        self.directory = directory or os.environ.get(CACHE_DIR_VARIABLE) or DEFAULT_CACHE_DIR
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(request: dict) -> str:
+        """
+        Returns the content address of a request.
+
+        Args:
+            request (dict): JSON serializable description of everything the result depends on.
+
+        Returns:
+            str: Hex digest of the request and the code version.
+        """
+        payload = json.dumps({"request": request, "code_version": code_version()}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def get(self, key: str) -> dict:
+        """
+        Looks up an entry and marks it as recently used.
+
+        Args:
+            key (str): Content address from :meth:`key`.
+
+        Returns:
+            dict: The stored result, None if there is no (readable) entry.
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'r') as file:
+                value = json.load(file)
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: dict):
+        """
+        Stores an entry and evicts old entries if the cache is too large.
+
+        The file is written atomically, so concurrent readers never see partial entries.
+
+        Args:
+            key (str): Content address from :meth:`key`.
+            value (dict): JSON serializable result.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as file:
+                json.dump(value, file)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict()
+
+    def entries(self) -> list:
+        """
+        Returns all entries, least recently used first.
+
+        Returns:
+            list[tuple[str, int, float]]: (path, size in bytes, last use) per entry.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def size(self) -> int:
+        """Returns the total size of all entries in bytes."""
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Removes the least recently used entries until the cache fits into `max_size`."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self):
+        """Removes all entries."""
+        for path, _, _ in self.entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,129 @@
+"""
+Evaluation and time budgets of optimizations.
+
+A :class:`SearchBudget` limits the number of objective evaluations and sets a wall-clock deadline. It is
+sent along with the starts of a :meth:`calculation.optimizer.Optimizer.search_optimal` run, so every
+worker stops its local optimizations itself once its share of the budget is used up. A stopped local
+optimization still reports the best design it evaluated (anytime result).
+
+The deadline is an absolute time (:func:`time.time`), workers on other machines need synchronized clocks.
+"""
+
+import time
+import numpy as np
+
+
+class BudgetExhausted(Exception):
+    """Raised by a :class:`BudgetedObjective` when its budget does not allow another evaluation."""
+
+
+class SearchBudget():
+    """
+    Objective evaluations and time available to local optimizations.
+
+    Attributes:
+        max_evaluations (int): Maximum number of objective evaluations, None for no limit.
+        deadline (float): Time (:func:`time.time`) after which no evaluation is started, None for no limit.
+        evaluations (int): Evaluations counted so far.
+    """
+
+    def __init__(self, max_evaluations: int = None, deadline: float = None):
+        """
+        Creates a budget, both limits are optional.
+
+        Args:
+            max_evaluations (int, optional): Maximum number of objective evaluations.
+            deadline (float, optional): Absolute deadline in seconds since the epoch.
+        """
+        self.max_evaluations = max_evaluations
+        self.deadline = deadline
+        self.evaluations = 0
+
+    @classmethod
+    def from_limits(cls, max_time: float = None, max_evaluations: int = None) -> 'SearchBudget':
+        """
+        Creates a budget that ends `max_time` seconds from now.
+
+        Args:
+            max_time (float, optional): Wall-clock time in seconds.
+            max_evaluations (int, optional): Maximum number of objective evaluations.
+
+        Returns:
+            SearchBudget: The budget.
+        """
+        return cls(max_evaluations, time.time() + max_time if max_time is not None else None)
+
+    def remaining_evaluations(self):
+        """Returns the evaluations left, None without a limit."""
+        if self.max_evaluations is None:
+            return None
+        return max(self.max_evaluations - self.evaluations, 0)
+
+    def remaining_time(self):
+        """Returns the seconds until the deadline (at least 0), None without a deadline."""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.time(), 0.)
+
+    def out_of_time(self) -> bool:
+        """Returns True once the deadline has passed."""
+        return self.deadline is not None and time.time() >= self.deadline
+
+    def exhausted(self) -> bool:
+        """Returns True if no further evaluation may be started."""
+        return self.remaining_evaluations() == 0 or self.out_of_time()
+
+    def share(self, max_evaluations: int = None) -> 'SearchBudget':
+        """
+        Returns a budget with the same deadline and at most `max_evaluations` evaluations.
+
+        Args:
+            max_evaluations (int, optional): Evaluations of the new budget, None for no limit.
+
+        Returns:
+            SearchBudget: The new budget.
+        """
+        return SearchBudget(max_evaluations, self.deadline)
+
+    def track(self, fun) -> 'BudgetedObjective':
+        """
+        Wraps an objective, so its evaluations are counted against this budget.
+
+        Args:
+            fun (callable): Objective returning a value or a tuple (value, gradient).
+
+        Returns:
+            BudgetedObjective: The wrapped objective.
+        """
+        return BudgetedObjective(fun, self)
+
+
+class BudgetedObjective():
+    """
+    Objective that counts its evaluations against a :class:`SearchBudget` and remembers its best point.
+
+    Attributes:
+        budget (SearchBudget): The budget.
+        best_x (np.ndarray): Parameters of the lowest value evaluated so far, None before the first one.
+        best_fun (float): Lowest value evaluated so far.
+        evaluations (int): Evaluations of this objective.
+    """
+
+    def __init__(self, fun, budget: SearchBudget):
+        self.fun = fun
+        self.budget = budget
+        self.best_x = None
+        self.best_fun = np.inf
+        self.evaluations = 0
+
+    def __call__(self, x):
+        if self.budget.exhausted():
+            raise BudgetExhausted()
+        result = self.fun(x)
+        self.evaluations += 1
+        self.budget.evaluations += 1
+        value = result[0] if isinstance(result, tuple) else result
+        if value < self.best_fun:
+            self.best_fun = float(value)
+            self.best_x = np.array(x, dtype=float)
+        return result
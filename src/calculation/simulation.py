@@ -1,7 +1,76 @@
+import functools
+import weakref
 import matplotlib.pyplot as plt
 import numpy as np
+from traits.api import HasTraits
+from traits.observation.api import anytrait
 from .simulation_parameters import SimulationParameters
 from .resonator import Resonator
+from .resonance_solver import ResonanceSolver
+
+# simulations using a traits input object, per object and source
+_input_subscribers = weakref.WeakKeyDictionary()
+
+
+def _notify_subscribers(source, subscribers, event):
+    """Forwards a trait change of an input object to all simulations using it."""
+    for sim in list(subscribers):
+        sim._input_changed(source, event.name)
+
+
+def _subscribe(obj, source, sim):
+    """
+    Registers a simulation for the trait changes of an input object.
+
+    Every input object has a single observer per source, whatever the number of simulations sharing it.
+    The simulations are held weakly and drop out when they are collected, so building many simulations
+    on shared inputs costs constant time each.
+    """
+    by_source = _input_subscribers.setdefault(obj, {})
+    subscribers = by_source.get(source)
+    if subscribers is None:
+        subscribers = by_source[source] = weakref.WeakSet()
+        obj.observe(functools.partial(_notify_subscribers, source, subscribers), anytrait())
+    subscribers.add(sim)
+
+
+def _unsubscribe(obj, source, sim):
+    """Stops forwarding trait changes of an input object to a simulation."""
+    subscribers = _input_subscribers.get(obj, {}).get(source)
+    if subscribers is not None:
+        subscribers.discard(sim)
+
+
+class CachedQuantity():
+    """
+    Descriptor for a lazily evaluated simulation result.
+
+    Reading the attribute runs ``calc(sim)`` if its node in the dependency graph of the Simulation is
+    dirty. Assigning a value stores it, marks the node clean and all quantities depending on it dirty.
+
+    Args:
+        node (str): Name of the node in :attr:`Simulation.DEPENDENCIES`.
+        calc (callable): Function calculating the node for a Simulation.
+    """
+
+    def __init__(self, node, calc):
+        self.node = node
+        self.calc = calc
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, sim, owner=None):
+        if sim is None:
+            return self
+        if self.node in sim._dirty:
+            self.calc(sim)
+        return sim._values.get(self.name)
+
+    def __set__(self, sim, value):
+        sim._values[self.name] = value
+        sim._mark_calculated(self.node)
+
 
 class Simulation():
     
@@ -17,6 +86,8 @@ class Simulation():
         z_porous (float): Additional impedance from porous damping.
         z_radiation (np.array): Radiation impedance across frequency range.
         z_stiff_mass (np.array): Stiffness and mass impedance.
+        z_stiffness (np.array): Stiffness part of z_stiff_mass (cavity).
+        z_mass (np.array): Mass part of z_stiff_mass (aperture).
         z_friction (np.array): Viscous (friction) impedance.
         k (np.array): Wavenumber.
         absorbtion_area (np.array): Resulting absorption area vs. frequency.
@@ -27,8 +98,76 @@ class Simulation():
         f_q_high (float): Upper -3 dB frequency point.
         f_resonance (float): Calculated resonance frequency.
         peak_absorbtion_area (float): Max absorption at resonance.
+        refined (bool): True once the frequency vector was adaptively refined.
+
+    All results are evaluated lazily: reading e.g. ``sim.q_factor`` calculates only the quantities it
+    depends on, see :attr:`DEPENDENCIES`. Trait changes of the geometry, aperture, medium and simulation
+    parameters mark only the directly affected quantities (:attr:`INPUT_DEPENDENCIES`) and everything
+    depending on them as dirty. Replacing e.g. ``sim.resonator.geometry`` is not observed, call
+    :meth:`invalidate` afterwards.
     """
 
+    # cached quantities and the quantities they are calculated from
+    DEPENDENCIES = {
+        'z_porous': (),
+        'z_radiation': (),
+        'z_stiffness': (),
+        'z_mass': (),
+        'z_stiff_mass': ('z_stiffness', 'z_mass'),
+        'z_friction': (),
+        'absorbtion_area': ('z_porous', 'z_radiation', 'z_stiff_mass', 'z_friction'),
+        'resonance': ('absorbtion_area',),
+        'q_factor': ('resonance',),
+        'max_absorbtion_area': (),
+    }
+
+    # input traits and the cached quantities that use them directly
+    INPUT_DEPENDENCIES = {
+        'geometry': {
+            'volume': ('z_stiffness',),
+        },
+        'aperture': {
+            'xi': ('z_porous',),
+            'additional_dampening': ('z_porous',),
+            'length': ('z_porous', 'z_mass', 'z_friction'),
+            'area': ('z_porous', 'z_mass', 'z_friction'),
+            'radius': ('z_radiation', 'z_friction'),
+            'outer_ending': ('z_radiation',),
+            'outer_end_correction': ('z_radiation', 'z_mass'),
+            'inner_end_correction': ('z_mass',),
+        },
+        'medium': {
+            'density': ('z_radiation', 'z_stiffness', 'z_mass', 'z_friction', 'absorbtion_area'),
+            'c': ('z_radiation', 'z_stiffness', 'absorbtion_area'),
+            'kinematic_viscosity': ('z_friction',),
+        },
+        'sim_params': {
+            'angle_of_incidence': ('absorbtion_area',),
+            'assume_diffuse': ('absorbtion_area',),
+            'frequencies': ('z_friction', 'resonance'),
+            'omega': ('z_stiffness', 'z_mass'),
+            'k': ('z_radiation', 'z_friction'),
+            'wavelength': ('max_absorbtion_area',),
+        },
+    }
+
+    # traits of the simulation parameters replaced by the adaptive refinement itself
+    GRID_TRAITS = ('frequencies', 'omega', 'k', 'wavelength')
+
+    z_porous = CachedQuantity('z_porous', lambda sim: sim.calc_z_porous())
+    z_radiation = CachedQuantity('z_radiation', lambda sim: sim.calc_z_radiation())
+    z_stiffness = CachedQuantity('z_stiffness', lambda sim: sim.calc_z_stiffness())
+    z_mass = CachedQuantity('z_mass', lambda sim: sim.calc_z_mass())
+    z_stiff_mass = CachedQuantity('z_stiff_mass', lambda sim: sim.calc_z_stiff_mass())
+    z_friction = CachedQuantity('z_friction', lambda sim: sim.calc_z_friction())
+    absorbtion_area = CachedQuantity('absorbtion_area', lambda sim: sim.calc_absorbtion_area())
+    f_resonance = CachedQuantity('resonance', lambda sim: sim.calc_resonance_frequency_and_peak_area())
+    peak_absorbtion_area = CachedQuantity('resonance', lambda sim: sim.calc_resonance_frequency_and_peak_area())
+    q_factor = CachedQuantity('q_factor', lambda sim: sim.calc_q_factor())
+    f_q_low = CachedQuantity('q_factor', lambda sim: sim.calc_q_factor())
+    f_q_high = CachedQuantity('q_factor', lambda sim: sim.calc_q_factor())
+    max_absorbtion_area = CachedQuantity('max_absorbtion_area', lambda sim: sim.calc_max_absorbtion_area(plot=False))
+
     def __init__(self, resonator: Resonator, sim_params: SimulationParameters):
         """
         Initialize a Simulation instance.
@@ -37,22 +176,174 @@ class Simulation():
             resonator (Resonator): The Helmholtz resonator object.
             sim_params (SimulationParameters): Frequency & medium configuration.
         """
-        self.resonator = resonator
-        self.sim_params = sim_params
+        self._values = {}
+        self._dirty = set(self.DEPENDENCIES)
+        self._dependents = {node: [other for other, deps in self.DEPENDENCIES.items() if node in deps]
+                            for node in self.DEPENDENCIES}
+        self._observed = {}
+
+        self._resonator = resonator
+        self._sim_params = sim_params
+        self._observe_inputs()
 
-        self.z_porous = None
-        self.z_radiation = None
-        self.z_stiff_mass = None
-        self.z_friction = None
-        self.k = self.sim_params.omega / self.sim_params.medium.c
-        self.absorbtion_area = None
         self.absorbtion_area_diffuse = None
-        self.max_absorbtion_area = None
-        self.q_factor = None
-        self.f_q_low = None
-        self.f_q_high = None
-        self.f_resonance = None
-        self.peak_absorbtion_area = None
+        self.refined = False
+
+    @property
+    def resonator(self) -> Resonator:
+        """The simulated resonator. Assigning a new one invalidates all results."""
+        return self._resonator
+
+    @resonator.setter
+    def resonator(self, resonator: Resonator):
+        self._resonator = resonator
+        self.invalidate()
+
+    @property
+    def sim_params(self) -> SimulationParameters:
+        """The simulation parameters. Assigning new ones invalidates all results."""
+        return self._sim_params
+
+    @sim_params.setter
+    def sim_params(self, sim_params: SimulationParameters):
+        self._sim_params = sim_params
+        self.invalidate()
+
+    @property
+    def k(self) -> np.ndarray:
+        """Wavenumber vector of the simulation parameters."""
+        return self.sim_params.k
+
+    def invalidate(self, *nodes):
+        """
+        Marks cached quantities and everything depending on them as dirty.
+
+        Without arguments all results are invalidated and the observed input objects are updated,
+        e.g. after replacing ``sim.resonator.geometry``.
+
+        Args:
+            *nodes (str): Names of nodes in :attr:`DEPENDENCIES`.
+        """
+        if not nodes:
+            self._observe_inputs()
+            self._reset_refinement()
+            nodes = tuple(self.DEPENDENCIES)
+        stack = list(nodes)
+        while stack:
+            node = stack.pop()
+            self._dirty.add(node)
+            stack.extend(dep for dep in self._dependents[node] if dep not in self._dirty)
+
+    def is_calculated(self, node: str) -> bool:
+        """
+        Returns True if a cached quantity is up to date.
+
+        Args:
+            node (str): Name of a node in :attr:`DEPENDENCIES`.
+        """
+        return node not in self._dirty
+
+    def _mark_calculated(self, node):
+        """Marks a node as up to date and everything depending on it as dirty."""
+        self._dirty.discard(node)
+        dependents = self._dependents[node]
+        if dependents:
+            self.invalidate(*dependents)
+
+    def _cached_value(self, name, node):
+        """Returns a stored result if it is up to date, otherwise None. Never triggers a calculation."""
+        return self._values.get(name) if node not in self._dirty else None
+
+    def _input_objects(self):
+        """Returns the current input objects by source name."""
+        return {
+            'geometry': self._resonator.geometry,
+            'aperture': self._resonator.aperture,
+            'medium': self._sim_params.medium,
+            'sim_params': self._sim_params,
+        }
+
+    def _observe_inputs(self):
+        """Observes trait changes of all traits based input objects, replacing previous subscriptions."""
+        current = self._input_objects()
+        for source, obj in self._observed.items():
+            if current[source] is not obj:
+                _unsubscribe(obj, source, self)
+        for source, obj in current.items():
+            if isinstance(obj, HasTraits) and self._observed.get(source) is not obj:
+                _subscribe(obj, source, self)
+        self._observed = {source: obj for source, obj in current.items() if isinstance(obj, HasTraits)}
+
+    def _input_changed(self, source, name):
+        """Invalidates the quantities depending on a changed input trait."""
+        if source == 'sim_params' and name == 'medium':
+            self.invalidate()
+            return
+        nodes = self.INPUT_DEPENDENCIES[source].get(name)
+        if nodes:
+            if not (source == 'sim_params' and name in self.GRID_TRAITS):
+                self._reset_refinement()
+            self.invalidate(*nodes)
+
+    def _reset_refinement(self):
+        """Restores the coarse grid of adaptive parameters, so it is refined again for the changed inputs."""
+        if self.refined:
+            self.refined = False
+            self.sim_params.update()
+            # simulation parameters without trait notifications do not invalidate the results themselves
+            self.invalidate(*self._grid_nodes())
+
+    def _grid_nodes(self):
+        """Returns the quantities calculated directly from the frequency vector."""
+        return tuple({node for name in self.GRID_TRAITS for node in self.INPUT_DEPENDENCIES['sim_params'][name]})
+
+    def update_geometry(self, **changes) -> np.ndarray:
+        """
+        Changes cavity dimensions and updates the absorption area incrementally.
+
+        Only the impedance terms depending on the changed inputs are recalculated, e.g. changing
+        a dimension only recalculates the stiffness term before the absorption area is combined again.
+        Traits based geometries are changed in place, immutable fast models are replaced.
+
+        Args:
+            **changes: New values for geometry traits, e.g. ``x=0.4``.
+
+        Returns:
+            np.ndarray: Absorption area vector (m²).
+        """
+        self._update_input('geometry', changes)
+        return self.absorbtion_area
+
+    def update_aperture(self, **changes) -> np.ndarray:
+        """
+        Changes aperture parameters and updates the absorption area incrementally.
+
+        Changing ``xi`` only recalculates the scalar porous impedance, changing ``length`` the porous,
+        mass and friction terms. Traits based apertures are changed in place, immutable fast models are
+        replaced.
+
+        Args:
+            **changes: New values for aperture traits, e.g. ``xi=200``.
+
+        Returns:
+            np.ndarray: Absorption area vector (m²).
+        """
+        self._update_input('aperture', changes)
+        return self.absorbtion_area
+
+    def _update_input(self, source, changes):
+        """Applies changes to the geometry or aperture and invalidates the affected quantities."""
+        old = getattr(self.resonator, source)
+        if isinstance(old, HasTraits):
+            # the trait notifications invalidate the affected quantities
+            old.trait_set(**changes)
+            return
+        new = old.replace(**changes)
+        setattr(self.resonator, source, new)
+        for name, nodes in self.INPUT_DEPENDENCIES[source].items():
+            if getattr(old, name) != getattr(new, name):
+                self._reset_refinement()
+                self.invalidate(*nodes)
 
     def calc_all(self):
         """
@@ -154,20 +445,52 @@ class Simulation():
         - :math:`S` is the cross-sectional area (m²)  
          
 
+        The stiffness and mass terms are cached separately (:meth:`calc_z_stiffness`, :meth:`calc_z_mass`),
+        so a change of the cavity volume only recalculates the stiffness term and vice versa.
+
+        Returns:
+            np.ndarray: Complex impedance vector (Pa·s/m).
+        """
+        self.z_stiff_mass = self.z_stiffness + self.z_mass
+        return self.z_stiff_mass
+
+    def calc_z_stiffness(self) -> np.array:
+        """
+        Calculates the stiffness term of the cavity:
+
+        .. math::
+
+            Z_{\\text{stiffness}}(\\omega) = \\frac{\\rho \\; c^2}{i\\,\\omega\\,V}
+
         Returns:
             np.ndarray: Complex impedance vector (Pa·s/m).
         """
-        ap = self.resonator.aperture
         rho = self.sim_params.medium.density
         c = self.sim_params.medium.c
-        S = ap.area
         omega = self.sim_params.omega
         volume = self.resonator.geometry.volume
-        l_ap = ap.length
+
+        self.z_stiffness = rho * c**2 / (1j*omega*volume)
+        return self.z_stiffness
+
+    def calc_z_mass(self) -> np.array:
+        """
+        Calculates the mass term of the air in the aperture including the end corrections:
+
+        .. math::
+
+            Z_{\\text{mass}}(\\omega) = i\\,\\omega\\,\\rho\\,\\frac{L + \\Delta L}{S}
+
+        Returns:
+            np.ndarray: Complex impedance vector (Pa·s/m).
+        """
+        ap = self.resonator.aperture
+        rho = self.sim_params.medium.density
+        omega = self.sim_params.omega
         delta_l_total = ap.inner_end_correction + ap.outer_end_correction
 
-        self.z_stiff_mass = rho * c**2 / (1j*omega*volume) + 1j*omega*rho*(l_ap + delta_l_total) / S
-        return self.z_stiff_mass
+        self.z_mass = 1j*omega*rho*(ap.length + delta_l_total) / ap.area
+        return self.z_mass
 
     def calc_z_friction(self) -> np.array:
         """
@@ -246,11 +569,10 @@ class Simulation():
         Returns:
             np.ndarray: Absorption area vector (m²).
         """
-        self.calc_z_porous()
-        self.calc_z_radiation()
-        self.calc_z_stiff_mass()
-        self.calc_z_friction()
+        if self.sim_params.adaptive and not self.refined:
+            self.refine_frequencies()
 
+        # impedances are only recalculated if they are out of date
         z_total = self.z_friction + self.z_porous + self.z_stiff_mass
         z_rad = self.z_radiation
 
@@ -265,6 +587,26 @@ class Simulation():
 
         return self.absorbtion_area
 
+    def refine_frequencies(self):
+        """
+        Adaptively refines the frequency vector of the simulation parameters around the resonance.
+
+        Starting from the coarse grid, the absorption area is evaluated and the intervals returned by
+        :meth:`SimulationParameters.refinement_points` are split until no interval needs refinement
+        or `max_refinements` passes are done. The refined grid is stored in `sim_params`, so adaptive
+        simulation parameters should not be shared between different resonators. Changing an input of
+        the simulation restores the coarse grid, which is refined again on the next calculation.
+        """
+        params = self.sim_params
+        self.refined = True
+        for _ in range(params.max_refinements):
+            new_frequencies = params.refinement_points(self.calc_absorbtion_area())
+            if len(new_frequencies) == 0:
+                break
+            params.set_frequencies(np.sort(np.concatenate((params.frequencies, new_frequencies))))
+            # simulation parameters without trait notifications do not invalidate the results themselves
+            self.invalidate(*self._grid_nodes())
+
     def calc_resonance_frequency_and_peak_area(self) -> float:
         """
         Determines the resonance frequency and peak absorption value.
@@ -284,11 +626,9 @@ class Simulation():
         Returns:
             tuple[float, float]: (f_resonance in Hz, peak_absorption_area in m²)
         """
-        if self.absorbtion_area is None:
-            self.calc_absorbtion_area()
-
-        peak_idx = np.argmax(self.absorbtion_area)
-        self.peak_absorbtion_area = self.absorbtion_area[peak_idx]
+        curve = self.absorbtion_area
+        peak_idx = np.argmax(curve)
+        self.peak_absorbtion_area = curve[peak_idx]
         self.f_resonance = self.sim_params.frequencies[peak_idx]
         return (self.f_resonance, self.peak_absorbtion_area)
 
@@ -310,14 +650,10 @@ class Simulation():
         Returns:
             float: Quality factor (Q), or None if the -3 dB points cannot be determined.
         """
-        if self.absorbtion_area is None:
-            self.calc_absorbtion_area()
-
         curve = self.absorbtion_area
         freqs = self.sim_params.frequencies
-        peak_idx = np.argmax(curve)
-        f_res = freqs[peak_idx]
-        peak = curve[peak_idx]
+        f_res = self.f_resonance
+        peak = self.peak_absorbtion_area
         half_peak = peak / 2
 
         diff = curve - half_peak
@@ -326,6 +662,9 @@ class Simulation():
         try:
             i1, i2 = idx[0], idx[1]
         except IndexError:
+            self.f_q_low = None
+            self.f_q_high = None
+            self.q_factor = None
             return None
 
         # Linear interpolation to find -3dB points
@@ -337,6 +676,26 @@ class Simulation():
         self.q_factor = f_res / (f2 - f1)
         return self.q_factor
 
+    def solve_resonance(self) -> tuple:
+        """
+        Determines resonance frequency, peak absorption area and Q-factor directly from the lumped model
+        using :class:`calculation.resonance_solver.ResonanceSolver`, without evaluating the frequency grid.
+
+        The results are not limited to the grid resolution, but the search is still restricted to
+        ``sim_params.freq_range``.
+
+        Returns:
+            tuple: (f_resonance, peak_absorbtion_area, f_q_low, f_q_high, q_factor)
+        """
+        solver = ResonanceSolver(self.resonator, self.sim_params)
+        solver.solve()
+        self.f_resonance = solver.f_resonance
+        self.peak_absorbtion_area = solver.peak_absorbtion_area
+        self.f_q_low = solver.f_q_low
+        self.f_q_high = solver.f_q_high
+        self.q_factor = solver.q_factor
+        return (self.f_resonance, self.peak_absorbtion_area, self.f_q_low, self.f_q_high, self.q_factor)
+
     def calc_max_absorbtion_area(self, plot: bool = True):
         """
         Calculates the theoretical maximum absorption area.
@@ -369,11 +728,6 @@ class Simulation():
         Args:
             ion (bool): Whether to enable interactive plotting.
         """
-        if self.absorbtion_area is None:
-            self.calc_absorbtion_area()
-        if self.q_factor is None:
-            self.calc_q_factor()
-
         if ion:
             plt.ion()
 
@@ -394,18 +748,25 @@ class Simulation():
         Returns:
             dict: Serialized simulation data.
         """
+        # only results that are already calculated and up to date are serialized
+        z_porous = self._cached_value('z_porous', 'z_porous')
+        z_radiation = self._cached_value('z_radiation', 'z_radiation')
+        z_stiff_mass = self._cached_value('z_stiff_mass', 'z_stiff_mass')
+        z_friction = self._cached_value('z_friction', 'z_friction')
+        absorbtion_area = self._cached_value('absorbtion_area', 'absorbtion_area')
+        max_absorbtion_area = self._cached_value('max_absorbtion_area', 'max_absorbtion_area')
         return {
             "resonator": self.resonator.to_dict(),
             "simulation_parameters": self.sim_params.to_dict(),
-            "z_porous": self.z_porous,
-            "z_radiation_real": np.real(self.z_radiation).tolist() if self.z_radiation is not None else None,
-            "z_radiation_imag": np.imag(self.z_radiation).tolist() if self.z_radiation is not None else None,
-            "z_stiff_mass_real": np.real(self.z_stiff_mass).tolist() if self.z_stiff_mass is not None else None,
-            "z_stiff_mass_imag": np.imag(self.z_stiff_mass).tolist() if self.z_stiff_mass is not None else None,
-            "z_friction": self.z_friction.tolist() if self.z_friction is not None else None,
-            "absorbtion_area": self.absorbtion_area.tolist() if self.absorbtion_area is not None else None,
-            "max_absorbtion_area": self.max_absorbtion_area.tolist() if self.max_absorbtion_area is not None else None,
-            "q_factor": self.q_factor
+            "z_porous": z_porous,
+            "z_radiation_real": np.real(z_radiation).tolist() if z_radiation is not None else None,
+            "z_radiation_imag": np.imag(z_radiation).tolist() if z_radiation is not None else None,
+            "z_stiff_mass_real": np.real(z_stiff_mass).tolist() if z_stiff_mass is not None else None,
+            "z_stiff_mass_imag": np.imag(z_stiff_mass).tolist() if z_stiff_mass is not None else None,
+            "z_friction": z_friction.tolist() if z_friction is not None else None,
+            "absorbtion_area": absorbtion_area.tolist() if absorbtion_area is not None else None,
+            "max_absorbtion_area": max_absorbtion_area.tolist() if max_absorbtion_area is not None else None,
+            "q_factor": self._cached_value('q_factor', 'q_factor')
         }
 
     @classmethod
@@ -423,7 +784,9 @@ class Simulation():
         sim_params = SimulationParameters.from_dict(data['simulation_parameters'])
 
         sim = cls(resonator=resonator, sim_params=sim_params)
-        sim.z_porous = data.get('z_porous')
+        # stored results are restored as calculated, missing ones are calculated lazily
+        if data.get('z_porous') is not None:
+            sim.z_porous = data.get('z_porous')
 
         zr_real = data.get('z_radiation_real')
         zr_imag = data.get('z_radiation_imag')
@@ -435,8 +798,12 @@ class Simulation():
         if zs_real and zs_imag:
             sim.z_stiff_mass = np.array(zs_real) + 1j * np.array(zs_imag)
 
-        sim.z_friction = np.array(data.get('z_friction')) if data.get('z_friction') else None
-        sim.absorbtion_area = np.array(data.get('absorbtion_area')) if data.get('absorbtion_area') else None
-        sim.max_absorbtion_area = np.array(data.get('max_absorbtion_area')) if data.get('max_absorbtion_area') else None
-        sim.q_factor = data.get('q_factor')
+        if data.get('z_friction'):
+            sim.z_friction = np.array(data.get('z_friction'))
+        if data.get('absorbtion_area'):
+            sim.absorbtion_area = np.array(data.get('absorbtion_area'))
+        if data.get('max_absorbtion_area'):
+            sim.max_absorbtion_area = np.array(data.get('max_absorbtion_area'))
+        if data.get('q_factor') is not None:
+            sim.q_factor = data.get('q_factor')
         return sim
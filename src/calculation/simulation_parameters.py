@@ -1,7 +1,9 @@
-from traits.api import HasTraits, Instance, Tuple, Int, Float, Bool, Array, Range
+from traits.api import HasTraits, Instance, Tuple, Int, Float, Bool, Array, Range, observe
+from traits.observation.api import trait
 from traitsui.api import View, Item, Group
 import numpy as np
 from .medium import Medium  
+from . import frequency_grid
 
 class SimulationParameters(HasTraits):
     """
@@ -16,6 +18,13 @@ class SimulationParameters(HasTraits):
         values_per_octave (int): Discretization of the frequency axis.
         angle_of_incidence (float): Angle of sound incidence (°). Ignored if `assume_diffuse` is True.
         assume_diffuse (bool): If True, sets angle_of_incidence to 0 and assumes diffuse field.
+        adaptive (bool): If True, `values_per_octave` only defines a coarse initial grid which is
+            refined around the resonance by the Simulation (see :meth:`refinement_points`).
+        tolerance (float): Relative tolerance of the adaptive refinement.
+        max_refinements (int): Maximum number of refinement passes in adaptive mode.
+        canonical_grid (bool): If True, the frequencies are a slice of the global log lattice
+            :math:`1000 \\cdot 2^{i / N}` Hz (see :mod:`calculation.frequency_grid`), so grids with
+            the same `values_per_octave` share their frequencies exactly.
         frequencies (np.ndarray): Frequency vector.
         omega (np.ndarray): Angular frequency (rad/s).
         k (np.ndarray): Wave number (1/m).
@@ -29,6 +38,10 @@ class SimulationParameters(HasTraits):
     values_per_octave = Range(1, 10_000)
     angle_of_incidence = Float(0.0)
     assume_diffuse = Bool(True)
+    adaptive = Bool(False)
+    tolerance = Range(1e-6, 0.5, value=1e-3)
+    max_refinements = Range(1, 50, value=20)
+    canonical_grid = Bool(False)
 
     frequencies = Array(dtype=float)
     omega = Array(dtype=float)
@@ -53,11 +66,69 @@ class SimulationParameters(HasTraits):
         if self.assume_diffuse:
             self.angle_of_incidence = 0.0
 
-        self.calculate_frequencies()
+        # shared read-only arrays, see calculation.frequency_grid
+        f_min, f_max = self.freq_range
+        self.frequencies, self.omega, self.k, self.wavelength = frequency_grid.get_grid(
+            f_min, f_max, self.values_per_octave, self.medium.c, self.canonical_grid)
+
+    @observe(trait('medium').trait('c', optional=True), post_init=True)
+    def _update_speed_of_sound(self, event):
+        """Recalculates k and wavelength when the medium or its speed of sound changes."""
+        self.set_frequencies(self.frequencies)
+
+    def set_frequencies(self, frequencies):
+        """
+        Replace the frequency vector and recalculate omega, k and wavelength.
+
+        Args:
+            frequencies (np.ndarray): Strictly increasing frequency vector (Hz).
+        """
+        self.frequencies = frequencies
         self.omega = self.calc_omega(self.frequencies)
         self.k = self.calc_k(self.omega, self.medium.c)
         self.wavelength = self.calc_lambda(self.omega, self.medium.c)
 
+    def refinement_points(self, curve):
+        """
+        Determine new frequencies for one pass of the adaptive grid refinement.
+
+        An interval of the current frequency vector is split at its logarithmic center if it is wider
+        than `tolerance` (relative) and at least one of the following applies:
+
+        - it contains the maximum of the curve
+        - the curve crosses half of its maximum inside the interval (-3 dB points)
+        - the curve deviates by more than `tolerance` times its maximum from the linear
+          interpolation of its neighbours at one of the interval ends (curvature)
+
+        Args:
+            curve (np.ndarray): Values (e.g. absorption area) at the current frequencies.
+
+        Returns:
+            np.ndarray: Frequencies to insert, empty if the grid is converged.
+        """
+        f = self.frequencies
+        if len(f) < 3:
+            return np.array([])
+
+        log_f = np.log(f)
+        peak_idx = np.argmax(curve)
+        peak = curve[peak_idx]
+        n_intervals = len(f) - 1
+
+        refine = np.zeros(n_intervals, dtype=bool)
+        refine[max(peak_idx - 1, 0):min(peak_idx + 1, n_intervals)] = True
+        refine |= np.diff(np.sign(curve - peak / 2)) != 0
+
+        # deviation of inner points from the linear interpolation of their neighbours
+        weight = (log_f[1:-1] - log_f[:-2]) / (log_f[2:] - log_f[:-2])
+        interpolated = curve[:-2] + weight * (curve[2:] - curve[:-2])
+        curved = np.abs(curve[1:-1] - interpolated) > self.tolerance * np.abs(peak)
+        refine[:-1] |= curved
+        refine[1:] |= curved
+
+        refine &= f[1:] / f[:-1] - 1 > self.tolerance
+        return np.sqrt(f[:-1][refine] * f[1:][refine])
+
     def calculate_frequencies(self):
         """
         Compute the logarithmic frequency vector based on the frequency range and values per octave.
@@ -77,9 +148,7 @@ class SimulationParameters(HasTraits):
 
         """
         f_min, f_max = self.freq_range
-        n_octaves = np.log2(f_max / f_min)
-        n_freq_values = int(n_octaves * self.values_per_octave)
-        self.frequencies = np.logspace(np.log10(f_min), np.log10(f_max), num=n_freq_values)
+        self.frequencies = frequency_grid.log_frequencies(f_min, f_max, self.values_per_octave, self.canonical_grid)
 
     def calc_omega(self, frequencies):
         """
@@ -143,7 +212,13 @@ class SimulationParameters(HasTraits):
             "freq_range": self.freq_range,
             "values_per_octave": self.values_per_octave,
             "angle_of_incidence": self.angle_of_incidence,
-            "assume_diffuse": self.assume_diffuse
+            "assume_diffuse": self.assume_diffuse,
+            "adaptive": self.adaptive,
+            "tolerance": self.tolerance,
+            "max_refinements": self.max_refinements,
+            "canonical_grid": self.canonical_grid,
+            # the refined frequency vector cannot be recalculated from the other parameters
+            "frequencies": self.frequencies.tolist() if self.adaptive else None
         }
     
     @classmethod
@@ -159,27 +234,27 @@ class SimulationParameters(HasTraits):
         """
 
         medium = Medium.from_dict(data['medium'])
-        if 'frequencies' in data:
+        if data.get('frequencies') is not None:
             frequencies = np.array(data['frequencies'])
         else:
             # calculate the frequency vector
             f_min = data.get('freq_range', (20.0, 500.0))[0]
             f_max = data.get('freq_range', (20.0, 500.0))[1]
             values_per_octave = data.get('values_per_octave', 100)
-            n_octaves = np.log2(f_max / f_min)
-            n_freq_values = int(n_octaves * values_per_octave)
-            frequencies = np.logspace(np.log10(f_min), np.log10(f_max), num=n_freq_values)
+            frequencies = frequency_grid.log_frequencies(f_min, f_max, values_per_octave,
+                                                         data.get('canonical_grid', False))
         
         angle_of_incidence = data.get('angle_of_incidence', None)
         assume_diffuse = data.get('assume_diffuse', True)
 
         params = cls(medium=medium, angle_of_incidence=angle_of_incidence)
-        params.frequencies = frequencies
         # recalculate omega, k, and lambda based on the frequencies
-        params.omega = params.calc_omega(frequencies)
-        params.k = params.calc_k(params.omega, medium.c)
-        params._lambda = params.calc_lambda(params.omega, medium.c)
+        params.set_frequencies(frequencies)
      
         params.assume_diffuse = assume_diffuse
+        params.adaptive = data.get('adaptive', False)
+        params.tolerance = data.get('tolerance', params.tolerance)
+        params.max_refinements = data.get('max_refinements', params.max_refinements)
+        params.canonical_grid = data.get('canonical_grid', False)
         
         return params
\ No newline at end of file
@@ -0,0 +1,415 @@
+"""
+Coordinator and workers for distributing optimization tasks over several machines.
+
+The :class:`SocketExecutor` is the executor of the ``'socket'`` backend of
+:class:`calculation.worker_pool.WorkerPool`. It listens on a TCP address (``'host:port'``) or a Unix
+socket (``'unix:/path'``) and hands the submitted tasks, e.g. chunks of optimization starts, to the
+workers that connect to it. Workers are started with :func:`run_worker` (``hrcalc worker``) on any machine
+that can reach the coordinator, several workers per machine use several cores.
+
+Tasks and results are pickled, so all connections are authenticated with a shared key (HMAC challenge
+of :mod:`multiprocessing.connection`). A worker sends heartbeats while it runs a task. If a worker
+disconnects or misses its heartbeats, its task is retried on another worker.
+"""
+
+from collections import deque
+from concurrent.futures import Future
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Connection, answer_challenge, deliver_challenge
+import itertools
+import os
+import socket
+import threading
+import time
+
+# environment variable with the shared authentication key
+AUTHKEY_VARIABLE = 'HRCALC_AUTHKEY'
+
+# seconds between two checks of the shutdown flag while waiting for connections
+ACCEPT_INTERVAL = 0.2
+
+
+class WorkerLostError(RuntimeError):
+    """Raised for a task that could not be completed because its workers were lost."""
+
+
+def parse_address(address):
+    """
+    Converts an address string to the address of :mod:`multiprocessing.connection`.
+
+    Args:
+        address (str | tuple): ``'host:port'``, ``'unix:/path'`` or an address tuple (host, port).
+
+    Returns:
+        tuple | str: (host, port) for TCP, the socket path for Unix sockets.
+
+    Raises:
+        ValueError: If the address has no port.
+    """
+    if isinstance(address, tuple):
+        return address
+    if address.startswith('unix:'):
+        return address[len('unix:'):]
+    host, separator, port = address.rpartition(':')
+    if not separator:
+        raise ValueError(f"Invalid address '{address}'. Use 'host:port' or 'unix:/path'.")
+    return (host or 'localhost', int(port))
+
+
+def get_authkey(authkey=None) -> bytes:
+    """
+    Returns the shared authentication key.
+
+    Args:
+        authkey (str | bytes, optional): Key, defaults to the environment variable ``HRCALC_AUTHKEY``.
+
+    Returns:
+        bytes: The key.
+
+    Raises:
+        ValueError: If no key is given.
+    """
+    if authkey is None:
+        authkey = os.environ.get(AUTHKEY_VARIABLE)
+    if not authkey:
+        raise ValueError(f"An authentication key is required, pass it or set {AUTHKEY_VARIABLE}.")
+    return authkey.encode() if isinstance(authkey, str) else bytes(authkey)
+
+
+class _Task():
+    """A submitted task with its future and the number of lost attempts."""
+
+    __slots__ = ('id', 'future', 'fn', 'args', 'kwargs', 'attempts')
+
+    def __init__(self, task_id, future, fn, args, kwargs):
+        self.id = task_id
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.attempts = 0
+
+
+class SocketExecutor():
+    """
+    Executor that runs tasks on remote workers connected over sockets.
+
+    It implements the parts of ``concurrent.futures.Executor`` used by
+    :class:`calculation.worker_pool.WorkerPool`. Every connected worker runs one task at a time.
+
+    Attributes:
+        address (tuple | str): Address the coordinator listens on (with the actual port for port 0).
+        heartbeat_timeout (float): Seconds without a message from a busy worker until it is considered lost.
+        max_retries (int): How often a task is retried after its worker was lost.
+        num_workers (int): Number of connected workers.
+        workers_lost (int): Number of workers lost while running a task.
+        retries (int): Number of retried tasks.
+    """
+
+    def __init__(self, address='localhost:0', authkey=None, heartbeat_timeout: float = 10.0, max_retries: int = 2):
+        """
+        Starts listening for workers.
+
+        Args:
+            address (str | tuple): ``'host:port'`` or ``'unix:/path'``, port 0 picks a free port.
+            authkey (str | bytes, optional): Shared key, defaults to ``HRCALC_AUTHKEY``.
+            heartbeat_timeout (float): Seconds without a message from a busy worker until it is lost.
+            max_retries (int): How often a task is retried after its worker was lost.
+        """
+        self.authkey = get_authkey(authkey)
+        address = parse_address(address)
+        if isinstance(address, tuple):
+            self._socket = socket.create_server(address)
+        else:
+            self._socket = socket.socket(socket.AF_UNIX)
+            self._socket.bind(address)
+            self._socket.listen()
+        # accept() returns regularly, so the accepting thread notices a shutdown
+        self._socket.settimeout(ACCEPT_INTERVAL)
+        self.address = self._socket.getsockname()
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_retries = max_retries
+        self.num_workers = 0
+        self.workers_lost = 0
+        self.retries = 0
+
+        self._tasks = deque()
+        self._running = 0
+        self._ids = itertools.count()
+        self._condition = threading.Condition()
+        self._shutdown = False
+        self._threads = []
+        self._accept_thread = threading.Thread(target=self._accept_workers, daemon=True)
+        self._accept_thread.start()
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """Queues fn(*args, **kwargs) for the next free worker."""
+        future = Future()
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("Cannot submit tasks after shutdown.")
+            self._tasks.append(_Task(next(self._ids), future, fn, args, kwargs))
+            self._condition.notify()
+        return future
+
+    def wait_for_workers(self, n: int, timeout: float = None) -> bool:
+        """
+        Blocks until at least n workers are connected.
+
+        Args:
+            n (int): Number of workers.
+            timeout (float, optional): Maximum time to wait in seconds.
+
+        Returns:
+            bool: True if the workers are connected, False on timeout.
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self.num_workers >= n, timeout)
+
+    def _accept_workers(self):
+        """Accepts connections and serves every worker in its own thread."""
+        while not self._shutdown:
+            try:
+                sock, _ = self._socket.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                # the socket was closed by shutdown
+                return
+            sock.setblocking(True)
+            thread = threading.Thread(target=self._serve, args=(Connection(sock.detach()),), daemon=True)
+            with self._condition:
+                self._threads = [t for t in self._threads if t.is_alive()] + [thread]
+            thread.start()
+
+    def _next_task(self):
+        """Returns the next task to run, None once the executor is shut down and no task is left."""
+        with self._condition:
+            while True:
+                self._condition.wait_for(lambda: self._tasks or self._shutdown)
+                if not self._tasks:
+                    return None
+                task = self._tasks.popleft()
+                # retried tasks are already running
+                if task.attempts == 0 and not task.future.set_running_or_notify_cancel():
+                    continue
+                self._running += 1
+                return task
+
+    def _serve(self, conn):
+        """Sends tasks to one worker until the executor shuts down or the worker is lost."""
+        # the handshake runs in the thread of the connection, so a stalled client cannot block others
+        try:
+            deliver_challenge(conn, self.authkey)
+            answer_challenge(conn, self.authkey)
+        except (AuthenticationError, EOFError, OSError):
+            conn.close()
+            return
+        with self._condition:
+            self.num_workers += 1
+            self._condition.notify_all()
+        try:
+            while True:
+                task = self._next_task()
+                if task is None:
+                    conn.send(('shutdown',))
+                    return
+                try:
+                    conn.send(('task', task.id, task.fn, task.args, task.kwargs))
+                    _, _, ok, value = self._wait_for_result(conn)
+                except (OSError, EOFError):
+                    self._retry(task)
+                    return
+                except Exception as e:
+                    # the task or its result could not be pickled
+                    ok, value = False, e
+                if ok:
+                    task.future.set_result(value)
+                else:
+                    task.future.set_exception(value)
+                self._task_done()
+        except (OSError, EOFError):
+            pass
+        finally:
+            conn.close()
+            with self._condition:
+                self.num_workers -= 1
+                self._condition.notify_all()
+
+    def _wait_for_result(self, conn):
+        """Receives messages until the result arrives, raises TimeoutError if the heartbeats stop."""
+        while True:
+            if not conn.poll(self.heartbeat_timeout):
+                raise TimeoutError("Worker missed its heartbeats.")
+            message = conn.recv()
+            if message[0] != 'heartbeat':
+                return message
+
+    def _retry(self, task):
+        """Requeues the task of a lost worker or fails it after `max_retries` attempts."""
+        with self._condition:
+            self.workers_lost += 1
+            self._running -= 1
+            task.attempts += 1
+            if task.attempts > self.max_retries:
+                task.future.set_exception(WorkerLostError(f"Task lost {task.attempts} times with its worker."))
+            else:
+                self.retries += 1
+                self._tasks.appendleft(task)
+            self._condition.notify_all()
+
+    def _task_done(self):
+        with self._condition:
+            self._running -= 1
+            self._condition.notify_all()
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False, timeout: float = 5.0):
+        """
+        Stops accepting tasks and workers. Connected workers are told to exit.
+
+        Args:
+            wait (bool): Wait for the queued and running tasks while workers are connected.
+            cancel_futures (bool): Cancel all queued tasks.
+            timeout (float): Maximum time in seconds to wait for the threads of the executor to finish
+                after the tasks are done.
+        """
+        with self._condition:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            if cancel_futures:
+                while self._tasks:
+                    task = self._tasks.popleft()
+                    if not task.future.cancel():
+                        task.future.set_exception(WorkerLostError("Executor was shut down."))
+            self._condition.notify_all()
+            if wait:
+                self._condition.wait_for(lambda: not (self._tasks or self._running) or not self.num_workers)
+
+        self._socket.close()
+        if isinstance(self.address, str):
+            try:
+                os.unlink(self.address)
+            except OSError:
+                pass
+
+        # idle workers receive their shutdown message, busy ones finish their task first
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            threads = [self._accept_thread] + self._threads
+        for thread in threads:
+            thread.join(max(0., deadline - time.monotonic()))
+
+
+def _connect(address, authkey, timeout):
+    """
+    Connects to a coordinator and authenticates, waiting at most timeout for the connection and the challenge.
+
+    Raises:
+        TimeoutError: If the coordinator accepts the connection but does not start the handshake in time.
+    """
+    address = parse_address(address)
+    if isinstance(address, tuple):
+        sock = socket.create_connection(address, timeout=timeout)
+    else:
+        sock = socket.socket(socket.AF_UNIX)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(address)
+        except OSError:
+            sock.close()
+            raise
+    sock.setblocking(True)
+    conn = Connection(sock.detach())
+    try:
+        # the coordinator sends its challenge first
+        if not conn.poll(timeout):
+            raise TimeoutError("Coordinator did not start the handshake.")
+        answer_challenge(conn, authkey)
+        deliver_challenge(conn, authkey)
+    except BaseException:
+        conn.close()
+        raise
+    return conn
+
+
+def _send_heartbeats(send, stop, interval):
+    """Sends heartbeats until stop is set."""
+    while not stop.wait(interval):
+        try:
+            send(('heartbeat',))
+        except OSError:
+            return
+
+
+def run_worker(address, authkey=None, heartbeat_interval: float = 1.0, connect_timeout: float = 30.0,
+               blas_threads: int = 1) -> int:
+    """
+    Connects to a coordinator and runs its tasks until it shuts down.
+
+    The worker pins its BLAS threads and warms up the calculation stack before it connects.
+
+    Args:
+        address (str | tuple): Address of the coordinator, ``'host:port'`` or ``'unix:/path'``.
+        authkey (str | bytes, optional): Shared key, defaults to ``HRCALC_AUTHKEY``.
+        heartbeat_interval (float): Seconds between two heartbeats while a task runs.
+        connect_timeout (float): Seconds to retry connecting, so workers can start before the coordinator.
+            It also bounds the handshake with a coordinator that accepted the connection.
+        blas_threads (int, optional): BLAS threads of the worker, None to leave the libraries unchanged.
+
+    Returns:
+        int: Number of completed tasks.
+    """
+    from .worker_pool import _init_worker
+    authkey = get_authkey(authkey)
+    _init_worker(blas_threads)
+
+    deadline = time.monotonic() + connect_timeout
+    while True:
+        try:
+            conn = _connect(address, authkey, connect_timeout)
+            break
+        except (ConnectionRefusedError, FileNotFoundError):
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+    lock = threading.Lock()
+
+    def send(message):
+        with lock:
+            conn.send(message)
+
+    num_tasks = 0
+    with conn:
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                break
+            if message[0] == 'shutdown':
+                break
+            _, task_id, fn, args, kwargs = message
+
+            stop = threading.Event()
+            heartbeat = threading.Thread(target=_send_heartbeats, args=(send, stop, heartbeat_interval), daemon=True)
+            heartbeat.start()
+            try:
+                result = (True, fn(*args, **kwargs))
+            except Exception as e:
+                result = (False, e)
+            finally:
+                stop.set()
+                heartbeat.join()
+
+            try:
+                try:
+                    send(('result', task_id, *result))
+                except (OSError, EOFError):
+                    raise
+                except Exception as e:
+                    send(('result', task_id, False, RuntimeError(f"Result could not be sent: {e!r}")))
+            except (OSError, EOFError):
+                break
+            num_tasks += 1
+    return num_tasks
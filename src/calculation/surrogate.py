@@ -0,0 +1,106 @@
+"""
+Surrogate model of the resonator properties for surrogate-assisted optimization.
+
+The resonance frequency, the Q-factor and the normalized peak absorption area are smooth functions of
+the design parameters ``[x, y, z, radius, length, xi]``, in logarithmic coordinates close to power laws.
+:class:`SurrogateModel` interpolates :math:`\\log_{10} f_{\\mathrm{res}}`, :math:`\\log_{10} Q` and the
+peak area of simulated designs with a radial basis function interpolator
+(:class:`scipy.interpolate.RBFInterpolator`), so the objective of
+:class:`calculation.optimizer.Optimizer` can be predicted for thousands of designs in milliseconds.
+The objective itself is not interpolated, its penalty on :math:`|\\log_{10}(f/f_t)|` has a kink at the target.
+See :meth:`calculation.optimizer.Optimizer.search_surrogate`.
+"""
+
+import numpy as np
+from scipy.interpolate import RBFInterpolator
+
+
+class SurrogateModel():
+    """
+    RBF interpolation of resonance frequency, Q-factor and normalized peak area.
+
+    Designs are mapped to the unit cube of their logarithmic bounds (`to_unit`), all parameters are
+    positive and span up to three decades.
+
+    Attributes:
+        bounds (list): (min, max) per parameter.
+        kernel (str): Kernel of the RBF interpolator.
+        smoothing (float): Smoothing of the RBF interpolator, 0 interpolates exactly.
+        num_predictions (int): Number of designs predicted so far (surrogate evaluations).
+    """
+
+    def __init__(self, bounds, kernel: str = 'thin_plate_spline', smoothing: float = 1e-8):
+        """
+        Creates an untrained surrogate.
+
+        Args:
+            bounds (list): (min, max) per parameter, all positive.
+            kernel (str): Kernel of :class:`scipy.interpolate.RBFInterpolator`.
+            smoothing (float): Smoothing of the interpolator.
+        """
+        self.bounds = [tuple(float(v) for v in bound) for bound in bounds]
+        self.kernel = kernel
+        self.smoothing = smoothing
+        self.num_predictions = 0
+        self._log_low, self._log_high = np.log(np.array(self.bounds)).T
+        self._interpolator = None
+
+    def to_unit(self, designs) -> np.ndarray:
+        """Maps designs of shape (N, 6) to the unit cube of the logarithmic bounds."""
+        return (np.log(np.asarray(designs, dtype=float)) - self._log_low) / (self._log_high - self._log_low)
+
+    def from_unit(self, unit) -> np.ndarray:
+        """Maps points of the unit cube back to designs, the inverse of `to_unit`."""
+        return np.exp(self._log_low + np.asarray(unit, dtype=float) * (self._log_high - self._log_low))
+
+    def fit(self, designs, f_resonance, q_factor, peak_area_norm):
+        """
+        Trains the surrogate on simulated designs. Designs without a valid Q-factor are ignored.
+
+        Args:
+            designs (array_like): Parameters per design, shape (N, 6).
+            f_resonance (array_like): Resonance frequencies (Hz).
+            q_factor (array_like): Q-factors, NaN where not available.
+            peak_area_norm (array_like): Peak absorption areas relative to their theoretical maximum.
+
+        Raises:
+            ValueError: If fewer valid designs than needed for the linear polynomial term are given.
+        """
+        designs = np.asarray(designs, dtype=float)
+        f_resonance, q_factor, peak_area_norm = (np.asarray(v, dtype=float)
+                                                 for v in (f_resonance, q_factor, peak_area_norm))
+        valid = np.isfinite(f_resonance) & np.isfinite(q_factor) & (q_factor > 0) & np.isfinite(peak_area_norm)
+        if valid.sum() <= designs.shape[1]:
+            raise ValueError(f"The surrogate needs more than {designs.shape[1]} valid designs, got {valid.sum()}.")
+        values = np.column_stack((np.log10(f_resonance[valid]), np.log10(q_factor[valid]), peak_area_norm[valid]))
+        self._interpolator = RBFInterpolator(self.to_unit(designs[valid]), values, kernel=self.kernel,
+                                             smoothing=self.smoothing, degree=1)
+
+    def predict_unit(self, unit) -> tuple:
+        """
+        Predicts the properties of points of the unit cube, see `predict`.
+
+        Args:
+            unit (array_like): Points of shape (N, 6).
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: f_resonance, q_factor and peak_area_norm.
+        """
+        if self._interpolator is None:
+            raise RuntimeError("The surrogate is not trained, call fit first.")
+        unit = np.atleast_2d(unit)
+        self.num_predictions += len(unit)
+        log_f, log_q, peak_area_norm = self._interpolator(unit).T
+        return 10**log_f, 10**log_q, peak_area_norm
+
+    def predict(self, designs) -> tuple:
+        """
+        Predicts the properties of designs.
+
+        Args:
+            designs (array_like): Parameters per design, shape (N, 6).
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: f_resonance, q_factor and peak_area_norm.
+        """
+        return self.predict_unit(self.to_unit(np.atleast_2d(designs)))
@@ -0,0 +1,351 @@
+"""
+Persistent worker pools for the optimizer.
+
+Creating a ``ProcessPoolExecutor`` per optimization means every worker cold-imports traits, scipy and
+matplotlib again. The pools of this module are created once per configuration, warmed up by an
+initializer that imports the calculation stack and evaluates one objective, and reused by all following
+optimizations of the process. Work is submitted in chunks to amortize pickling and scheduling overhead.
+
+Four backends are available:
+
+- ``'process'``: a ``ProcessPoolExecutor``, the default for CPU bound multi-start optimizations
+- ``'thread'``: a ``ThreadPoolExecutor``, useful where processes are not available
+- ``'serial'``: runs the tasks one after another in the calling thread when their results are
+  requested, useful for debugging and profiling
+- ``'socket'``: a :class:`calculation.socket_pool.SocketExecutor` that distributes the tasks to workers
+  on other machines, see :func:`calculation.socket_pool.run_worker`
+
+The BLAS libraries used by NumPy start one thread per core by default. With one worker per core this
+oversubscribes the machine, so the number of BLAS threads is pinned for the workers.
+"""
+
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import atexit
+import math
+import os
+import threading
+import time
+from .socket_pool import SocketExecutor, get_authkey
+
+BACKENDS = ('process', 'thread', 'serial', 'socket')
+
+# environment variables read by the common BLAS / OpenMP implementations
+BLAS_THREAD_VARIABLES = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                         'VECLIB_MAXIMUM_THREADS', 'NUMEXPR_NUM_THREADS')
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def pin_blas_threads(n_threads: int):
+    """
+    Limits the number of BLAS threads of the current process.
+
+    The environment variables only take effect for libraries that are loaded afterwards (e.g. in newly
+    spawned workers). If the optional package ``threadpoolctl`` is installed, already loaded libraries
+    are limited as well.
+
+    Args:
+        n_threads (int): Number of BLAS threads (>= 1).
+    """
+    for name in BLAS_THREAD_VARIABLES:
+        os.environ[name] = str(n_threads)
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return
+    threadpool_limits(n_threads)
+
+
+def warm_up():
+    """
+    Imports the calculation stack and evaluates one objective, so that the first real task of a worker
+    does not pay for imports and cache setup.
+    """
+    from calculation.optimizer import Optimizer
+    Optimizer(f_target=300.0, q_target=4.0).objective([0.5, 0.4, 0.3, 0.03, 0.1, 100.0])
+
+
+def _init_worker(blas_threads):
+    """Initializer of every worker: pins the BLAS threads and warms up the calculation stack."""
+    if blas_threads is not None:
+        pin_blas_threads(blas_threads)
+    warm_up()
+
+
+def _run_chunk(fn, items):
+    """Applies fn to every item of a chunk inside a worker."""
+    return [fn(item) for item in items]
+
+
+class DeferredFuture(Future):
+    """
+    Future of the serial backend that runs its task in the calling thread on first request.
+
+    Pending deferred futures can be cancelled like the futures of the other backends.
+    """
+
+    def __init__(self, fn, args, kwargs):
+        super().__init__()
+        self._call = (fn, args, kwargs)
+
+    def run(self):
+        """Runs the task unless it was cancelled or already done."""
+        if self.done() or not self.set_running_or_notify_cancel():
+            return
+        fn, args, kwargs = self._call
+        try:
+            self.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            self.set_exception(e)
+
+    def result(self, timeout=None):
+        self.run()
+        return super().result(timeout)
+
+    def exception(self, timeout=None):
+        self.run()
+        return super().exception(timeout)
+
+
+class SerialExecutor():
+    """
+    Minimal executor that runs the tasks in the calling thread.
+
+    It implements the parts of ``concurrent.futures.Executor`` used by :class:`WorkerPool`.
+    """
+
+    def __init__(self, initializer=None, initargs=()):
+        if initializer is not None:
+            initializer(*initargs)
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """Returns a future that runs fn when its result is requested."""
+        return DeferredFuture(fn, args, kwargs)
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        """Nothing to release."""
+        pass
+
+
+class WorkerPool():
+    """
+    Reusable, chunked pool of warm workers.
+
+    Attributes:
+        backend (str): 'process', 'thread', 'serial' or 'socket'.
+        max_workers (int): Number of workers (expected remote workers for 'socket').
+        blas_threads (int): BLAS threads per worker, None to leave the libraries unchanged.
+        address (tuple | str): Address the 'socket' backend listens on, None for the other backends.
+    """
+
+    def __init__(self, backend: str = 'process', max_workers: int = None, blas_threads: int = 1,
+                 address=None, authkey=None):
+        """
+        Creates the pool and starts its workers.
+
+        Args:
+            backend (str): 'process', 'thread', 'serial' or 'socket'.
+            max_workers (int, optional): Number of workers, defaults to the number of CPUs (1 for 'serial').
+                For 'socket' it is the expected number of remote workers, used for the chunk sizes.
+            blas_threads (int, optional): BLAS threads per worker, None to leave the libraries unchanged.
+                Remote workers set their own, see :func:`calculation.socket_pool.run_worker`.
+            address (str, optional): 'socket' only, ``'host:port'`` or ``'unix:/path'`` to listen on for
+                workers, defaults to a free local port.
+            authkey (str | bytes, optional): 'socket' only, key shared with the workers, defaults to the
+                environment variable ``HRCALC_AUTHKEY``.
+
+        Raises:
+            ValueError: If the backend is unknown or max_workers is smaller than 1.
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Invalid backend '{backend}'. Choose one of {', '.join(BACKENDS)}.")
+        if max_workers is None:
+            max_workers = 1 if backend == 'serial' else (os.cpu_count() or 1)
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1.")
+
+        self.backend = backend
+        self.max_workers = max_workers
+        self.blas_threads = blas_threads
+        self.address = address
+        self._authkey = authkey
+        self._executor = None
+        self._start()
+
+    def _start(self):
+        """Creates the executor and eagerly starts and warms up all workers."""
+        if self.backend == 'process':
+            # workers inherit the environment, so the pinning is in place before they load BLAS
+            saved = {name: os.environ.get(name) for name in BLAS_THREAD_VARIABLES}
+            if self.blas_threads is not None:
+                for name in BLAS_THREAD_VARIABLES:
+                    os.environ[name] = str(self.blas_threads)
+            try:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                                     initargs=(self.blas_threads,))
+                # workers are started on demand, submitting one task per worker starts all of them
+                for future in [self._executor.submit(os.getpid) for _ in range(self.max_workers)]:
+                    future.result()
+            finally:
+                for name, value in saved.items():
+                    if value is None:
+                        os.environ.pop(name, None)
+                    else:
+                        os.environ[name] = value
+        elif self.backend == 'thread':
+            # threads share the BLAS of this process, only warm up the imports
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, initializer=warm_up)
+        elif self.backend == 'socket':
+            # remote workers warm up themselves before they connect
+            self._executor = SocketExecutor(self.address or 'localhost:0', self._authkey)
+            self.address = self._executor.address
+        else:
+            self._executor = SerialExecutor(initializer=warm_up)
+
+    def default_chunksize(self, n_items: int) -> int:
+        """
+        Returns a chunk size that gives every worker about four chunks.
+
+        Args:
+            n_items (int): Number of items to process.
+
+        Returns:
+            int: Chunk size (>= 1).
+        """
+        return max(1, math.ceil(n_items / (4 * self.max_workers)))
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """
+        Submits a single task.
+
+        Returns:
+            Future: Future of the result.
+        """
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def submit_chunks(self, fn, items, chunksize: int = None) -> dict:
+        """
+        Splits items into chunks and submits one task per chunk.
+
+        For the process backend fn and the items must be picklable; fn is pickled once per chunk.
+
+        Args:
+            fn (callable): Function applied to every item.
+            items (Sequence): Items to process.
+            chunksize (int, optional): Items per task, see :meth:`default_chunksize`.
+
+        Returns:
+            dict: Maps each future to the list of items of its chunk. A future's result is the list of
+            ``fn(item)`` in the same order.
+        """
+        items = list(items)
+        if chunksize is None:
+            chunksize = self.default_chunksize(len(items))
+        futures = {}
+        for start in range(0, len(items), chunksize):
+            chunk = items[start:start + chunksize]
+            futures[self._executor.submit(_run_chunk, fn, chunk)] = chunk
+        return futures
+
+    def as_completed(self, futures, timeout: float = None):
+        """
+        Yields futures of this pool as they complete, like ``concurrent.futures.as_completed``.
+
+        The serial backend runs the pending tasks in submission order while iterating, so cancelling
+        the remaining futures inside the loop skips them.
+
+        Args:
+            futures (Iterable[Future]): Futures returned by this pool.
+            timeout (float, optional): Seconds from the call after which no further future is awaited.
+                The serial backend does not interrupt a running task, it only starts no new one.
+
+        Yields:
+            Future: Completed (or cancelled) futures.
+
+        Raises:
+            TimeoutError: If futures are still pending after `timeout`.
+        """
+        if self.backend != 'serial':
+            yield from as_completed(futures, timeout)
+            return
+        end = time.monotonic() + timeout if timeout is not None else None
+        for future in list(futures):
+            if end is not None and not future.done() and time.monotonic() >= end:
+                raise TimeoutError("Futures did not complete in time.")
+            future.run()
+            yield future
+
+    def map(self, fn, items, chunksize: int = None) -> list:
+        """
+        Applies fn to all items in parallel.
+
+        Args:
+            fn (callable): Function applied to every item.
+            items (Sequence): Items to process.
+            chunksize (int, optional): Items per task, see :meth:`default_chunksize`.
+
+        Returns:
+            list: Results in the order of items.
+        """
+        futures = self.submit_chunks(fn, items, chunksize)
+        return [result for future in futures for result in future.result()]
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stops all workers. The pool cannot be used afterwards.
+
+        Args:
+            wait (bool): Wait for running tasks to finish.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+
+def get_pool(backend: str = 'process', max_workers: int = None, blas_threads: int = 1, address=None,
+             authkey=None) -> WorkerPool:
+    """
+    Returns the shared pool for a configuration, creating it on first use.
+
+    Back-to-back optimizations in the same process reuse the warm workers. All shared pools are shut
+    down when the interpreter exits.
+
+    Args:
+        backend (str): 'process', 'thread', 'serial' or 'socket'.
+        max_workers (int, optional): Number of workers, defaults to the number of CPUs.
+        blas_threads (int, optional): BLAS threads per worker.
+        address (str, optional): Listening address of the 'socket' backend.
+        authkey (str | bytes, optional): Key shared with the workers of the 'socket' backend.
+
+    Returns:
+        WorkerPool: The shared pool.
+
+    Raises:
+        ValueError: If the running 'socket' pool for the address listens with a different authkey.
+    """
+    key = (backend, max_workers, blas_threads, address)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is not None and pool._executor is not None and backend == 'socket' \
+                and pool._executor.authkey != get_authkey(authkey):
+            # a second pool could not listen on the same address, shut the first one down before
+            raise ValueError(f"The socket pool on {pool.address} was created with a different authkey.")
+        if pool is None or pool._executor is None:
+            pool = _pools[key] = WorkerPool(backend, max_workers, blas_threads, address, authkey)
+        return pool
+
+
+@atexit.register
+def shutdown_pools():
+    """Shuts down all shared pools."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=False)
+        _pools.clear()
@@ -1,7 +1,7 @@
 import click
 import warnings
-from app_control import optimizer, start_gui
-from io_tools import save_to_json
+from app_control import optimizer, optimize_batch, start_gui, build_atlas, start_workers
+from io_tools import save_to_json, load_targets
 
 """
 This is the entry point for the command line interface (CLI) of the Helmholtz Resonator Calculator project. 
@@ -26,15 +26,63 @@ def gui():
 @click.argument('freq', type=float)
 @click.argument('q_factor', type=float)
 @click.option('--save', type=str, help="If a path (string) is given, the results will be saved as a .json file.")
-def optimize(freq, q_factor, save):
+@click.option('--method', type=click.Choice(['multistart', 'global', 'surrogate']), default='multistart', show_default=True,
+              help="'multistart' runs many local optimizations in parallel, 'global' a vectorized differential evolution on one core, "
+                   "'surrogate' only simulates designs proposed by a surrogate model.")
+@click.option('--seed', type=int, default=None, help="Random seed of the initial design or the 'global' method.")
+@click.option('--starts', type=int, default=400, show_default=True, help="Number of local optimizations of the 'multistart' method.")
+@click.option('--backend', type=click.Choice(['process', 'thread', 'serial', 'socket']), default='process', show_default=True,
+              help="Worker backend of the 'multistart' method, 'socket' distributes the starts to 'hrcalc worker' processes.")
+@click.option('--address', type=str, default='0.0.0.0:5555', show_default=True,
+              help="Address the 'socket' backend listens on for workers, 'host:port' or 'unix:/path'.")
+@click.option('--authkey', type=str, envvar='HRCALC_AUTHKEY', default=None,
+              help="Key shared with the workers of the 'socket' backend, defaults to $HRCALC_AUTHKEY.")
+@click.option('--workers', type=int, default=None, help="Number of workers of the 'multistart' method, defaults to the number of CPUs.")
+@click.option('--stop-count', type=int, default=None,
+              help="Stop the 'multistart' method once this many distinct results are within 0.1 % of the best one. Disabled by default.")
+@click.option('--patience', type=int, default=None,
+              help="Stop the 'multistart' method after this many starts without improvement.")
+@click.option('--max-time', type=float, default=None,
+              help="Wall-clock budget of the 'multistart' method in seconds, the best design found so far is returned.")
+@click.option('--max-evaluations', type=int, default=None,
+              help="Budget of objective evaluations of the 'multistart' method across all workers.")
+@click.option('--atlas', type=click.Path(exists=True, dir_okay=False), default=None,
+              help="Design atlas (.npz) created with 'build-atlas'. Warm starts from its nearest designs instead of a full search.")
+@click.option('--polish', type=int, default=1, show_default=True,
+              help="Number of nearest atlas designs refined by a local optimization, 0 returns the best atlas design as it is.")
+@click.option('--eliminate-volume', is_flag=True,
+              help="Solve the cavity depth from the target frequency, so local optimizations only move the other parameters.")
+@click.option('--multi-fidelity', is_flag=True,
+              help="Optimize the frequency-grid objective on a coarse grid first and polish at full resolution, "
+                   "instead of the grid-free solver.")
+@click.option('--no-cache', is_flag=True,
+              help="Always run the optimization instead of reusing the cached result of an identical request.")
+@click.option('--checkpoint', type=str, default=None,
+              help="Periodically save the finished starts of the 'multistart' method to this .npz file.")
+@click.option('--resume', is_flag=True,
+              help="Continue the 'multistart' method from the file given with --checkpoint.")
+@click.option('--trace', type=click.Path(file_okay=False), default=None,
+              help="Append every objective evaluation to binary trace files in this directory (one file per worker).")
+def optimize(freq, q_factor, save, method, seed, starts, backend, address, authkey, workers, stop_count, patience,
+             max_time, max_evaluations, atlas, polish, eliminate_volume, multi_fidelity, no_cache, checkpoint, resume,
+             trace):
     """
     Run optimization
     """
+    if resume and not checkpoint:
+        raise click.UsageError("--resume requires --checkpoint.")
+    if multi_fidelity and eliminate_volume:
+        raise click.UsageError("--multi-fidelity cannot be combined with --eliminate-volume.")
 
     with warnings.catch_warnings():
         warnings.simplefilter("ignore", category=RuntimeWarning)
         click.echo("Running optimizer...")
-        best_sim = optimizer(freq, q_factor)
+        best_sim = optimizer(freq, q_factor, method='atlas' if atlas else method, seed=seed, backend=backend,
+                             workers=workers, stop_count=stop_count or None, patience=patience, num_trials=starts,
+                             atlas=atlas, eliminate_volume=eliminate_volume, cache=not no_cache,
+                             checkpoint=checkpoint, resume=resume, address=address, authkey=authkey, polish=polish,
+                             max_time=max_time, max_evaluations=max_evaluations, trace=trace,
+                             multi_fidelity=multi_fidelity)
 
     # check string
     if save:
@@ -49,6 +97,70 @@ def optimize(freq, q_factor, save):
 
     
 
+@cli.command('optimize-batch')
+@click.argument('targets', type=click.Path(exists=True, dir_okay=False))
+@click.option('--output', type=str, default=None, help="Write the results to this .jsonl file instead of the console.")
+@click.option('--starts', type=int, default=64, show_default=True, help="Number of cold starts per target.")
+@click.option('--warm-starts', type=int, default=5, show_default=True,
+              help="Warm starts a finished target gives to each of its two nearest pending targets.")
+@click.option('--seed', type=int, default=None, help="Random seed of the initial designs.")
+@click.option('--backend', type=click.Choice(['process', 'thread', 'serial', 'socket']), default='process', show_default=True,
+              help="Worker backend shared by all targets, 'socket' distributes the starts to 'hrcalc worker' processes.")
+@click.option('--address', type=str, default='0.0.0.0:5555', show_default=True,
+              help="Address the 'socket' backend listens on for workers, 'host:port' or 'unix:/path'.")
+@click.option('--authkey', type=str, envvar='HRCALC_AUTHKEY', default=None,
+              help="Key shared with the workers of the 'socket' backend, defaults to $HRCALC_AUTHKEY.")
+@click.option('--workers', type=int, default=None, help="Number of workers, defaults to the number of CPUs.")
+@click.option('--eliminate-volume', is_flag=True,
+              help="Solve the cavity depth from the target frequency, so local optimizations only move the other parameters.")
+def optimize_batch_command(targets, output, starts, warm_starts, seed, backend, address, authkey, workers,
+                           eliminate_volume):
+    """
+    Run optimization for all targets of a .csv or .jsonl file (columns f_target, q_target)
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        optimize_batch(load_targets(targets), output=output, num_trials=starts, warm_starts=warm_starts, seed=seed,
+                       backend=backend, workers=workers, eliminate_volume=eliminate_volume, address=address,
+                       authkey=authkey)
+
+
+@cli.command('build-atlas')
+@click.argument('path', type=str)
+@click.option('--designs', type=int, default=2**15, show_default=True,
+              help="Number of tabulated designs, rounded up to a power of two.")
+@click.option('--seed', type=int, default=None, help="Random seed of the Sobol design.")
+@click.option('--backend', type=click.Choice(['process', 'thread', 'serial']), default='process', show_default=True,
+              help="Worker backend used to evaluate the designs.")
+@click.option('--workers', type=int, default=None, help="Number of workers, defaults to the number of CPUs.")
+def build_atlas_command(path, designs, seed, backend, workers):
+    """
+    Precompute a design atlas (.npz) for 'optimize --atlas'
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        click.echo("Building design atlas...")
+        build_atlas(path, designs, seed=seed, backend=backend, workers=workers)
+
+
+@cli.command('worker')
+@click.argument('address', type=str)
+@click.option('--processes', type=int, default=1, show_default=True,
+              help="Number of worker processes on this machine, e.g. one per core.")
+@click.option('--authkey', type=str, envvar='HRCALC_AUTHKEY', default=None,
+              help="Key shared with the coordinator, defaults to $HRCALC_AUTHKEY.")
+@click.option('--blas-threads', type=int, default=1, show_default=True, help="BLAS threads per worker process.")
+def worker_command(address, processes, authkey, blas_threads):
+    """
+    Run tasks of an 'optimize --backend socket' coordinator at ADDRESS ('host:port' or 'unix:/path')
+    """
+    if not authkey:
+        raise click.UsageError("An authentication key is required, use --authkey or set HRCALC_AUTHKEY.")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        click.echo(f"Starting {processes} worker(s) for {address}...")
+        start_workers(address, processes, authkey=authkey, blas_threads=blas_threads)
+
 
 if __name__ == "__main__":
     cli()
\ No newline at end of file
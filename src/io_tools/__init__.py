@@ -1,3 +1,4 @@
 from .load_from_json import load_from_json
 from .save_to_json import save_to_json
+from .load_targets import load_targets
 from .export_cad import export_cad
\ No newline at end of file
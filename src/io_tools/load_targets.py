@@ -0,0 +1,28 @@
+import csv
+import json
+
+def load_targets(file_path) -> list:
+    """Load design targets from a CSV or JSON Lines file.
+
+    CSV files need a header with the columns 'f_target' and 'q_target', JSON Lines files (.jsonl) one
+    object with these keys per line. Further columns or keys are ignored.
+
+    Args:
+        file_path (str): file path to the .csv or .jsonl file.
+
+    Returns:
+        list: (f_target, q_target) per target, in the order of the file.
+    """
+
+    with open(file_path, 'r', newline='') as file:
+        if file_path.endswith('.jsonl'):
+            rows = [json.loads(line) for line in file if line.strip()]
+        elif file_path.endswith('.csv'):
+            rows = list(csv.DictReader(file))
+        else:
+            raise ValueError("Targets must be given as a .csv or .jsonl file.")
+
+    try:
+        return [(float(row['f_target']), float(row['q_target'])) for row in rows]
+    except KeyError as e:
+        raise ValueError(f"Missing column {e} in {file_path}.")
@@ -0,0 +1,69 @@
+import unittest
+import numpy as np
+from calculation import BatchOptimizer, WorkerPool
+
+
+class TestBatchOptimizer(unittest.TestCase):
+    """
+    Tests the batch inverse design on a shared pool.
+    """
+
+    def test_invalid_target(self):
+        with self.assertRaises(ValueError):
+            BatchOptimizer([(300.0, 5.0), (-100.0, 5.0)])
+
+    def test_neighbours(self):
+        batch = BatchOptimizer([(100.0, 5.0), (1000.0, 5.0), (120.0, 5.0), (150.0, 5.0)])
+        self.assertEqual(batch.neighbours(0, 2), [2, 3])
+        self.assertEqual(batch.neighbours(1, 1), [3])
+        self.assertEqual(len(BatchOptimizer([(100.0, 5.0)]).neighbours(0, 2)), 0)
+
+    def test_warm_starts_move_to_target_frequency(self):
+        batch = BatchOptimizer([(200.0, 5.0), (250.0, 5.0)])
+        x = [0.4, 0.3, 0.2, 0.03, 0.1, 100.0]
+        starts = batch.warm_starts(1, x, 5)
+        self.assertEqual(len(starts), 5)
+        # the first warm start only changes the depth z
+        self.assertNotAlmostEqual(starts[0][2], x[2])
+        np.testing.assert_allclose(np.delete(starts[0], 2), np.delete(x, 2))
+        for start in starts:
+            for value, (low, high) in zip(start, batch.optimizers[1].bounds):
+                self.assertTrue(low <= value <= high)
+
+    def test_run_streams_every_target_once(self):
+        targets = [(300.0, 5.0), (200.0, 4.0), (250.0, 5.0)]
+        with WorkerPool('serial') as pool:
+            batch = BatchOptimizer(targets, pool=pool)
+            finished = list(batch.run(num_trials=4, warm_starts=2, seed=0))
+
+        self.assertEqual(sorted(index for index, _ in finished), [0, 1, 2])
+        # the lowest frequency is finished first and warm-starts its neighbours
+        self.assertEqual(finished[0][0], 1)
+        self.assertEqual(batch.num_warm_starts[1], 0)
+        self.assertGreater(batch.num_warm_starts[2], 0)
+        for index, res in finished:
+            self.assertEqual(batch.num_starts[index], 4 + batch.num_warm_starts[index])
+            self.assertIs(batch.optimizers[index].best_result, res)
+            self.assertGreater(batch.optimizers[index].cache_misses, 0)
+            self.assertTrue(np.isfinite(res.fun))
+
+    def test_targets_draw_independent_designs(self):
+        def first_starts(seed):
+            batch = BatchOptimizer([(200.0, 5.0), (200.0, 5.0), (250.0, 5.0)], pool=WorkerPool('serial'))
+            designs = {}
+            for index, optimizer in enumerate(batch.optimizers):
+                def generate(num_trials, sampling, seed=None, index=index, generate=optimizer.generate_initial_design):
+                    designs[index] = generate(num_trials, sampling, seed=seed)
+                    return designs[index]
+                optimizer.generate_initial_design = generate
+            list(batch.run(num_trials=2, warm_starts=0, seed=seed))
+            return [designs[i] for i in range(len(batch))]
+
+        designs = first_starts(0)
+        # identical targets do not share their starting points
+        self.assertFalse(np.allclose(designs[0], designs[1]))
+        np.testing.assert_allclose(designs, first_starts(0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import numpy as np
+from calculation import BatchSimulation, Simulation, Resonator, SimulationParameters, Medium, Geometry, Aperture
+
+
+class TestBatchSimulation(unittest.TestCase):
+    """
+    Compares the vectorized BatchSimulation row by row against the scalar Simulation.
+    """
+
+    def setUp(self):
+        self.sim_params = SimulationParameters(medium=Medium(), freq_range=(20, 2000), values_per_octave=100)
+        self.resonators = [
+            Resonator(Geometry(form='cuboid', x=0.5, y=0.3, z=0.2),
+                      Aperture(form='tube', length=0.1, radius=0.05, additional_dampening=True, xi=50)),
+            Resonator(Geometry(form='cylinder', radius=0.1, height=0.2),
+                      Aperture(form='tube', length=0.05, radius=0.02, outer_ending='open')),
+            Resonator(Geometry(form='cuboid', x=0.8, y=0.5, z=0.3),
+                      Aperture(form='slit', length=0.01, width=0.02, height=0.4)),
+            Resonator(Geometry(form='cuboid', x=0.1, y=0.1, z=0.1),
+                      Aperture(form='tube', length=0.02, radius=0.01, amount=3,
+                               additional_dampening=True, xi=500)),
+        ]
+        self.batch = BatchSimulation.from_resonators(self.resonators, self.sim_params)
+        self.batch.calc_all()
+
+    def scalar_sim(self, i):
+        sim = Simulation(self.resonators[i], self.sim_params)
+        sim.calc_all()
+        return sim
+
+    def test_shapes(self):
+        n, f = len(self.resonators), len(self.sim_params.frequencies)
+        self.assertEqual(len(self.batch), n)
+        self.assertEqual(self.batch.absorbtion_area.shape, (n, f))
+        self.assertEqual(self.batch.f_resonance.shape, (n,))
+        self.assertEqual(self.batch.q_factor.shape, (n,))
+
+    def test_absorbtion_area_matches_scalar(self):
+        for i in range(len(self.resonators)):
+            sim = self.scalar_sim(i)
+            np.testing.assert_allclose(self.batch.absorbtion_area[i], sim.absorbtion_area, rtol=1e-12)
+            np.testing.assert_allclose(self.batch.z_friction[i], sim.z_friction, rtol=1e-12)
+
+    def test_resonance_and_q_match_scalar(self):
+        for i in range(len(self.resonators)):
+            sim = self.scalar_sim(i)
+            self.assertEqual(self.batch.f_resonance[i], sim.f_resonance)
+            self.assertAlmostEqual(self.batch.peak_absorbtion_area[i], sim.peak_absorbtion_area, places=12)
+            if sim.q_factor is None:
+                self.assertTrue(np.isnan(self.batch.q_factor[i]))
+            else:
+                self.assertAlmostEqual(self.batch.q_factor[i], sim.q_factor, places=9)
+                self.assertAlmostEqual(self.batch.f_q_low[i], sim.f_q_low, places=9)
+                self.assertAlmostEqual(self.batch.f_q_high[i], sim.f_q_high, places=9)
+
+    def test_struct_of_arrays_input(self):
+        batch = BatchSimulation(
+            self.sim_params,
+            volume=np.full(3, 0.03),
+            area=np.pi * 0.05**2,
+            length=[0.05, 0.1, 0.2],
+            radius=0.05,
+            inner_end_correction=0.6 * 0.05,
+            outer_end_correction=0.85 * 0.05,
+            xi=50)
+        batch.calc_all()
+        self.assertEqual(batch.absorbtion_area.shape, (3, len(self.sim_params.frequencies)))
+        # a longer neck adds mass and lowers the resonance frequency
+        self.assertTrue(np.all(np.diff(batch.f_resonance) < 0))
+
+    def test_mismatched_lengths_raise(self):
+        with self.assertRaises(ValueError):
+            BatchSimulation(self.sim_params, volume=[0.1, 0.2], area=[0.01, 0.02, 0.03],
+                            length=0.1, radius=0.05, inner_end_correction=0.03, outer_end_correction=0.04)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from scipy.optimize import OptimizeResult
+from calculation import Optimizer, WorkerPool
+from calculation.checkpoint import SearchCheckpoint
+
+
+class InterruptedPool(WorkerPool):
+    """Serial pool that is interrupted after the first completed chunk."""
+
+    def as_completed(self, futures, timeout=None):
+        for i, future in enumerate(super().as_completed(futures, timeout)):
+            if i == 1:
+                raise KeyboardInterrupt
+            yield future
+
+
+class TestSearchCheckpoint(unittest.TestCase):
+    """
+    Tests checkpointing and resuming multi-start optimizations.
+    """
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, 'search.npz')
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_save_and_load(self):
+        checkpoint = SearchCheckpoint(self.path, {"f_target": 300.0}, 2**100, np.ones((3, 6)))
+        checkpoint.record(0, OptimizeResult(x=np.arange(6.), fun=-1.5, success=True, nit=7))
+        checkpoint.record(2, None)
+        checkpoint.save()
+
+        loaded = SearchCheckpoint.load(self.path)
+        self.assertEqual(loaded.request, {"f_target": 300.0})
+        self.assertEqual(loaded.seed, 2**100)
+        np.testing.assert_array_equal(loaded.pending(), [1])
+        results = loaded.results()
+        self.assertEqual(len(results), 1)
+        np.testing.assert_array_equal(results[0].x, np.arange(6.))
+        self.assertEqual((results[0].fun, results[0].nit), (-1.5, 7))
+
+    def test_resume_evaluates_pending_starts(self):
+        with InterruptedPool('serial') as pool:
+            with self.assertRaises(KeyboardInterrupt):
+                Optimizer(300.0, 5.0, pool=pool).search_optimal(num_trials=8, chunksize=3, dedup_tol=None,
+                                                                checkpoint=self.path)
+        checkpoint = SearchCheckpoint.load(self.path)
+        self.assertEqual(checkpoint.done.sum(), 3)
+
+        with WorkerPool('serial') as pool:
+            resumed = Optimizer(300.0, 5.0, pool=pool)
+            resumed.search_optimal(num_trials=8, chunksize=3, dedup_tol=None, checkpoint=self.path, resume=True)
+            self.assertEqual(resumed.num_starts_used, 8)
+            self.assertTrue(SearchCheckpoint.load(self.path).done.all())
+
+            # same result as an uninterrupted run with the recorded seed
+            full = Optimizer(300.0, 5.0, pool=pool)
+            full.search_optimal(num_trials=8, dedup_tol=None, seed=checkpoint.seed)
+        self.assertEqual(len(resumed.best_results), len(full.best_results))
+        self.assertAlmostEqual(resumed.best_result.fun, full.best_result.fun, places=10)
+
+    def test_resume_with_other_settings(self):
+        with WorkerPool('serial') as pool:
+            Optimizer(300.0, 5.0, pool=pool).search_optimal(num_trials=2, checkpoint=self.path)
+            with self.assertRaises(ValueError):
+                Optimizer(300.0, 6.0, pool=pool).search_optimal(num_trials=2, checkpoint=self.path, resume=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from calculation import DesignAtlas, Optimizer, FastSimulationParameters, get_medium, get_pool
+
+
+class TestDesignAtlas(unittest.TestCase):
+    """
+    Tests building, querying and storing the design atlas.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.atlas = DesignAtlas.build(Optimizer.default_bounds, n_designs=512, seed=0)
+
+    def test_build_drops_invalid_designs(self):
+        self.assertGreater(len(self.atlas), 0)
+        self.assertLessEqual(len(self.atlas), 512)
+        self.assertTrue(np.all(np.isfinite(self.atlas.q_factor)))
+        self.assertEqual(self.atlas.designs.shape, (len(self.atlas), 6))
+
+    def test_query_returns_closest_designs(self):
+        f_target, q_target = self.atlas.f_resonance[7], self.atlas.q_factor[7]
+        distances, indices = self.atlas.query(f_target, q_target, k=5)
+        self.assertEqual(indices[0], 7)
+        self.assertAlmostEqual(distances[0], 0.0)
+        self.assertTrue(np.all(np.diff(distances) >= 0))
+        np.testing.assert_array_equal(self.atlas.nearest_designs(f_target, q_target, k=5),
+                                      self.atlas.designs[indices])
+
+    def test_entries_match_solver(self):
+        sim_params = FastSimulationParameters(medium=get_medium(), freq_range=self.atlas.freq_range,
+                                              values_per_octave=1)
+        f_res, q, peak = DesignAtlas.evaluate(self.atlas.designs[3], sim_params)
+        self.assertAlmostEqual(f_res, self.atlas.f_resonance[3])
+        self.assertAlmostEqual(q, self.atlas.q_factor[3])
+        self.assertAlmostEqual(peak, self.atlas.peak_absorbtion_area[3])
+
+    def test_save_load_roundtrip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'atlas.npz')
+            self.atlas.save(path)
+            loaded = DesignAtlas.load(path)
+        np.testing.assert_array_equal(loaded.designs, self.atlas.designs)
+        self.assertEqual(loaded.bounds, self.atlas.bounds)
+        self.assertEqual(loaded.query(100, 5, k=3)[1].tolist(), self.atlas.query(100, 5, k=3)[1].tolist())
+
+    def test_build_with_pool(self):
+        atlas = DesignAtlas.build(Optimizer.default_bounds, n_designs=64, seed=0, pool=get_pool('thread', 2))
+        reference = DesignAtlas.build(Optimizer.default_bounds, n_designs=64, seed=0)
+        np.testing.assert_allclose(atlas.f_resonance, reference.f_resonance)
+
+    def test_optimizer_search_atlas(self):
+        optimizer = Optimizer(f_target=100.0, q_target=5.0)
+        result = optimizer.search_atlas(self.atlas, k=10, polish=2)
+        self.assertIs(optimizer.best_result, result)
+        self.assertLessEqual(result.fun, optimizer.objective_and_gradient(self.atlas.nearest_designs(100, 5, 1)[0])[0])
+        for val, (low, high) in zip(result.x, self.atlas.bounds):
+            self.assertGreaterEqual(val, low - 1e-12)
+            self.assertLessEqual(val, high + 1e-12)
+
+    def test_search_atlas_polishes_best_design_by_default(self):
+        optimizer = Optimizer(f_target=100.0, q_target=5.0)
+        starts = []
+        run_single_optimization = optimizer.run_single_optimization
+        optimizer.run_single_optimization = lambda x0: starts.append(x0) or run_single_optimization(x0)
+        optimizer.search_atlas(self.atlas, k=10)
+        self.assertEqual(len(starts), 1)
+        unpolished = optimizer.search_atlas(self.atlas, k=10, polish=0)
+        self.assertEqual(len(starts), 1)
+        self.assertEqual(unpolished.message, "Nearest atlas design")
+
+
+if __name__ == '__main__':
+    unittest.main()
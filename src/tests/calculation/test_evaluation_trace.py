@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from calculation import Optimizer, get_pool
+from calculation.evaluation_trace import KIND_GRADIENT, TRACE_DTYPE, TraceWriter, get_trace_writer, load_trace
+
+
+class TestEvaluationTrace(unittest.TestCase):
+    """
+    Tests writing and loading the binary trace of objective evaluations.
+    """
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_records_round_trip(self):
+        writer = TraceWriter(os.path.join(self.directory, 'a.hrtrace'), buffer_size=4)
+        writer.new_start()
+        for i in range(10):
+            writer.record(KIND_GRADIENT, np.arange(6) + i, -0.5 + i, 300., None if i else 5., 0.6, 0.1, 0.02)
+        # full buffers are written on their own, the rest on flush
+        self.assertEqual(len(load_trace(writer.path)), 8)
+        writer.flush()
+        trace = load_trace(self.directory)
+        self.assertEqual(trace.dtype, TRACE_DTYPE)
+        self.assertEqual(trace['x'].shape, (10, 6))
+        np.testing.assert_array_equal(trace['x'][3], np.arange(6) + 3)
+        np.testing.assert_array_equal(trace['value'], -0.5 + np.arange(10))
+        self.assertTrue(np.isnan(trace['q_factor'][1]))
+        self.assertTrue(np.all(trace['worker'] == os.getpid()))
+        self.assertTrue(np.all(trace['start'] == 1))
+        self.assertTrue(np.all(np.diff(trace['time']) >= 0))
+
+    def test_incomplete_record_is_ignored(self):
+        writer = TraceWriter(os.path.join(self.directory, 'a.hrtrace'))
+        writer.record(KIND_GRADIENT, np.ones(6), 1., 300., 5., 0.6, 0.1, 0.02)
+        writer.flush()
+        with open(writer.path, 'ab') as file:
+            file.write(b'\0' * (TRACE_DTYPE.itemsize // 2))
+        self.assertEqual(len(load_trace(writer.path)), 1)
+
+    def test_rejects_other_files(self):
+        path = os.path.join(self.directory, 'other.hrtrace')
+        with open(path, 'wb') as file:
+            file.write(b'not a trace')
+        with self.assertRaises(ValueError):
+            load_trace(path)
+
+    def test_search_traces_every_evaluation(self):
+        optimizer = Optimizer(300, 5, pool=get_pool('thread', 2), trace=self.directory)
+        res = optimizer.search_optimal(num_trials=6, seed=0)
+        trace = load_trace(self.directory)
+        self.assertEqual(len(trace), optimizer.num_evaluations)
+        self.assertEqual(len(np.unique(trace[['worker', 'start']])), optimizer.num_starts_used)
+        self.assertAlmostEqual(trace['value'].min(), res.fun)
+        # the objective is rebuilt from its recorded terms
+        finite = trace[np.isfinite(trace['value'])]
+        np.testing.assert_allclose(-finite['peak_area_norm'] + finite['f_penalty'] + finite['q_penalty'],
+                                   finite['value'])
+        self.assertEqual(get_trace_writer(self.directory).records, len(trace))
+
+
+if __name__ == '__main__':
+    unittest.main()
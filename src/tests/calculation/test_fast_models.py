@@ -0,0 +1,114 @@
+import unittest
+import numpy as np
+from traits.api import TraitError
+from calculation import (FastGeometry, FastAperture, FastMedium, FastSimulationParameters, get_medium,
+                         Geometry, Aperture, Medium, SimulationParameters, Resonator, Simulation)
+
+
+class TestFastModels(unittest.TestCase):
+    """
+    Tests that the trait-free model objects match the traits classes and convert both ways.
+    """
+
+    def test_geometry_matches_traits(self):
+        for kwargs in (dict(form='cuboid', x=0.5, y=0.3, z=0.2), dict(form='cylinder', radius=0.1, height=0.2)):
+            fast, slow = FastGeometry(**kwargs), Geometry(**kwargs)
+            self.assertAlmostEqual(fast.volume, slow.volume, places=12)
+            self.assertEqual(fast.to_dict(), slow.to_dict())
+            self.assertEqual(FastGeometry.from_traits(slow), fast)
+            self.assertEqual(fast.to_traits().to_dict(), slow.to_dict())
+
+    def test_aperture_matches_traits(self):
+        for kwargs in (dict(form='tube', length=0.1, radius=0.05, additional_dampening=True, xi=50),
+                       dict(form='tube', length=0.05, radius=0.02, amount=4, outer_ending='open'),
+                       dict(form='slit', length=0.01, width=0.02, height=0.4)):
+            fast, slow = FastAperture(**kwargs), Aperture(**kwargs)
+            for name in ('area', 'radius', 'inner_end_correction', 'outer_end_correction'):
+                self.assertAlmostEqual(getattr(fast, name), getattr(slow, name), places=12)
+            self.assertEqual(fast.to_dict(), slow.to_dict())
+            self.assertEqual(FastAperture.from_traits(slow), fast)
+            self.assertEqual(fast.to_traits().to_dict(), slow.to_dict())
+
+    def test_medium_matches_traits(self):
+        for temp, rh in ((20.0, 0.5), (-50.0, 0.0), (60.0, 1.0)):
+            fast, slow = FastMedium(temperature_celsius=temp, rel_humidity=rh), \
+                Medium(temperature_celsius=temp, rel_humidity=rh)
+            for name in ('density', 'c', 'kinematic_viscosity', 'temperature_kelvin'):
+                self.assertAlmostEqual(getattr(fast, name), getattr(slow, name), places=12)
+            self.assertAlmostEqual(fast.to_traits().density, slow.density, places=12)
+            self.assertAlmostEqual(FastMedium.from_traits(slow).c, slow.c, places=12)
+
+    def test_get_medium_is_memoized(self):
+        get_medium.cache_clear()
+        medium = get_medium()
+        self.assertIs(get_medium(20, 0.5), medium)
+        self.assertIsNot(get_medium(20.0, 0.6), medium)
+        self.assertEqual(get_medium.cache_info().hits, 1)
+        self.assertAlmostEqual(medium.density, Medium().density, places=12)
+        # shared media are not editable, the traits simulation parameters take a fresh Medium
+        with self.assertRaises(TraitError):
+            SimulationParameters(medium=medium, values_per_octave=10)
+        params = SimulationParameters(medium=medium.to_traits(), values_per_octave=10)
+        params.medium.temperature_celsius = 30.
+        self.assertEqual(get_medium().temperature_celsius, 20.)
+
+    def test_simulation_parameters_match_traits(self):
+        fast = FastSimulationParameters(medium=FastMedium(), freq_range=(20, 2000), values_per_octave=50)
+        slow = SimulationParameters(medium=Medium(), freq_range=(20, 2000), values_per_octave=50)
+        np.testing.assert_array_equal(fast.frequencies, slow.frequencies)
+        np.testing.assert_allclose(fast.k, slow.k, rtol=1e-14)
+        np.testing.assert_allclose(fast.wavelength, slow.wavelength, rtol=1e-14)
+        np.testing.assert_array_equal(fast.to_traits().frequencies, slow.frequencies)
+        np.testing.assert_array_equal(FastSimulationParameters.from_traits(slow).omega, slow.omega)
+        self.assertFalse(fast.frequencies.flags.writeable)
+
+    def test_simulation_with_fast_models(self):
+        kwargs_geom = dict(form='cuboid', x=0.5, y=0.3, z=0.2)
+        kwargs_ap = dict(form='tube', length=0.1, radius=0.05, additional_dampening=True, xi=50)
+        fast = Simulation(Resonator(FastGeometry(**kwargs_geom), FastAperture(**kwargs_ap)),
+                          FastSimulationParameters(medium=FastMedium(), freq_range=(20, 2000), values_per_octave=50))
+        slow = Simulation(Resonator(Geometry(**kwargs_geom), Aperture(**kwargs_ap)),
+                          SimulationParameters(medium=Medium(), freq_range=(20, 2000), values_per_octave=50))
+        fast.calc_all()
+        slow.calc_all()
+        np.testing.assert_allclose(fast.absorbtion_area, slow.absorbtion_area, rtol=1e-12)
+        self.assertAlmostEqual(fast.q_factor, slow.q_factor, places=9)
+        self.assertEqual(fast.to_dict()['resonator'], slow.to_dict()['resonator'])
+
+    def test_immutable(self):
+        geom = FastGeometry(form='cuboid', x=0.5, y=0.3, z=0.2)
+        with self.assertRaises(AttributeError):
+            geom.x = 1.0
+        with self.assertRaises(AttributeError):
+            geom.new_attribute = 1.0
+        changed = geom.replace(x=1.0)
+        self.assertEqual(changed.x, 1.0)
+        self.assertAlmostEqual(changed.volume, 0.06)
+
+    def test_validation(self):
+        with self.assertRaises(TraitError):
+            FastGeometry(form='cuboid', x=0.5, y=0.3)
+        with self.assertRaises(TraitError):
+            FastGeometry(form='cuboid', x=5.0, y=0.3, z=0.2)
+        with self.assertRaises(TraitError):
+            FastAperture(form='tube', length=0.1, radius=0.05, additional_dampening=True)
+        with self.assertRaises(TraitError):
+            FastMedium(temperature_celsius=100.0)
+        with self.assertRaises(TraitError):
+            geom = FastGeometry(form='cuboid', x=0.5, y=0.3, z=0.2)
+            geom.replace(z=-1.0)
+
+    def test_trusted_skips_validation(self):
+        geom = FastGeometry(form='cuboid', x=5.0, y=0.3, z=0.2, trusted=True)
+        self.assertAlmostEqual(geom.volume, 0.3)
+
+    def test_pickle_roundtrip(self):
+        import pickle
+        for obj in (FastGeometry(form='cylinder', radius=0.1, height=0.2),
+                    FastAperture(form='slit', length=0.01, width=0.02, height=0.4),
+                    FastSimulationParameters(medium=FastMedium(temperature_celsius=30.0), values_per_octave=10)):
+            self.assertEqual(pickle.loads(pickle.dumps(obj)), obj)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import numpy as np
+from calculation import frequency_grid, SimulationParameters, Medium
+
+
+class TestFrequencyGrid(unittest.TestCase):
+    """
+    Tests the shared frequency grid cache and the canonical log lattice.
+    """
+
+    def setUp(self):
+        frequency_grid.clear_cache()
+
+    def tearDown(self):
+        frequency_grid.set_cache_size(64)
+
+    def test_grid_matches_logspace(self):
+        frequencies, omega, k, wavelength = frequency_grid.get_grid(20, 1000, 100, 343.0)
+        n_freq_values = int(np.log2(1000 / 20) * 100)
+        np.testing.assert_array_equal(frequencies, np.logspace(np.log10(20), np.log10(1000), n_freq_values))
+        np.testing.assert_allclose(k, 2 * np.pi * frequencies / 343.0)
+        np.testing.assert_allclose(wavelength, 343.0 / frequencies)
+
+    def test_arrays_are_shared_and_read_only(self):
+        a = SimulationParameters(medium=Medium(), freq_range=(20, 1000), values_per_octave=100)
+        b = SimulationParameters(medium=Medium(), freq_range=(20, 1000), values_per_octave=100)
+        self.assertIs(a.frequencies, b.frequencies)
+        self.assertIs(a.k, b.k)
+        self.assertFalse(a.k.flags.writeable)
+        self.assertGreaterEqual(frequency_grid.cache_info()["hits"], 1)
+
+    def test_canonical_subranges_are_slices(self):
+        full = frequency_grid.log_frequencies(10, 10_000, 48, canonical=True)
+        sub = frequency_grid.log_frequencies(100, 1000, 48, canonical=True)
+        master, _ = frequency_grid.master_lattice(48)
+        self.assertIs(sub.base, master)
+        self.assertTrue(np.all(np.isin(sub, full)))
+        self.assertTrue(np.any(np.isclose(sub, 1000.0)))
+        ratios = sub[1:] / sub[:-1]
+        np.testing.assert_allclose(ratios, 2**(1 / 48))
+
+    def test_canonical_simulation_parameters(self):
+        params = SimulationParameters(medium=Medium(), freq_range=(50, 800), values_per_octave=12,
+                                      canonical_grid=True)
+        self.assertAlmostEqual(params.frequencies[0], 50.0, delta=50 * (2**(1 / 12) - 1))
+        self.assertTrue(params.to_dict()["canonical_grid"])
+        restored = SimulationParameters.from_dict(params.to_dict())
+        np.testing.assert_array_equal(restored.frequencies, params.frequencies)
+
+    def test_lru_eviction(self):
+        frequency_grid.set_cache_size(2)
+        first = frequency_grid.log_frequencies(20, 1000, 10)
+        frequency_grid.log_frequencies(20, 1000, 11)
+        frequency_grid.log_frequencies(20, 1000, 12)
+        self.assertEqual(frequency_grid.cache_info()["size"], 2)
+        self.assertIsNot(frequency_grid.log_frequencies(20, 1000, 10), first)
+        with self.assertRaises(ValueError):
+            frequency_grid.set_cache_size(0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,7 @@ import numpy as np
 from traits.api import TraitError
 
 from calculation import Medium
+from calculation.medium import calc_air_properties
 
 
 class TestMedium(unittest.TestCase):
@@ -174,6 +175,41 @@ class TestMedium(unittest.TestCase):
                 rel_humidity=self.humidity_max + 0.001
             )
 
+    # ------------------------------------
+    # Vectorized evaluation
+    # ------------------------------------
+    def test_vectorized_properties_match_medium(self):
+        """Array evaluation should match one Medium per temperature/humidity pair."""
+        temps = np.linspace(self.temp_min, self.temp_max, 7)
+        humidities = np.linspace(self.humidity_min, self.humidity_max, 7)
+        density, c, nu = calc_air_properties(temps, humidities)
+        self.assertEqual(density.shape, (7,))
+        for i, (temp, rh) in enumerate(zip(temps, humidities)):
+            medium = Medium(temperature_celsius=temp, rel_humidity=rh)
+            self.assertAlmostEqual(density[i], medium.density, places=12)
+            self.assertAlmostEqual(c[i], medium.c, places=12)
+            self.assertAlmostEqual(nu[i], medium.kinematic_viscosity, places=16)
+
+    def test_vectorized_properties_broadcast_and_override(self):
+        """Overrides and scalar humidity should broadcast over a temperature series."""
+        temps = np.array([-10.0, 0.0, 25.0])
+        density, c, nu = calc_air_properties(temps, 0.5, density=1.2, speed_of_sound=340.0)
+        self.assertTrue(np.all(density == 1.2))
+        self.assertTrue(np.all(c == 340.0))
+        self.assertEqual(nu.shape, (3,))
+        with self.assertRaises(TraitError):
+            calc_air_properties(temps, 0.5, density=np.array([1.2, -1.0, 1.2]))
+
+    def test_vectorized_scalar_overrides_take_input_shape(self):
+        """Scalar overrides should be returned with the shape of a temperature array."""
+        temps = np.array([[-10.0, 0.0, 25.0], [5.0, 15.0, 35.0]])
+        density, c, nu = calc_air_properties(temps, 0.5, density=1.2, speed_of_sound=340.0)
+        self.assertEqual((density.shape, c.shape, nu.shape), ((2, 3),) * 3)
+        np.testing.assert_array_equal(density, 1.2)
+        np.testing.assert_array_equal(c, 340.0)
+        density, c, nu = calc_air_properties(20.0, 0.5, speed_of_sound=340.0)
+        self.assertEqual((np.ndim(density), np.ndim(c), np.ndim(nu)), (0, 0, 0))
+        self.assertEqual(c, 340.0)
 
 
 if __name__ == "__main__":
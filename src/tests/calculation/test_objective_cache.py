@@ -0,0 +1,56 @@
+import threading
+import unittest
+from calculation.objective_cache import ObjectiveCache, get_objective_cache
+
+
+class TestObjectiveCache(unittest.TestCase):
+    """
+    Tests the per-process memoization of objective evaluations.
+    """
+
+    def test_get_or_compute(self):
+        cache = ObjectiveCache()
+        calls = []
+        key = cache.key(('grid', 300.0), [0.5, 0.4, 0.3])
+        for _ in range(3):
+            self.assertEqual(cache.get_or_compute(key, lambda: calls.append(1) or 42.0), 42.0)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats(), {"hits": 2, "misses": 1, "size": 1, "hit_rate": 2 / 3})
+
+    def test_key_rounding(self):
+        cache = ObjectiveCache(digits=12)
+        self.assertEqual(cache.key('s', [0.1 + 0.2]), cache.key('s', [0.3]))
+        self.assertNotEqual(cache.key('s', [0.3]), cache.key('s', [0.3 + 1e-9]))
+        self.assertNotEqual(cache.key('a', [0.3]), cache.key('b', [0.3]))
+
+    def test_bounded_lru(self):
+        cache = ObjectiveCache(maxsize=2)
+        for i in range(3):
+            cache.get_or_compute(cache.key('s', [i]), lambda: i)
+            if i == 1:
+                # keep the first entry recently used
+                cache.get_or_compute(cache.key('s', [0]), lambda: -1)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get_or_compute(cache.key('s', [0]), lambda: -1), 0)
+        self.assertEqual(cache.get_or_compute(cache.key('s', [1]), lambda: -1), -1)
+
+        with self.assertRaises(ValueError):
+            ObjectiveCache(maxsize=0)
+
+    def test_thread_counts(self):
+        cache = ObjectiveCache()
+        cache.get_or_compute(cache.key('s', [1]), lambda: 1)
+        counts = []
+        thread = threading.Thread(target=lambda: counts.append(
+            (cache.get_or_compute(cache.key('s', [1]), lambda: 1), cache.thread_counts())))
+        thread.start()
+        thread.join()
+        self.assertEqual(counts, [(1, (1, 0))])
+        self.assertEqual(cache.thread_counts(), (0, 1))
+
+    def test_process_cache(self):
+        self.assertIs(get_objective_cache(), get_objective_cache())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,10 @@
+import time
 import unittest
 
-from calculation import Optimizer
-from scipy.optimize import minimize
+from calculation import Optimizer, get_pool
+from calculation.objective_cache import get_objective_cache
+from calculation.search_budget import SearchBudget
+from scipy.optimize import OptimizeResult, minimize
 import click
 import matplotlib.pyplot as plt
 import numpy as np
@@ -63,6 +66,252 @@ class TestOptimizer(unittest.TestCase):
         self.assertIsNotNone(res)
         self.assertTrue(hasattr(res, 'x'))
         self.assertTrue(hasattr(res, 'fun'))
+    def test_objective_gradient_matches_finite_differences(self):
+        """Compares the analytic gradient of the objective with central differences."""
+        x0 = np.array([0.5, 0.4, 0.3, 0.03, 0.1, 100.])
+        value, gradient = self.optimizer.objective_and_gradient(x0)
+        self.assertAlmostEqual(value, self.optimizer.objective(x0), delta=0.1)
+        for i in range(len(x0)):
+            step = np.zeros(len(x0))
+            step[i] = x0[i] * 1e-6
+            fd = (self.optimizer.objective_and_gradient(x0 + step)[0]
+                  - self.optimizer.objective_and_gradient(x0 - step)[0]) / (2 * step[i])
+            self.assertAlmostEqual(gradient[i], fd, delta=1e-5 * abs(fd) + 1e-6)
+
+    def test_batch_objective_matches_objective(self):
+        """Checks that the vectorized objective equals the scalar objective for every design."""
+        population = np.array([
+            [0.55, 0.55, 0.55, 0.055, 0.055, 150],
+            [0.5, 0.4, 0.3, 0.03, 0.1, 100],
+            [0.2, 0.3, 0.1, 0.08, 0.02, 3000],
+        ])
+        values = self.optimizer.batch_objective(population)
+        for design, value in zip(population, values):
+            self.assertAlmostEqual(value, self.optimizer.objective(design), places=9)
+
+    def test_search_global_returns_result(self):
+        """Runs a short differential evolution and checks the result lies within the bounds."""
+        res = self.optimizer.search_global(popsize=5, maxiter=5, seed=0, polish=False)
+        self.assertIs(self.optimizer.best_result, res)
+        self.assertEqual(len(res.x), 6)
+        for val, (low, high) in zip(res.x, self.optimizer.bounds):
+            self.assertGreaterEqual(val, low)
+            self.assertLessEqual(val, high)
+        self.assertAlmostEqual(res.fun, self.optimizer.objective(res.x), places=9)
+
+    def test_search_optimal_stops_early(self):
+        """Checks that converged searches cancel the remaining starts."""
+        self.optimizer.pool = get_pool('serial')
+        self.optimizer.search_optimal(num_trials=20, chunksize=1, stop_count=2, stop_tol=1e6)
+        self.assertTrue(self.optimizer.stopped_early)
+        self.assertLess(self.optimizer.num_starts_used, 20)
+        self.assertGreaterEqual(len(self.optimizer.best_results), 2)
+
+        self.optimizer.search_optimal(num_trials=20, chunksize=1, patience=3, stop_tol=1e6)
+        self.assertTrue(self.optimizer.stopped_early)
+        self.assertLess(self.optimizer.num_starts_used, 20)
+
+    def test_stop_count_counts_distinct_results(self):
+        """Checks that starts converging to the same design count once for early stopping."""
+        self.optimizer.bounds = list(self.optimizer.default_bounds)
+        low, high = np.array(self.optimizer.bounds).T
+        same = [OptimizeResult(x=low + 0.5 * (high - low), fun=-1.0) for _ in range(5)]
+        self.assertFalse(self.optimizer._converged(same, -1.0, 0, 2, 1e-3, None))
+        other = OptimizeResult(x=low + 0.1 * (high - low), fun=-1.0)
+        self.assertTrue(self.optimizer._converged(same + [other], -1.0, 0, 2, 1e-3, None))
+
+    def test_search_optimal_without_early_stopping_uses_all_starts(self):
+        self.optimizer.pool = get_pool('serial')
+        self.optimizer.search_optimal(num_trials=4)
+        self.assertFalse(self.optimizer.stopped_early)
+        self.assertEqual(self.optimizer.stop_reason, 'completed')
+        self.assertEqual(self.optimizer.num_starts_used, 4)
+
+    def test_search_stream_yields_improvements(self):
+        """Checks that the stream yields improving results and keeps only the best ones."""
+        self.optimizer.pool = get_pool('serial')
+        values = [res.fun for res in self.optimizer.search_stream(num_trials=12, chunksize=1, top_k=3,
+                                                                  dedup_tol=None, seed=0)]
+        self.assertGreater(len(values), 0)
+        self.assertTrue(all(np.diff(values) < 0))
+        self.assertEqual(len(self.optimizer.best_results), 3)
+        self.assertEqual(self.optimizer.best_result.fun, values[-1])
+
+        everything = Optimizer(self.f_target, self.q_target, pool=get_pool('serial'))
+        everything.search_optimal(num_trials=12, chunksize=1, dedup_tol=None, seed=0)
+        self.assertEqual([res.fun for res in self.optimizer.best_results],
+                         [res.fun for res in everything.best_results[:3]])
+
+    def test_search_stream_can_stop_after_first_result(self):
+        self.optimizer.pool = get_pool('serial')
+        first = next(self.optimizer.search_stream(num_trials=20, chunksize=1, seed=0))
+        self.assertTrue(first.success)
+        self.assertLess(self.optimizer.num_starts_used, 20)
+
+    def test_search_optimal_evaluation_budget(self):
+        """Checks that the evaluation budget holds across all workers and returns the best design so far."""
+        self.optimizer.pool = get_pool('thread', 3)
+        res = self.optimizer.search_optimal(num_trials=40, max_evaluations=150, seed=0)
+        self.assertEqual(self.optimizer.stop_reason, 'max_evaluations')
+        self.assertTrue(self.optimizer.stopped_early)
+        self.assertLessEqual(self.optimizer.num_evaluations, 150)
+        self.assertLess(self.optimizer.num_starts_used, 40)
+        self.assertTrue(np.isfinite(res.fun))
+        self.assertAlmostEqual(res.fun, self.optimizer.objective_and_gradient(res.x)[0])
+
+    def test_search_optimal_time_budget(self):
+        self.optimizer.pool = get_pool('serial')
+        start = time.monotonic()
+        res = self.optimizer.search_optimal(num_trials=400, max_time=0.5, seed=0)
+        self.assertLess(time.monotonic() - start, 0.5 + 1.0)
+        self.assertEqual(self.optimizer.stop_reason, 'max_time')
+        self.assertLess(self.optimizer.num_starts_used, 400)
+        self.assertIsNotNone(res)
+
+    def test_run_single_optimization_returns_best_design_on_budget(self):
+        optimizer = Optimizer(self.f_target, self.q_target)
+        optimizer.bounds = list(optimizer.default_bounds)
+        res = optimizer.run_single_optimization([0.5, 0.4, 0.3, 0.03, 0.1, 100.], SearchBudget(max_evaluations=3))
+        self.assertTrue(res.budget_exhausted)
+        self.assertEqual(res.evaluations, 3)
+        self.assertAlmostEqual(res.fun, optimizer.objective_and_gradient(res.x)[0])
+        self.assertLessEqual(res.fun, optimizer.objective_and_gradient([0.5, 0.4, 0.3, 0.03, 0.1, 100.])[0])
+
+    def test_multi_fidelity_polishes_at_full_resolution(self):
+        optimizer = Optimizer(self.f_target, self.q_target, use_gradient=False, multi_fidelity=True)
+        optimizer.bounds = list(optimizer.default_bounds)
+        x0 = [0.5, 0.4, 0.3, 0.03, 0.1, 100.]
+        res = optimizer.run_single_optimization(x0)
+        self.assertTrue(res.success)
+        self.assertGreater(res.coarse_evaluations, 0)
+        self.assertGreater(res.evaluations, res.coarse_evaluations)
+        self.assertLessEqual(res.nit, optimizer.polish_maxiter)
+        # the reported value is the one of the full-resolution grid
+        self.assertAlmostEqual(res.fun, optimizer.objective(res.x))
+        self.assertLess(res.fun, optimizer.objective(x0))
+        with self.assertRaises(ValueError):
+            Optimizer(self.f_target, self.q_target, multi_fidelity=True)
+
+    def test_multi_fidelity_needs_fewer_full_resolution_evaluations(self):
+        """Compares the full-resolution evaluations with the plain grid objective on the same starts."""
+        plain = Optimizer(self.f_target, self.q_target, use_gradient=False)
+        multi = Optimizer(self.f_target, self.q_target, use_gradient=False, multi_fidelity=True)
+        for optimizer in (plain, multi):
+            optimizer.bounds = list(optimizer.default_bounds)
+            optimizer.memoize = False
+        starts = plain.generate_initial_design(8, seed=0)
+        plain_evaluations = sum(res.evaluations for res in map(plain.run_single_optimization, starts) if res)
+        multi_results = [res for res in map(multi.run_single_optimization, starts) if res]
+        full_evaluations = sum(res.evaluations - res.coarse_evaluations for res in multi_results)
+        self.assertLess(full_evaluations, plain_evaluations)
+        # coarse evaluations cost about half of a full-resolution one
+        self.assertLess(full_evaluations + sum(res.coarse_evaluations for res in multi_results) / 2,
+                        plain_evaluations)
+
+    def test_multi_fidelity_search_matches_default_simulation(self):
+        optimizer = Optimizer(self.f_target, self.q_target, pool=get_pool('serial'), use_gradient=False,
+                              multi_fidelity=True)
+        res = optimizer.search_optimal(num_trials=4, seed=0)
+        check = optimizer.full_resolution_check
+        self.assertTrue(check["consistent"])
+        self.assertAlmostEqual(check["f_resonance"], optimizer.evaluate(res.x).f_resonance)
+        self.assertAlmostEqual(check["default_f_resonance"] / self.f_target, 1., delta=0.05)
+
+    def test_search_surrogate_reports_evaluations(self):
+        res = self.optimizer.search_surrogate(num_initial=32, num_rounds=2, points_per_round=4, num_starts=2, seed=0)
+        self.assertAlmostEqual(res.fun, self.optimizer.objective_and_gradient(res.x)[0])
+        self.assertLess(res.fun, 0.)
+        # 32 + 2 * 4 designs are simulated before the local optimizations
+        self.assertGreater(self.optimizer.num_true_evaluations, 40)
+        self.assertLess(self.optimizer.num_true_evaluations, 500)
+        self.assertGreater(self.optimizer.num_surrogate_evaluations, 2 * 4096)
+
+    def test_generate_initial_design(self):
+        """Checks the space-filling initial designs stay within the bounds."""
+        self.optimizer.bounds = list(self.optimizer.default_bounds)
+        for sampling in ('sobol', 'lhs', 'random'):
+            design = self.optimizer.generate_initial_design(20, sampling=sampling, seed=0)
+            self.assertEqual(len(design), 20)
+            for values in design:
+                for val, (low, high) in zip(values, self.optimizer.bounds):
+                    self.assertGreaterEqual(val, low)
+                    self.assertLessEqual(val, high)
+        self.assertEqual(self.optimizer.generate_initial_design(5, seed=1),
+                         self.optimizer.generate_initial_design(5, seed=1))
+        with self.assertRaises(ValueError):
+            self.optimizer.generate_initial_design(5, sampling='grid')
+
+    def test_solve_for_target_matches_approximation(self):
+        """Checks that the adjusted parameter satisfies the f_R approximation."""
+        self.optimizer.bounds = list(self.optimizer.default_bounds)
+        x, y, z, radius, length, xi = self.optimizer.solve_for_target([0.2, 0.2, 0.2, 0.1, 0.1, 50], 'length')
+        f_approx = 343 / (2 * np.pi) * np.sqrt(np.pi * radius**2 / (x * y * z * length))
+        self.assertAlmostEqual(f_approx, self.f_target)
+
+    def test_deduplicate_results(self):
+        """Checks that near-copies of a design are merged and the best of them is kept."""
+        from scipy.optimize import OptimizeResult
+        self.optimizer.bounds = list(self.optimizer.default_bounds)
+        results = [
+            OptimizeResult(x=np.array([0.5, 0.5, 0.5, 0.05, 0.1, 100]), fun=-1.0),
+            OptimizeResult(x=np.array([0.5001, 0.5, 0.5, 0.05, 0.1, 101]), fun=-1.1),
+            OptimizeResult(x=np.array([0.2, 0.9, 0.5, 0.02, 0.2, 3000]), fun=-0.5),
+        ]
+        distinct = self.optimizer.deduplicate_results(results)
+        self.assertEqual([res.fun for res in distinct], [-1.1, -0.5])
+
+    def test_reduced_gradient_matches_finite_differences(self):
+        """Checks the chained gradient of the reduced search space."""
+        reduced = np.array([0.5, 0.4, 0.03, 0.1, 100.])
+        full, _ = self.optimizer.expand_reduced(reduced)
+        self.assertAlmostEqual(self.optimizer.create_solver(full).solve()[0], self.f_target)
+        _, gradient = self.optimizer.objective_reduced_and_gradient(reduced)
+        for i in range(len(reduced)):
+            step = np.zeros(len(reduced))
+            step[i] = reduced[i] * 1e-6
+            fd = (self.optimizer.objective_reduced_and_gradient(reduced + step)[0]
+                  - self.optimizer.objective_reduced_and_gradient(reduced - step)[0]) / (2 * step[i])
+            self.assertAlmostEqual(gradient[i], fd, delta=1e-5 * abs(fd) + 1e-6)
+
+    def test_run_reduced_optimization(self):
+        """Checks that the reduced search returns complete designs within the bounds."""
+        optimizer = Optimizer(self.f_target, self.q_target, eliminate_volume=True)
+        optimizer.bounds = list(optimizer.default_bounds)
+        res = optimizer.run_single_optimization([0.5, 0.4, 0.3, 0.03, 0.1, 100.])
+        self.assertTrue(res.success)
+        self.assertEqual(len(res.x), 6)
+        for val, (low, high) in zip(res.x, optimizer.bounds):
+            self.assertGreaterEqual(val, low - 1e-6)
+            self.assertLessEqual(val, high + 1e-6)
+        self.assertAlmostEqual(optimizer.create_solver(res.x).solve()[0] / self.f_target, 1.0, places=6)
+
+    def test_memoized_objective_matches_uncached(self):
+        """Checks that memoized evaluations equal fresh ones and report their breakdown."""
+        vars = [0.5, 0.4, 0.3, 0.03, 0.1, 100.]
+        uncached = Optimizer(self.f_target, self.q_target)
+        uncached.memoize = False
+        evaluation = self.optimizer.evaluate(vars)
+        self.assertEqual(self.optimizer.objective(vars), uncached.objective(vars))
+        self.assertEqual(evaluation.value, uncached.objective(vars))
+        self.assertGreater(evaluation.f_resonance, 0)
+        self.assertGreater(evaluation.q_factor, 0)
+
+        value, gradient = self.optimizer.objective_and_gradient(vars)
+        gradient[:] = 0  # callers may modify the returned gradient
+        cached_value, cached_gradient = self.optimizer.objective_and_gradient(vars)
+        self.assertEqual(value, cached_value)
+        np.testing.assert_array_equal(cached_gradient, uncached.objective_and_gradient(vars)[1])
+
+    def test_run_single_optimization_reports_cache_lookups(self):
+        """Checks that every local optimization reports its objective cache hits and misses."""
+        get_objective_cache().clear()
+        optimizer = Optimizer(self.f_target, self.q_target, eliminate_volume=True)
+        optimizer.bounds = list(optimizer.default_bounds)
+        res = optimizer.run_single_optimization([0.5, 0.4, 0.3, 0.03, 0.1, 100.])
+        self.assertGreater(res.cache_misses, 0)
+        # the constraints reuse the depth solved for the objective
+        self.assertGreater(res.cache_hits, 0)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+import numpy as np
+from calculation import ResonanceSolver, Simulation, Resonator, SimulationParameters, Medium, Geometry, Aperture
+
+
+class TestResonanceSolver(unittest.TestCase):
+    """
+    Compares the grid-free solver against the frequency sweep of Simulation.
+    """
+
+    def setUp(self):
+        self.values_per_octave = 200
+        self.sim_params = SimulationParameters(medium=Medium(), freq_range=(20, 2000),
+                                               values_per_octave=self.values_per_octave)
+        self.resonators = [
+            Resonator(Geometry(form='cuboid', x=0.5, y=0.3, z=0.2),
+                      Aperture(form='tube', length=0.1, radius=0.05, additional_dampening=True, xi=50)),
+            Resonator(Geometry(form='cylinder', radius=0.15, height=0.25),
+                      Aperture(form='tube', length=0.07, radius=0.03, additional_dampening=True, xi=20,
+                               outer_ending='open')),
+            Resonator(Geometry(form='cuboid', x=0.1, y=0.1, z=0.1),
+                      Aperture(form='tube', length=0.02, radius=0.01, amount=3)),
+        ]
+
+    def test_matches_grid_within_spacing(self):
+        grid_step = 2**(1 / self.values_per_octave)
+        for res in self.resonators:
+            sim = Simulation(res, self.sim_params)
+            sim.calc_all()
+            f_res, peak, f_low, f_high, q = ResonanceSolver(res, self.sim_params).solve()
+
+            self.assertLess(abs(np.log(f_res / sim.f_resonance)), np.log(grid_step))
+            self.assertLess(abs(np.log(f_low / sim.f_q_low)), np.log(grid_step))
+            self.assertLess(abs(np.log(f_high / sim.f_q_high)), np.log(grid_step))
+            # the exact peak is never below a sampled point of the same curve
+            self.assertGreaterEqual(peak, sim.peak_absorbtion_area * (1 - 1e-12))
+            self.assertAlmostEqual(q, f_res / (f_high - f_low))
+
+    def test_peak_is_maximum_of_curve(self):
+        solver = ResonanceSolver(self.resonators[0], self.sim_params)
+        f_res, peak = solver.calc_resonance_frequency_and_peak_area()
+        for f in (f_res * 0.999, f_res * 1.001):
+            self.assertLess(solver.absorbtion_area_at(f), peak)
+        self.assertAlmostEqual(solver.absorbtion_area_at(f_res), peak, places=12)
+
+    def test_half_power_points(self):
+        solver = ResonanceSolver(self.resonators[1], self.sim_params)
+        solver.solve()
+        half = solver.peak_absorbtion_area / 2
+        self.assertAlmostEqual(solver.absorbtion_area_at(solver.f_q_low) / half, 1.0, places=8)
+        self.assertAlmostEqual(solver.absorbtion_area_at(solver.f_q_high) / half, 1.0, places=8)
+        self.assertLess(solver.f_q_low, solver.f_resonance)
+        self.assertGreater(solver.f_q_high, solver.f_resonance)
+
+    def test_simulation_solve_resonance(self):
+        sim = Simulation(self.resonators[0], self.sim_params)
+        f_res, peak, f_low, f_high, q = sim.solve_resonance()
+        self.assertEqual(sim.f_resonance, f_res)
+        self.assertEqual(sim.q_factor, q)
+        # the frequency sweep is not evaluated
+        self.assertFalse(sim.is_calculated('absorbtion_area'))
+
+    def test_q_none_if_bandwidth_outside_range(self):
+        sim_params = SimulationParameters(medium=Medium(), freq_range=(66, 110), values_per_octave=10)
+        solver = ResonanceSolver(self.resonators[0], sim_params)
+        self.assertIsNone(solver.calc_q_factor())
+
+    def test_gradient_matches_finite_differences(self):
+        def solve(volume, radius, length, xi):
+            x = volume / (0.3 * 0.2)
+            res = Resonator(Geometry(form='cuboid', x=x, y=0.3, z=0.2),
+                            Aperture(form='tube', length=length, radius=radius, additional_dampening=True, xi=xi))
+            solver = ResonanceSolver(res, self.sim_params)
+            solver.solve()
+            return solver
+
+        # peak below and above the friction cutoff
+        for values in ((0.03, 0.05, 0.1, 50.0), (0.01, 0.1, 0.05, 20.0)):
+            values = np.array(values)
+            gradients = solve(*values).gradient()
+            for name in ('f_resonance', 'peak_absorbtion_area', 'q_factor'):
+                for i in range(len(values)):
+                    step = np.zeros(len(values))
+                    step[i] = values[i] * 1e-6
+                    fd = (getattr(solve(*(values + step)), name)
+                          - getattr(solve(*(values - step)), name)) / (2 * step[i])
+                    self.assertAlmostEqual(gradients[name][i], fd, delta=1e-5 * abs(fd) + 1e-6)
+
+    def test_gradient_requires_tube(self):
+        res = Resonator(Geometry(form='cuboid', x=0.5, y=0.3, z=0.2),
+                        Aperture(form='slit', length=0.01, width=0.02, height=0.4))
+        with self.assertRaises(ValueError):
+            ResonanceSolver(res, self.sim_params).gradient()
+
+    def test_required_volume_places_peak_at_target(self):
+        aperture = Aperture(form='tube', length=0.1, radius=0.03, additional_dampening=True, xi=50)
+        for f_target in (60.0, 150.0, 400.0):
+            solver = ResonanceSolver(Resonator(Geometry(form='cuboid', x=0.5, y=0.3, z=0.2), aperture),
+                                     self.sim_params)
+            volume = solver.required_volume(f_target)
+            x = volume / (0.3 * 0.2)
+            solver = ResonanceSolver(Resonator(Geometry(form='cuboid', x=x, y=0.3, z=0.2), aperture),
+                                     self.sim_params)
+            self.assertAlmostEqual(solver.calc_resonance_frequency_and_peak_area()[0] / f_target, 1.0, places=9)
+
+    def test_required_volume_gradient(self):
+        def required_volume(radius, length, xi):
+            res = Resonator(Geometry(form='cuboid', x=0.5, y=0.3, z=0.2),
+                            Aperture(form='tube', length=length, radius=radius, additional_dampening=True, xi=xi))
+            return ResonanceSolver(res, self.sim_params)
+
+        values = np.array([0.03, 0.1, 50.0])
+        gradient = required_volume(*values).required_volume_gradient(150.0)
+        self.assertEqual(gradient[0], 0.0)
+        for i in range(len(values)):
+            step = np.zeros(len(values))
+            step[i] = values[i] * 1e-6
+            fd = (required_volume(*(values + step)).required_volume(150.0)
+                  - required_volume(*(values - step)).required_volume(150.0)) / (2 * step[i])
+            self.assertAlmostEqual(gradient[i + 1], fd, delta=1e-4 * abs(fd) + 1e-14)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import time
+import unittest
+from calculation import Optimizer
+from calculation.result_cache import ResultCache, code_version, file_digest
+
+
+class TestResultCache(unittest.TestCase):
+    """
+    Tests the content-addressed result cache.
+    """
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_roundtrip(self):
+        key = ResultCache.key({"f_target": 300.0})
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, {"x": [0.5, 0.4], "fun": -1.2})
+        self.assertEqual(self.cache.get(key), {"x": [0.5, 0.4], "fun": -1.2})
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_key_is_canonical(self):
+        self.assertEqual(ResultCache.key({"a": 1, "b": [1, 2]}), ResultCache.key({"b": [1, 2], "a": 1}))
+        self.assertNotEqual(ResultCache.key({"a": 1}), ResultCache.key({"a": 2}))
+        self.assertEqual(len(code_version()), 64)
+
+    def test_request_covers_settings(self):
+        optimizer = Optimizer(f_target=300.0, q_target=5.0)
+        key = ResultCache.key(optimizer.cache_request(method='global', seed=1))
+        self.assertEqual(key, ResultCache.key(Optimizer(300.0, 5.0).cache_request(method='global', seed=1)))
+        self.assertNotEqual(key, ResultCache.key(optimizer.cache_request(method='global', seed=2)))
+        self.assertNotEqual(key, ResultCache.key(Optimizer(300.0, 6.0).cache_request(method='global', seed=1)))
+
+        optimizer.q_weight = 10.
+        self.assertNotEqual(key, ResultCache.key(optimizer.cache_request(method='global', seed=1)))
+
+    def test_eviction_removes_least_recently_used(self):
+        keys = [ResultCache.key({"i": i}) for i in range(3)]
+        for i, key in enumerate(keys):
+            self.cache.put(key, {"i": i})
+            # distinct modification times in the past
+            os.utime(self.cache._path(key), (time.time() - 10 + i, time.time() - 10 + i))
+        # using the oldest entry makes the second one the least recently used
+        self.assertIsNotNone(self.cache.get(keys[0]))
+
+        self.cache.max_size = self.cache.size() - 1
+        self.cache.evict()
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+
+    def test_file_digest(self):
+        path = os.path.join(self._tmp.name, 'data.bin')
+        with open(path, 'wb') as file:
+            file.write(b'atlas')
+        digest = file_digest(path)
+        self.assertEqual(digest, file_digest(path))
+        with open(path, 'wb') as file:
+            file.write(b'other')
+        self.assertNotEqual(digest, file_digest(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
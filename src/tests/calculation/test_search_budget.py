@@ -0,0 +1,52 @@
+import time
+import unittest
+import numpy as np
+from calculation.search_budget import BudgetExhausted, SearchBudget
+
+
+class TestSearchBudget(unittest.TestCase):
+    """
+    Tests the evaluation and time budgets of optimizations.
+    """
+
+    def test_evaluation_limit(self):
+        budget = SearchBudget(max_evaluations=3)
+        objective = budget.track(lambda x: float(np.sum(np.square(x))))
+        for x in ([2.0], [1.0], [3.0]):
+            objective(x)
+        self.assertTrue(budget.exhausted())
+        with self.assertRaises(BudgetExhausted):
+            objective([0.0])
+        self.assertEqual((budget.evaluations, objective.evaluations), (3, 3))
+        np.testing.assert_array_equal(objective.best_x, [1.0])
+        self.assertEqual(objective.best_fun, 1.0)
+
+    def test_objectives_share_the_budget(self):
+        budget = SearchBudget(max_evaluations=2)
+        first, second = budget.track(lambda x: (x, 2 * x)), budget.track(lambda x: (x, 2 * x))
+        self.assertEqual(first(1.0), (1.0, 2.0))
+        second(0.5)
+        with self.assertRaises(BudgetExhausted):
+            first(0.0)
+        self.assertEqual(second.best_fun, 0.5)
+
+    def test_deadline(self):
+        budget = SearchBudget.from_limits(max_time=0.05)
+        self.assertFalse(budget.exhausted())
+        self.assertIsNone(budget.remaining_evaluations())
+        time.sleep(0.06)
+        self.assertTrue(budget.out_of_time())
+        self.assertEqual(budget.remaining_time(), 0.)
+        with self.assertRaises(BudgetExhausted):
+            budget.track(abs)(1.0)
+
+    def test_share_keeps_deadline(self):
+        budget = SearchBudget(max_evaluations=10, deadline=time.time() + 60)
+        share = budget.share(4)
+        self.assertEqual((share.max_evaluations, share.deadline), (4, budget.deadline))
+        self.assertEqual(share.evaluations, 0)
+        self.assertFalse(SearchBudget().exhausted())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@
 import unittest
 import numpy as np
 from calculation import Simulation, Resonator, SimulationParameters, Medium, Geometry, Aperture
+from calculation import FastGeometry, FastAperture, FastMedium, FastSimulationParameters
 from traits.api import TraitError
 
 class TestAbsorberSimulation(unittest.TestCase):
@@ -78,6 +79,128 @@ class TestAbsorberSimulation(unittest.TestCase):
         result = self.sim.to_dict()
         self.assertIn("q_factor", result)
 
+    def test_adaptive_grid_matches_dense_grid(self):
+        resonator = Resonator(
+            geometry=Geometry(form='cuboid', x=0.5, y=0.3, z=0.2),
+            aperture=Aperture(form='tube', length=0.1, radius=0.05, additional_dampening=True, xi=50))
+        dense = Simulation(resonator, SimulationParameters(medium=Medium(), values_per_octave=2000))
+        adaptive = Simulation(resonator, SimulationParameters(medium=Medium(), values_per_octave=20,
+                                                              adaptive=True, tolerance=1e-4))
+        dense.calc_all()
+        adaptive.calc_all()
+
+        self.assertTrue(adaptive.refined)
+        self.assertLess(len(adaptive.sim_params.frequencies), len(dense.sim_params.frequencies) / 5)
+        self.assertAlmostEqual(adaptive.f_resonance / dense.f_resonance, 1.0, places=3)
+        self.assertAlmostEqual(adaptive.q_factor / dense.q_factor, 1.0, places=3)
+        self.assertEqual(len(adaptive.to_dict()["absorbtion_area"]),
+                         len(adaptive.to_dict()["simulation_parameters"]["frequencies"]))
+
+    def test_lazy_q_factor(self):
+        self.assertFalse(self.sim.is_calculated('absorbtion_area'))
+        q = self.sim.q_factor
+        self.assertGreater(q, 0.0)
+        self.assertTrue(self.sim.is_calculated('absorbtion_area'))
+        # quantities not needed for the Q-factor are not calculated
+        self.assertFalse(self.sim.is_calculated('max_absorbtion_area'))
+
+    def test_aperture_change_recalculates_only_porous_impedance(self):
+        aperture = Aperture(form='tube', radius=0.01, length=0.02, additional_dampening=True, xi=10)
+        sim = Simulation(Resonator(Geometry(form='cuboid', x=0.1, y=0.1, z=0.1), aperture),
+                         SimulationParameters(medium=Medium()))
+        sim.calc_all()
+        z_radiation, q_before = sim.z_radiation, sim.q_factor
+        aperture.xi = 1000
+        self.assertFalse(sim.is_calculated('z_porous'))
+        self.assertFalse(sim.is_calculated('q_factor'))
+        self.assertTrue(sim.is_calculated('z_radiation'))
+        self.assertTrue(sim.is_calculated('z_stiff_mass'))
+        self.assertLess(sim.q_factor, q_before)
+        self.assertIs(sim.z_radiation, z_radiation)
+
+    def test_geometry_change_updates_results(self):
+        f_before = self.sim.f_resonance
+        self.sim.resonator.geometry.x = 0.4
+        self.assertFalse(self.sim.is_calculated('z_stiff_mass'))
+        self.assertTrue(self.sim.is_calculated('z_friction'))
+        self.assertLess(self.sim.f_resonance, f_before)
+        fresh = Simulation(self.sim.resonator, SimulationParameters(medium=Medium()))
+        np.testing.assert_allclose(self.sim.absorbtion_area, fresh.absorbtion_area)
+
+    def test_medium_change_updates_results(self):
+        area_before = self.sim.absorbtion_area
+        self.sim.sim_params.medium.temperature_celsius = 40.0
+        self.assertFalse(self.sim.is_calculated('absorbtion_area'))
+        fresh = Simulation(self.sim.resonator, SimulationParameters(medium=Medium(temperature_celsius=40.0)))
+        np.testing.assert_allclose(self.sim.absorbtion_area, fresh.absorbtion_area)
+        self.assertFalse(np.allclose(self.sim.absorbtion_area, area_before))
+
+    def test_to_dict_does_not_calculate(self):
+        result = self.sim.to_dict()
+        self.assertIsNone(result["absorbtion_area"])
+        self.assertFalse(self.sim.is_calculated('absorbtion_area'))
+
+    def test_adaptive_grid_is_refined_again_after_geometry_change(self):
+        def simulation(**params):
+            return Simulation(Resonator(Geometry(form='cuboid', x=0.5, y=0.3, z=0.2),
+                                        Aperture(form='tube', length=0.1, radius=0.05,
+                                                 additional_dampening=True, xi=50)),
+                              SimulationParameters(medium=Medium(), **params))
+
+        adaptive = simulation(values_per_octave=24, adaptive=True, tolerance=1e-4)
+        adaptive.calc_all()
+        adaptive.update_geometry(x=0.9)
+        dense = simulation(values_per_octave=2000)
+        dense.update_geometry(x=0.9)
+        self.assertTrue(adaptive.refined)
+        self.assertAlmostEqual(adaptive.f_resonance / dense.f_resonance, 1.0, places=3)
+        self.assertAlmostEqual(adaptive.q_factor / dense.q_factor, 1.0, places=3)
+
+    def test_from_dict_restores_q_factor(self):
+        q = self.sim.q_factor
+        restored = Simulation.from_dict(self.sim.to_dict())
+        self.assertTrue(restored.is_calculated('q_factor'))
+        self.assertEqual(restored.q_factor, q)
+
+    def test_many_simulations_share_input_observers(self):
+        params = SimulationParameters(medium=Medium())
+        geometry = Geometry(form='cuboid', x=0.1, y=0.1, z=0.1)
+        aperture = Aperture(form='tube', radius=0.01, length=0.02)
+        notifiers = len(geometry.trait('x')._notifiers(True))
+        sims = [Simulation(Resonator(geometry, aperture), params) for _ in range(400)]
+        # one notifier per input object, not one per simulation
+        self.assertEqual(len(params.trait('values_per_octave')._notifiers(True)), 1)
+        self.assertEqual(len(geometry.trait('x')._notifiers(True)), notifiers + 1)
+        for sim in sims[::100]:
+            sim.calc_all()
+        geometry.x = 0.2
+        self.assertFalse(any(sim.is_calculated('z_stiff_mass') for sim in sims))
+
+    def test_update_geometry_recalculates_only_stiffness(self):
+        self.sim.calc_all()
+        z_mass, z_friction = self.sim.z_mass, self.sim.z_friction
+        area = self.sim.update_geometry(x=0.3)
+        self.assertIs(self.sim.z_mass, z_mass)
+        self.assertIs(self.sim.z_friction, z_friction)
+        fresh = Simulation(Resonator(Geometry(form='cuboid', x=0.3, y=0.1, z=0.1),
+                                     Aperture(form='tube', radius=0.01, length=0.02)),
+                           SimulationParameters(medium=Medium()))
+        np.testing.assert_allclose(area, fresh.absorbtion_area)
+
+    def test_update_fast_aperture(self):
+        sim = Simulation(Resonator(FastGeometry(form='cuboid', x=0.1, y=0.1, z=0.1),
+                                   FastAperture(form='tube', radius=0.01, length=0.02,
+                                                additional_dampening=True, xi=10)),
+                         FastSimulationParameters(medium=FastMedium()))
+        sim.calc_all()
+        z_stiff_mass = sim.z_stiff_mass
+        area = sim.update_aperture(xi=500)
+        self.assertEqual(sim.resonator.aperture.xi, 500)
+        self.assertIs(sim.z_stiff_mass, z_stiff_mass)
+        fresh = Simulation(Resonator(sim.resonator.geometry, sim.resonator.aperture), sim.sim_params)
+        np.testing.assert_allclose(area, fresh.absorbtion_area)
+        self.assertAlmostEqual(sim.q_factor, fresh.q_factor)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -78,6 +78,29 @@ class TestSimulationParameters(unittest.TestCase):
         self.sim.update()
         self.assertEqual(self.sim.angle_of_incidence, 0.0)
 
+    def test_adaptive_refinement_points(self):
+        """
+        Test that the adaptive refinement only splits intervals around the peak of a narrow curve
+        and that the returned frequencies lie inside the split intervals.
+        """
+        sim = SimulationParameters(medium=self.medium, values_per_octave=10, adaptive=True)
+        curve = 1 / (1 + ((sim.frequencies - 200) / 2)**2)
+        new = sim.refinement_points(curve)
+        self.assertGreater(len(new), 0)
+        self.assertTrue(np.all((new > 100) & (new < 400)))
+        self.assertEqual(len(np.intersect1d(new, sim.frequencies)), 0)
+
+    def test_adaptive_to_dict_roundtrip(self):
+        """
+        Test that a refined frequency vector survives serialization.
+        """
+        sim = SimulationParameters(medium=self.medium, values_per_octave=10, adaptive=True)
+        sim.set_frequencies(np.sort(np.append(sim.frequencies, 123.4)))
+        restored = SimulationParameters.from_dict(sim.to_dict())
+        self.assertTrue(restored.adaptive)
+        np.testing.assert_allclose(restored.frequencies, sim.frequencies)
+        np.testing.assert_allclose(restored.wavelength, sim.wavelength)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
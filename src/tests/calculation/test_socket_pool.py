@@ -0,0 +1,204 @@
+import multiprocessing
+import os
+import socket
+import tempfile
+import time
+import unittest
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client
+from calculation import WorkerPool, get_pool
+from calculation.socket_pool import SocketExecutor, WorkerLostError, get_authkey, parse_address, run_worker
+
+AUTHKEY = b'test-key'
+
+
+def square(x):
+    return x * x
+
+
+def exit_once(marker):
+    """Kills the worker on the first call, succeeds on the retry."""
+    if not os.path.exists(marker):
+        open(marker, 'w').close()
+        os._exit(1)
+    return 'retried'
+
+
+def hang_once(marker):
+    """Blocks longer than the heartbeat timeout on the first call."""
+    if not os.path.exists(marker):
+        open(marker, 'w').close()
+        time.sleep(2.0)
+    return 'retried'
+
+
+def always_exit():
+    os._exit(1)
+
+
+def start_workers(address, n, **kwargs):
+    # spawned, forking the multi-threaded test process could copy held locks into the workers
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=run_worker, args=(address, AUTHKEY), kwargs=kwargs, daemon=True)
+               for _ in range(n)]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+def stop_workers(workers, timeout=30.0):
+    """Joins the workers with a timeout and kills the ones that did not exit."""
+    exitcodes = []
+    for worker in workers:
+        worker.join(timeout)
+        if worker.is_alive():
+            worker.kill()
+            worker.join(5.0)
+        exitcodes.append(worker.exitcode)
+    return exitcodes
+
+
+class TestSocketPool(unittest.TestCase):
+    """
+    Tests the socket coordinator with local worker processes.
+    """
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.marker = os.path.join(self._tmp.name, 'marker')
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_parse_address(self):
+        self.assertEqual(parse_address('node1:5555'), ('node1', 5555))
+        self.assertEqual(parse_address(':5555'), ('localhost', 5555))
+        self.assertEqual(parse_address('unix:/tmp/hrcalc.sock'), '/tmp/hrcalc.sock')
+        with self.assertRaises(ValueError):
+            parse_address('node1')
+
+    def test_authkey_required(self):
+        saved = os.environ.pop('HRCALC_AUTHKEY', None)
+        try:
+            with self.assertRaises(ValueError):
+                get_authkey()
+            self.assertEqual(get_authkey('key'), b'key')
+        finally:
+            if saved is not None:
+                os.environ['HRCALC_AUTHKEY'] = saved
+
+    def test_map_on_local_workers(self):
+        with WorkerPool('socket', max_workers=2, authkey=AUTHKEY) as pool:
+            workers = start_workers(pool.address, 2)
+            try:
+                self.assertTrue(pool._executor.wait_for_workers(2, timeout=60))
+                self.assertEqual(pool.map(square, range(20), chunksize=3), [x * x for x in range(20)])
+            finally:
+                pool.shutdown()
+        # both workers received the shutdown message
+        self.assertEqual(stop_workers(workers), [0, 0])
+
+    def test_unix_socket(self):
+        address = 'unix:' + os.path.join(self._tmp.name, 'hrcalc.sock')
+        with WorkerPool('socket', max_workers=1, address=address, authkey=AUTHKEY) as pool:
+            workers = start_workers(address, 1)
+            try:
+                self.assertEqual(pool.map(square, range(4)), [0, 1, 4, 9])
+            finally:
+                pool.shutdown()
+        self.assertEqual(stop_workers(workers), [0])
+        self.assertFalse(os.path.exists(address[len('unix:'):]))
+
+    def test_wrong_key_is_rejected(self):
+        executor = SocketExecutor(authkey=AUTHKEY)
+        try:
+            with self.assertRaises(AuthenticationError):
+                Client(executor.address, authkey=b'wrong')
+            self.assertEqual(executor.num_workers, 0)
+        finally:
+            executor.shutdown()
+        self.assertFalse(executor._accept_thread.is_alive())
+
+    def test_shutdown_without_workers(self):
+        executor = SocketExecutor(authkey=AUTHKEY)
+        future = executor.submit(square, 2)
+        start = time.monotonic()
+        executor.shutdown(cancel_futures=True)
+        self.assertLess(time.monotonic() - start, 2.0)
+        self.assertTrue(future.cancelled())
+        self.assertFalse(executor._accept_thread.is_alive())
+
+    def test_get_pool_checks_authkey(self):
+        pool = get_pool('socket', 1, address='localhost:0', authkey=AUTHKEY)
+        try:
+            self.assertIs(get_pool('socket', 1, address='localhost:0', authkey=AUTHKEY.decode()), pool)
+            with self.assertRaises(ValueError):
+                get_pool('socket', 1, address='localhost:0', authkey=b'other-key')
+        finally:
+            pool.shutdown()
+        other = get_pool('socket', 1, address='localhost:0', authkey=b'other-key')
+        self.assertIsNot(other, pool)
+        other.shutdown()
+
+    def test_worker_handshake_times_out(self):
+        # the connection is accepted by the backlog, but the handshake never starts
+        with socket.create_server(('localhost', 0)) as server:
+            start = time.monotonic()
+            with self.assertRaises(TimeoutError):
+                run_worker(server.getsockname(), AUTHKEY, connect_timeout=0.5, blas_threads=None)
+            self.assertLess(time.monotonic() - start, 5.0)
+
+    def test_retry_on_lost_worker(self):
+        executor = SocketExecutor(authkey=AUTHKEY)
+        workers = start_workers(executor.address, 2)
+        try:
+            self.assertEqual(executor.submit(exit_once, self.marker).result(timeout=30), 'retried')
+            self.assertEqual((executor.retries, executor.workers_lost), (1, 1))
+        finally:
+            executor.shutdown(cancel_futures=True)
+            stop_workers(workers)
+
+    def test_retry_on_missed_heartbeats(self):
+        executor = SocketExecutor(authkey=AUTHKEY, heartbeat_timeout=0.5)
+        workers = start_workers(executor.address, 2, heartbeat_interval=100.0)
+        try:
+            self.assertEqual(executor.submit(hang_once, self.marker).result(timeout=30), 'retried')
+            self.assertEqual(executor.retries, 1)
+        finally:
+            executor.shutdown(cancel_futures=True)
+            stop_workers(workers)
+
+    def test_heartbeats_keep_long_tasks_alive(self):
+        executor = SocketExecutor(authkey=AUTHKEY, heartbeat_timeout=0.5)
+        workers = start_workers(executor.address, 1, heartbeat_interval=0.1)
+        try:
+            self.assertIsNone(executor.submit(time.sleep, 1.2).result(timeout=30))
+            self.assertEqual(executor.retries, 0)
+        finally:
+            executor.shutdown(cancel_futures=True)
+            stop_workers(workers)
+
+    def test_task_fails_after_max_retries(self):
+        executor = SocketExecutor(authkey=AUTHKEY, max_retries=1)
+        workers = start_workers(executor.address, 2)
+        try:
+            with self.assertRaises(WorkerLostError):
+                executor.submit(always_exit).result(timeout=30)
+        finally:
+            executor.shutdown(cancel_futures=True)
+            stop_workers(workers)
+
+    def test_task_exceptions_are_forwarded(self):
+        executor = SocketExecutor(authkey=AUTHKEY)
+        workers = start_workers(executor.address, 1)
+        try:
+            with self.assertRaises(ZeroDivisionError):
+                executor.submit(divmod, 1, 0).result(timeout=30)
+            self.assertEqual(executor.submit(square, 3).result(timeout=30), 9)
+        finally:
+            executor.shutdown(cancel_futures=True)
+            stop_workers(workers)
+
+
+if __name__ == '__main__':
+    unittest.main()
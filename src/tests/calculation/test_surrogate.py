@@ -0,0 +1,53 @@
+import unittest
+import numpy as np
+from calculation import Optimizer
+from calculation.surrogate import SurrogateModel
+
+
+class TestSurrogateModel(unittest.TestCase):
+    """
+    Tests the RBF surrogate of resonance frequency, Q-factor and peak area.
+    """
+
+    def setUp(self):
+        self.optimizer = Optimizer(300, 4)
+        self.optimizer.bounds = list(self.optimizer.default_bounds)
+        self.surrogate = SurrogateModel(self.optimizer.bounds)
+
+    def _simulate(self, designs):
+        evaluations = [self.optimizer.evaluate_with_gradient(x)[0] for x in designs]
+        return self.optimizer._surrogate_targets(evaluations)
+
+    def test_unit_mapping(self):
+        designs = np.array(self.optimizer.generate_initial_design(8, seed=0))
+        unit = self.surrogate.to_unit(designs)
+        self.assertTrue(np.all((unit >= 0) & (unit <= 1)))
+        np.testing.assert_allclose(self.surrogate.from_unit(unit), designs)
+
+    def test_interpolates_training_designs(self):
+        designs = np.array(self.optimizer.generate_initial_design(64, seed=0))
+        f_res, q_factor, peak_area_norm = self._simulate(designs)
+        self.surrogate.fit(designs, f_res, q_factor, peak_area_norm)
+        valid = np.isfinite(q_factor)
+        predicted = self.surrogate.predict(designs[valid])
+        np.testing.assert_allclose(predicted[0], f_res[valid], rtol=1e-4)
+        np.testing.assert_allclose(predicted[1], q_factor[valid], rtol=1e-4)
+        self.assertEqual(self.surrogate.num_predictions, valid.sum())
+
+    def test_predicts_unseen_frequencies(self):
+        designs = np.array(self.optimizer.generate_initial_design(128, seed=0))
+        self.surrogate.fit(designs, *self._simulate(designs))
+        test = np.array(self.optimizer.generate_initial_design(16, sampling='random', seed=1))
+        f_res, _, _ = self._simulate(test)
+        # the resonance frequency is close to a power law of the parameters
+        np.testing.assert_allclose(self.surrogate.predict(test)[0], f_res, rtol=0.1)
+
+    def test_requires_training(self):
+        with self.assertRaises(RuntimeError):
+            self.surrogate.predict([self.optimizer.generate_initial_set()])
+        with self.assertRaises(ValueError):
+            self.surrogate.fit(np.ones((3, 6)), np.ones(3), np.ones(3), np.ones(3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import unittest
+from calculation import Optimizer, WorkerPool, get_pool
+from calculation.worker_pool import BLAS_THREAD_VARIABLES
+
+
+def square(x):
+    return x * x
+
+
+def blas_threads(_):
+    return os.environ.get('OPENBLAS_NUM_THREADS')
+
+
+class TestWorkerPool(unittest.TestCase):
+    """
+    Tests the persistent worker pool with all backends.
+    """
+
+    def test_map_keeps_order(self):
+        for backend in ('serial', 'thread'):
+            with WorkerPool(backend, max_workers=2) as pool:
+                self.assertEqual(pool.map(square, range(10), chunksize=3), [x * x for x in range(10)])
+
+    def test_submit_chunks(self):
+        with WorkerPool('serial') as pool:
+            futures = pool.submit_chunks(square, range(10), chunksize=4)
+            self.assertEqual([len(chunk) for chunk in futures.values()], [4, 4, 2])
+            for future, chunk in futures.items():
+                self.assertEqual(future.result(), [x * x for x in chunk])
+
+    def test_process_pool_pins_blas_threads(self):
+        before = {name: os.environ.get(name) for name in BLAS_THREAD_VARIABLES}
+        with WorkerPool('process', max_workers=1, blas_threads=1) as pool:
+            self.assertEqual(pool.map(blas_threads, [0]), ['1'])
+            self.assertEqual(pool.map(square, range(5)), [x * x for x in range(5)])
+        # the environment of the calling process is unchanged
+        self.assertEqual({name: os.environ.get(name) for name in BLAS_THREAD_VARIABLES}, before)
+
+    def test_serial_cancel_skips_pending_tasks(self):
+        with WorkerPool('serial') as pool:
+            futures = pool.submit_chunks(square, range(6), chunksize=1)
+            completed = []
+            for future in pool.as_completed(futures):
+                completed.extend(future.result())
+                if len(completed) == 2:
+                    for pending in futures:
+                        pending.cancel()
+                    break
+            self.assertEqual(completed, [0, 1])
+            self.assertEqual(sum(future.cancelled() for future in futures), 4)
+
+    def test_get_pool_is_shared(self):
+        pool = get_pool('thread', 2)
+        self.assertIs(get_pool('thread', 2), pool)
+        pool.shutdown()
+        self.assertIsNot(get_pool('thread', 2), pool)
+
+    def test_invalid_backend(self):
+        with self.assertRaises(ValueError):
+            WorkerPool('cluster')
+
+    def test_optimizer_uses_pool(self):
+        optimizer = Optimizer(f_target=300.0, q_target=4.0, pool=get_pool('serial'))
+        result = optimizer.search_optimal(num_trials=4, chunksize=2)
+        self.assertIs(result, optimizer.best_results[0])
+
+
+if __name__ == '__main__':
+    unittest.main()